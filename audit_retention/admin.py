@@ -0,0 +1,16 @@
+from django.contrib import admin
+from .models import AuditDailyAggregate
+
+@admin.register(AuditDailyAggregate)
+class AuditDailyAggregateAdmin(admin.ModelAdmin):
+    list_display = ("source", "day", "user", "bucket", "count")
+    list_filter = ("source", "day")
+    search_fields = ("user__username", "bucket")
+    ordering = ("-day",)
+
+    def has_add_permission(self, request):
+        # Aggregates are written by the retention job only
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
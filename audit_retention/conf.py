@@ -0,0 +1,11 @@
+from django.conf import settings
+
+# Built-in fallbacks for keys missing from settings.AUDIT_RETENTION
+_HARD_DEFAULTS = {
+    "RAW_DAYS": 90,       # keep raw rows this long, then roll up and delete
+    "CHUNK_SIZE": 1000,   # rows deleted per transaction (keeps InnoDB locks short)
+    "POLICIES": {},       # per-model overrides: {"app_label.Model": {"RAW_DAYS": 30}}
+}
+
+def get_setting(key: str):
+    return (getattr(settings, "AUDIT_RETENTION", None) or {}).get(key, _HARD_DEFAULTS.get(key))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from audit_retention.services import apply_retention
+
+class Command(BaseCommand):
+    help = "Roll up and delete audit log rows older than their retention window."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be reclaimed")
+        parser.add_argument("--model", action="append", dest="models", help="Limit to a model label (repeatable), e.g. user_profile.UserActivity")
+        parser.add_argument("--chunk-size", type=int, default=None, help="Rows deleted per transaction")
+
+    def handle(self, *args, **opts):
+        reports = apply_retention(
+            labels=opts["models"], dry_run=opts["dry_run"], chunk_size=opts["chunk_size"]
+        )
+
+        verb = "would reclaim" if opts["dry_run"] else "deleted"
+        for report in reports:
+            size = f" (~{report['bytes']:,} bytes)" if report["bytes"] is not None else ""
+            self.stdout.write(f"{report['model']}: {verb} {report['rows']:,} rows{size}")
+
+        self.stdout.write(self.style.SUCCESS("Audit retention pass complete."))
+
+# preview:
+# python manage.py apply_audit_retention --dry-run
+
+# apply to every policy:
+# python manage.py apply_audit_retention
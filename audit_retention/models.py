@@ -0,0 +1,21 @@
+from django.db import models
+from django.contrib.auth.models import User
+
+class AuditDailyAggregate(models.Model):
+    """
+    Daily counts of audit rows that have aged out of raw retention.
+    `source` is the model label, `bucket` the policy's grouping
+    (e.g. "action=show_private_key,success=False").
+    """
+    source = models.CharField(max_length=100)
+    day = models.DateField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name="+")
+    bucket = models.CharField(max_length=255, default="all")
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("source", "day", "user", "bucket")
+        ordering = ["-day"]
+
+    def __str__(self):
+        return f"{self.source} {self.day} {self.bucket}: {self.count}"
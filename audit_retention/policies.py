@@ -0,0 +1,46 @@
+from django.apps import apps
+from .conf import get_setting
+
+class RetentionPolicy:
+    """
+    How one audit model ages out:
+      - date_field: rows older than RAW_DAYS by this field are rolled up and deleted
+      - user_field: kept as a dimension of the daily aggregate (None for global tables)
+      - bucket_fields: further aggregate dimensions
+      - filters: only rows matching these are eligible
+    """
+
+    def __init__(self, label, date_field, user_field=None, bucket_fields=(), filters=None):
+        self.label = label
+        self.date_field = date_field
+        self.user_field = user_field
+        self.bucket_fields = tuple(bucket_fields)
+        self.filters = filters or {}
+
+    @property
+    def model(self):
+        return apps.get_model(self.label)
+
+    @property
+    def raw_days(self):
+        override = (get_setting("POLICIES") or {}).get(self.label) or {}
+        return override.get("RAW_DAYS", get_setting("RAW_DAYS"))
+
+    def bucket_for(self, row):
+        if not self.bucket_fields:
+            return "all"
+        return ",".join(f"{name}={row[name]}" for name in self.bucket_fields)
+
+POLICIES = [
+    RetentionPolicy("user_auth_key.PrivateKeyAccessLog", "timestamp", "user", ("action", "success")),
+    RetentionPolicy("user_auth_key.KeyRegenerationLog", "timestamp", "user"),
+    RetentionPolicy("user_profile.UserActivity", "login_time", "user", ("login_successful",)),
+    # Only expired temporary entries; permanent bans are never aged out
+    RetentionPolicy("auth_core.IPBlacklist", "updated_on", filters={"permanently_blacklisted": False}),
+]
+
+def get_policies(labels=None):
+    if not labels:
+        return list(POLICIES)
+    wanted = {label.lower() for label in labels}
+    return [p for p in POLICIES if p.label.lower() in wanted]
@@ -0,0 +1,120 @@
+from datetime import timedelta
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .conf import get_setting
+from .models import AuditDailyAggregate
+from .policies import get_policies
+
+def _expired(policy, now):
+    cutoff = now - timedelta(days=policy.raw_days)
+    return policy.model.objects.filter(
+        **{f"{policy.date_field}__lt": cutoff}, **policy.filters
+    )
+
+def _avg_row_bytes(model):
+    """
+    Average on-disk row size from information_schema (MySQL only).
+    Returns None on other backends, where the estimate is unavailable.
+    """
+    if connection.vendor != "mysql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT avg_row_length FROM information_schema.tables "
+            "WHERE table_schema = DATABASE() AND table_name = %s",
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+def _roll_up(policy, ids):
+    """
+    Add the rows in `ids` to the daily aggregates for this policy.
+    """
+    dims = ["day"] + ([policy.user_field] if policy.user_field else []) + list(policy.bucket_fields)
+    groups = (
+        policy.model.objects.filter(pk__in=ids)
+        .annotate(day=TruncDate(policy.date_field))
+        .values(*dims)
+        .annotate(n=Count("pk"))
+        .order_by()
+    )
+
+    increments = {}
+    for g in groups:
+        user_id = g[policy.user_field] if policy.user_field else None
+        key = (g["day"], user_id, policy.bucket_for(g))
+        increments[key] = increments.get(key, 0) + g["n"]
+    if not increments:
+        return
+
+    existing = AuditDailyAggregate.objects.filter(
+        source=policy.label, day__in={k[0] for k in increments}
+    )
+    by_key = {(a.day, a.user_id, a.bucket): a for a in existing}
+
+    to_update, to_create = [], []
+    for (day, user_id, bucket), n in increments.items():
+        agg = by_key.get((day, user_id, bucket))
+        if agg:
+            agg.count += n
+            to_update.append(agg)
+        else:
+            to_create.append(AuditDailyAggregate(
+                source=policy.label, day=day, user_id=user_id, bucket=bucket, count=n,
+            ))
+
+    if to_update:
+        AuditDailyAggregate.objects.bulk_update(to_update, ["count"])
+    if to_create:
+        AuditDailyAggregate.objects.bulk_create(to_create)
+
+def apply_policy(policy, dry_run=False, chunk_size=None, now=None):
+    """
+    Roll up and delete one model's expired rows in primary-key chunks.
+    Each chunk is its own short transaction. Returns a report dict.
+    """
+    now = now or timezone.now()
+    expired = _expired(policy, now)
+
+    if dry_run:
+        rows = expired.count()
+        avg_bytes = _avg_row_bytes(policy.model)
+        return {
+            "model": policy.label,
+            "rows": rows,
+            "bytes": rows * avg_bytes if avg_bytes is not None else None,
+        }
+
+    chunk_size = chunk_size or get_setting("CHUNK_SIZE")
+    deleted = 0
+    last_pk = None
+    while True:
+        chunk = expired.order_by("pk")
+        if last_pk is not None:
+            chunk = chunk.filter(pk__gt=last_pk)
+        ids = list(chunk.values_list("pk", flat=True)[:chunk_size])
+        if not ids:
+            break
+
+        with transaction.atomic():
+            _roll_up(policy, ids)
+            policy.model.objects.filter(pk__in=ids).delete()
+
+        deleted += len(ids)
+        last_pk = ids[-1]
+
+    return {"model": policy.label, "rows": deleted, "bytes": None}
+
+def apply_retention(labels=None, dry_run=False, chunk_size=None):
+    """
+    Apply every configured retention policy (or only `labels`).
+    Returns one report per model.
+    """
+    now = timezone.now()
+    return [
+        apply_policy(policy, dry_run=dry_run, chunk_size=chunk_size, now=now)
+        for policy in get_policies(labels)
+    ]
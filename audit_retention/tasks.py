@@ -0,0 +1,11 @@
+from celery import shared_task
+from audit_retention.services import apply_retention
+
+
+@shared_task(name="audit_retention.apply_audit_retention")
+def apply_audit_retention():
+    """
+    Periodic task: roll up and delete expired audit rows.
+    Schedule it daily with celery beat, outside peak hours.
+    """
+    return apply_retention()
@@ -0,0 +1,44 @@
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from audit_retention.models import AuditDailyAggregate
+from audit_retention.services import apply_retention
+from auth_core.models import IPBlacklist
+from user_auth_key.models import PrivateKeyAccessLog
+
+
+class AuditRetentionTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user("alice", "alice@example.com", "pw")
+        old = timezone.now() - timedelta(days=120)
+        for success in (False, False, True):
+            log = PrivateKeyAccessLog.objects.create(user=self.user, success=success, action="show_private_key")
+            PrivateKeyAccessLog.objects.filter(pk=log.pk).update(timestamp=old)
+        PrivateKeyAccessLog.objects.create(user=self.user, success=False, action="show_private_key")
+
+        IPBlacklist.objects.create(ip_address="10.0.0.1")
+        IPBlacklist.objects.create(ip_address="10.0.0.2", permanently_blacklisted=True)
+        IPBlacklist.objects.update(updated_on=old)
+
+    def test_dry_run_reports_without_deleting(self):
+        reports = {r["model"]: r["rows"] for r in apply_retention(dry_run=True)}
+        self.assertEqual(reports["user_auth_key.PrivateKeyAccessLog"], 3)
+        self.assertEqual(reports["auth_core.IPBlacklist"], 1)
+        self.assertEqual(PrivateKeyAccessLog.objects.count(), 4)
+
+    def test_expired_rows_are_rolled_up_then_deleted(self):
+        apply_retention(chunk_size=2)
+
+        self.assertEqual(PrivateKeyAccessLog.objects.count(), 1)
+        self.assertEqual(list(IPBlacklist.objects.values_list("ip_address", flat=True)), ["10.0.0.2"])
+
+        counts = dict(
+            AuditDailyAggregate.objects.filter(source="user_auth_key.PrivateKeyAccessLog", user=self.user)
+            .values_list("bucket", "count")
+        )
+        self.assertEqual(counts, {
+            "action=show_private_key,success=False": 2,
+            "action=show_private_key,success=True": 1,
+        })
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import APIKey, Application, IPBlacklist
+from .models import APIKey, Application, IPBlacklist, OneTimeToken
 
 class ApplicationAdmin(admin.ModelAdmin):
     list_display = ('name', 'description', 'created_on')
@@ -20,6 +20,17 @@ class IPBlacklistAdmin(admin.ModelAdmin):
     search_fields = ("ip_address",)
     list_filter = ("permanently_blacklisted",)
 
+class OneTimeTokenAdmin(admin.ModelAdmin):
+    list_display = ("purpose", "user", "object_id", "expires_at", "used_at", "created_on")
+    list_filter = ("purpose",)
+    search_fields = ("user__username",)
+    readonly_fields = ("token_hash", "purpose", "user", "object_id", "expires_at", "used_at", "created_on")
+
+    def has_add_permission(self, request):
+        """Tokens are issued by auth_core.tokens only."""
+        return False
+
 admin.site.register(Application, ApplicationAdmin)
 admin.site.register(APIKey, APIKeyAdmin)
-admin.site.register(IPBlacklist, IPBlacklistAdmin)
\ No newline at end of file
+admin.site.register(IPBlacklist, IPBlacklistAdmin)
+admin.site.register(OneTimeToken, OneTimeTokenAdmin)
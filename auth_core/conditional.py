@@ -0,0 +1,38 @@
+import hashlib
+from rest_framework import status
+from rest_framework.response import Response
+
+def quote_etag(value):
+    return f'"{value}"'
+
+def strong_etag(*parts):
+    """Quoted digest of `parts`, for bodies fully determined by them."""
+    digest = hashlib.sha256("\x1f".join(str(p) for p in parts).encode()).hexdigest()
+    return quote_etag(digest[:32])
+
+def etag_matches(request, etag):
+    """
+    True if the request's If-None-Match covers `etag`.
+    Weak comparison, as RFC 9110 prescribes for If-None-Match.
+    """
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+def conditional_response(request, etag, build_payload, cache_control="private, no-cache"):
+    """
+    304 Not Modified if the client already has `etag`; otherwise a 200 with
+    the payload from `build_payload()`. The payload is only built when needed.
+    """
+    if etag_matches(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(build_payload())
+    response["ETag"] = etag
+    if cache_control:
+        response["Cache-Control"] = cache_control
+    return response
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from auth_core.tokens import purge_expired_tokens
+
+class Command(BaseCommand):
+    help = "Delete expired one-time tokens (verification, password reset, invitation)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Rows deleted per statement")
+
+    def handle(self, *args, **opts):
+        deleted = purge_expired_tokens(chunk_size=opts["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted:,} expired tokens."))
+
+# python manage.py purge_expired_tokens
@@ -1,4 +1,5 @@
 from django.db import models
+from django.contrib.auth.models import User
 from datetime import timedelta
 import secrets
 
@@ -38,4 +39,30 @@ class IPBlacklist(models.Model):
     blacklist_count = models.PositiveIntegerField(default=1)
     permanently_blacklisted = models.BooleanField(default=False)
     created_on = models.DateTimeField(auto_now_add=True)
-    updated_on = models.DateTimeField(auto_now=True)
\ No newline at end of file
+    updated_on = models.DateTimeField(auto_now=True)
+class TokenPurpose(models.TextChoices):
+    EMAIL_VERIFICATION = "email_verification", "Email verification"
+    PASSWORD_RESET = "password_reset", "Password reset"
+    INVITATION = "invitation", "Invitation"
+
+class OneTimeToken(models.Model):
+    """
+    Single-use token stored only as its SHA-256 hash.
+    The raw value exists only in the link sent to the user.
+    """
+    token_hash = models.CharField(max_length=64, unique=True, editable=False)
+    purpose = models.CharField(max_length=32, choices=TokenPurpose.choices)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='one_time_tokens', null=True, blank=True)
+    object_id = models.PositiveBigIntegerField(null=True, blank=True)  # e.g. the Invitation a token belongs to
+    expires_at = models.DateTimeField(db_index=True)
+    used_at = models.DateTimeField(null=True, blank=True)
+    created_on = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['purpose', 'user'], name='onetimetoken_purpose_user_idx'),
+            models.Index(fields=['purpose', 'object_id'], name='onetimetoken_purpose_obj_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.purpose} token for {self.user_id or self.object_id}"
@@ -0,0 +1,10 @@
+from celery import shared_task
+from auth_core.tokens import purge_expired_tokens
+
+
+@shared_task(name="auth_core.purge_expired_tokens")
+def purge_expired_tokens_task():
+    """
+    Periodic task: delete expired one-time tokens.
+    """
+    return purge_expired_tokens()
@@ -1,7 +1,9 @@
 from django.test import TestCase, RequestFactory
 from django.utils import timezone
 from datetime import timedelta
-from auth_core.models import APIKey, Application
+from django.contrib.auth.models import User
+from auth_core.models import APIKey, Application, OneTimeToken, TokenPurpose
+from auth_core.tokens import issue_token, consume_token, peek_token, purge_expired_tokens, hash_token
 from auth_core.throttling import APIKeyRateThrottle
 
 class APIKeyRateThrottleTest(TestCase):
@@ -63,3 +65,29 @@ class APIKeyRateThrottleTest(TestCase):
 
         allowed = self.throttle.allow_request(request, None)
         self.assertTrue(allowed)
+
+
+class OneTimeTokenTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user("alice", "alice@example.com", "pw")
+
+    def test_only_the_hash_is_stored(self):
+        raw = issue_token(TokenPurpose.PASSWORD_RESET, user=self.user)
+        self.assertFalse(OneTimeToken.objects.filter(token_hash=raw).exists())
+        self.assertTrue(OneTimeToken.objects.filter(token_hash=hash_token(raw)).exists())
+
+    def test_token_is_single_use_and_purpose_bound(self):
+        raw = issue_token(TokenPurpose.PASSWORD_RESET, user=self.user)
+        self.assertIsNone(consume_token(raw, TokenPurpose.EMAIL_VERIFICATION))
+        self.assertEqual(consume_token(raw, TokenPurpose.PASSWORD_RESET).user, self.user)
+        self.assertIsNone(consume_token(raw, TokenPurpose.PASSWORD_RESET))
+
+    def test_expired_tokens_are_rejected_and_purged(self):
+        raw = issue_token(TokenPurpose.PASSWORD_RESET, user=self.user, ttl=timedelta(minutes=15))
+        OneTimeToken.objects.filter(token_hash=hash_token(raw)).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertIsNone(peek_token(raw, TokenPurpose.PASSWORD_RESET))
+        self.assertIsNone(consume_token(raw, TokenPurpose.PASSWORD_RESET))
+        issue_token(TokenPurpose.PASSWORD_RESET, user=self.user)
+        self.assertEqual(purge_expired_tokens(chunk_size=1), 1)
+        self.assertFalse(OneTimeToken.objects.filter(token_hash=hash_token(raw)).exists())
@@ -0,0 +1,107 @@
+import hashlib
+import secrets
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from .models import OneTimeToken, TokenPurpose
+
+# Lifetimes per purpose; override with settings.ONE_TIME_TOKEN_TTL
+DEFAULT_TTLS = {
+    TokenPurpose.EMAIL_VERIFICATION: timedelta(days=7),
+    TokenPurpose.PASSWORD_RESET: timedelta(minutes=15),
+    TokenPurpose.INVITATION: timedelta(days=14),
+}
+PURGE_CHUNK_SIZE = 1000
+
+def hash_token(raw):
+    """
+    Tokens carry 256 bits of randomness, so a plain SHA-256 is enough:
+    there is nothing to brute-force and the lookup stays a unique-index hit.
+    """
+    return hashlib.sha256(str(raw).encode()).hexdigest()
+
+def get_ttl(purpose):
+    ttl = (getattr(settings, "ONE_TIME_TOKEN_TTL", None) or {}).get(purpose)
+    if ttl is None:
+        return DEFAULT_TTLS[purpose]
+    return ttl if isinstance(ttl, timedelta) else timedelta(seconds=ttl)
+
+def _valid(raw, purpose, now):
+    return OneTimeToken.objects.filter(
+        token_hash=hash_token(raw),
+        purpose=purpose,
+        used_at__isnull=True,
+        expires_at__gt=now,
+    )
+
+def issue_tokens(purpose, targets, ttl=None):
+    """
+    Create one token per (user, object_id) pair with a single INSERT.
+    Returns the raw tokens in the same order as `targets`.
+    """
+    expires_at = timezone.now() + (ttl or get_ttl(purpose))
+    raw_tokens, rows = [], []
+    for user, object_id in targets:
+        raw = secrets.token_urlsafe(32)
+        raw_tokens.append(raw)
+        rows.append(OneTimeToken(
+            token_hash=hash_token(raw),
+            purpose=purpose,
+            user=user,
+            object_id=object_id,
+            expires_at=expires_at,
+        ))
+    OneTimeToken.objects.bulk_create(rows)
+    return raw_tokens
+
+def issue_token(purpose, user=None, object_id=None, ttl=None):
+    """Create a token and return its raw value (only its hash is stored)."""
+    return issue_tokens(purpose, [(user, object_id)], ttl=ttl)[0]
+
+def revoke_tokens(purpose, user=None, object_id=None):
+    """Mark outstanding tokens for this user/object as used."""
+    tokens = OneTimeToken.objects.filter(purpose=purpose, used_at__isnull=True)
+    if user is not None:
+        tokens = tokens.filter(user=user)
+    if object_id is not None:
+        tokens = tokens.filter(object_id=object_id)
+    return tokens.update(used_at=timezone.now())
+
+def peek_token(raw, purpose):
+    """The token if it is unused and unexpired, without consuming it."""
+    if not raw:
+        return None
+    return _valid(raw, purpose, timezone.now()).first()
+
+def consume_token(raw, purpose, user=None):
+    """
+    Spend a token. One conditional UPDATE marks it used only if it is
+    still unused and unexpired, so concurrent requests cannot both win.
+    Returns the token on success, otherwise None.
+    """
+    if not raw:
+        return None
+    now = timezone.now()
+    tokens = _valid(raw, purpose, now)
+    if user is not None:
+        tokens = tokens.filter(user=user)
+    if not tokens.update(used_at=now):
+        return None
+    return OneTimeToken.objects.get(token_hash=hash_token(raw))
+
+def purge_expired_tokens(now=None, chunk_size=PURGE_CHUNK_SIZE):
+    """
+    Delete expired tokens (used or not) in primary-key chunks over the
+    expires_at index. Returns the number of rows deleted.
+    """
+    now = now or timezone.now()
+    deleted = 0
+    while True:
+        ids = list(
+            OneTimeToken.objects.filter(expires_at__lt=now)
+            .order_by("expires_at")
+            .values_list("pk", flat=True)[:chunk_size]
+        )
+        if not ids:
+            return deleted
+        deleted += OneTimeToken.objects.filter(pk__in=ids).delete()[0]
@@ -32,6 +32,8 @@ INSTALLED_APPS = [
     'collaboration',
     'user_auth_key',
     'subscriptions',
+    'email_outbox',
+    'audit_retention',
 ]
 
 MIDDLEWARE = [
@@ -95,6 +97,32 @@ DATABASES = {
 }
 
 
+# Cache
+# Version stamps, snapshots, key/profile caches and quota counters must be
+# seen by every process, so production needs a shared cache (REDIS_URL).
+# Without it each process gets its own LocMemCache and an admin change only
+# reaches the others when their snapshot stamps expire (SNAPSHOT_VERSION_TTL).
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Without a shared cache: upper bound (seconds) on how long a process serves a
+# cached snapshot (plans, subscription settings, gateways, entitlements).
+# Stamps on a shared cache never expire; snapshots rebuild only when bumped.
+SNAPSHOT_VERSION_TTL = int(os.environ.get('SNAPSHOT_VERSION_TTL', 60))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -168,6 +196,32 @@ EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER')
 CONTACT_EMAIL = os.environ.get('CONTACT_EMAIL')
 FROM_EMAIL = f"{BUSINESS_NAME} <{EMAIL_HOST_USER}>"
 
+# Transactional email outbox (see email_outbox/conf.py for defaults)
+EMAIL_OUTBOX = {
+    'BATCH_SIZE': int(os.environ.get('EMAIL_OUTBOX_BATCH_SIZE', 50)),
+    'MAX_ATTEMPTS': 5,
+    'RETRY_BACKOFF_SECONDS': 60,
+    'RATE_PER_SECOND': int(os.environ.get('EMAIL_OUTBOX_RATE_PER_SECOND', 10)),
+}
+
+# Security audit log retention (see audit_retention/conf.py for defaults)
+AUDIT_RETENTION = {
+    'RAW_DAYS': int(os.environ.get('AUDIT_RETENTION_RAW_DAYS', 90)),
+    'CHUNK_SIZE': 1000,
+}
+
+# One-time token lifetimes in seconds (see auth_core/tokens.py for defaults)
+ONE_TIME_TOKEN_TTL = {
+    'email_verification': 7 * 24 * 3600,
+    'password_reset': 15 * 60,
+    'invitation': 14 * 24 * 3600,
+}
+
+# Merge "updated" ActivityLog entries for the same actor/object within this
+# many seconds into a single row (0 disables coalescing)
+ACTIVITY_LOG_COALESCE_SECONDS = int(os.environ.get('ACTIVITY_LOG_COALESCE_SECONDS', 0))
+ACTIVITY_LOG_BUFFER_MAX = 500
+
 # hmac key 
 HMAC_SECRET_KEY = os.environ.get("HMAC_SECRET_KEY")
 
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Invitation, AccountAccess, ActivityLog
+from .models import Invitation, AccountAccess, ActivityLog, ActivityRollup
 
 @admin.register(Invitation)
 class InvitationAdmin(admin.ModelAdmin):
@@ -7,14 +7,14 @@ class InvitationAdmin(admin.ModelAdmin):
     list_filter = ("role", "accepted", "created_at")
     search_fields = ("email", "inviter__username")
     ordering = ("-created_at",)
-    readonly_fields = ("token", "created_at")
+    readonly_fields = ("created_at",)
 
     fieldsets = (
         ("Invitation Info", {
             "fields": ("inviter", "email", "role", "accepted")
         }),
         ("Metadata", {
-            "fields": ("token", "created_at"),
+            "fields": ("created_at",),
             "classes": ("collapse",)
         }),
     )
@@ -87,4 +87,18 @@ class ActivityLogAdmin(admin.ModelAdmin):
 
     def has_add_permission(self, request):
         """Disallow manual creation of ActivityLog records."""
-        return False
\ No newline at end of file
+        return False
+
+@admin.register(ActivityRollup)
+class ActivityRollupAdmin(admin.ModelAdmin):
+    list_display = ("owner", "day", "actor", "content_type", "action", "count")
+    list_filter = ("day", "content_type", "action")
+    search_fields = ("owner__username", "actor__username", "action")
+    ordering = ("-day",)
+
+    def has_add_permission(self, request):
+        """Rollups are maintained by the rollup job only."""
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
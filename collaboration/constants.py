@@ -17,3 +17,6 @@ ACCESS_STATUS_CHOICES = [
     ("revoked", "Revoked"),
     ("expired", "Expired"),
 ]
+
+# Maximum number of addresses accepted by one bulk invitation request
+BULK_INVITE_MAX_SIZE = 500
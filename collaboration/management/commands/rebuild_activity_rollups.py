@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from collaboration.services.activity_rollups import rebuild_activity_rollups, update_activity_rollups
+
+class Command(BaseCommand):
+    help = "Rebuild the ActivityRollup table from ActivityLog (or only catch up with --incremental)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--incremental", action="store_true", help="Only fold in logs newer than the high-water mark")
+        parser.add_argument("--batch-size", type=int, default=5000, help="ActivityLog ids per transaction")
+
+    def handle(self, *args, **opts):
+        if opts["incremental"]:
+            folded = update_activity_rollups(batch_size=opts["batch_size"])
+        else:
+            folded = rebuild_activity_rollups(batch_size=opts["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Activity rollups updated: {folded} log rows folded in."))
+
+# full backfill:
+# python manage.py rebuild_activity_rollups
+
+# catch up only:
+# python manage.py rebuild_activity_rollups --incremental
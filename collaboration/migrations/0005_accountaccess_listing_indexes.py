@@ -0,0 +1,23 @@
+# Generated by Django 5.0.12 on 2026-10-19 05:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collaboration', '0004_activityrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='accountaccess',
+            index=models.Index(fields=['owner', 'role', 'id'], name='access_owner_role_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='accountaccess',
+            index=models.Index(fields=['owner', 'status', 'id'], name='access_owner_status_id_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.12 on 2026-10-19 06:13
+
+import hashlib
+from datetime import timedelta
+from django.db import migrations
+from django.utils import timezone
+
+
+def copy_pending_invitation_tokens(apps, schema_editor):
+    # Pending invitation links keep working: store their hashes as one-time tokens
+    Invitation = apps.get_model('collaboration', 'Invitation')
+    OneTimeToken = apps.get_model('auth_core', 'OneTimeToken')
+    expires_at = timezone.now() + timedelta(days=14)
+    rows = [
+        OneTimeToken(
+            token_hash=hashlib.sha256(str(token).encode()).hexdigest(),
+            purpose='invitation',
+            user_id=inviter_id,
+            object_id=pk,
+            expires_at=expires_at,
+        )
+        for pk, inviter_id, token in Invitation.objects.filter(accepted=False).values_list('pk', 'inviter_id', 'token').iterator()
+    ]
+    OneTimeToken.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collaboration', '0005_accountaccess_listing_indexes'),
+        ('auth_core', '0003_onetimetoken'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_pending_invitation_tokens, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='invitation',
+            name='token',
+        ),
+    ]
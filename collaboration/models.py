@@ -1,7 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
-import uuid
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
 from .constants import ROLE_CHOICES, ACCESS_STATUS_CHOICES
@@ -10,7 +9,6 @@ class Invitation(models.Model):
     inviter = models.ForeignKey(User, related_name="sent_invitations", on_delete=models.CASCADE)
     email = models.EmailField()  # who is being invited
     role = models.CharField(max_length=10, choices=ROLE_CHOICES)
-    token = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
     created_at = models.DateTimeField(default=timezone.now)
     accepted = models.BooleanField(default=False)
 
@@ -37,6 +35,11 @@ class AccountAccess(models.Model):
 
     class Meta:
         unique_together = ("owner", "collaborator")
+        indexes = [
+            # Filtered, keyset-paginated collaborator listing
+            models.Index(fields=["owner", "role", "id"], name="access_owner_role_id_idx"),
+            models.Index(fields=["owner", "status", "id"], name="access_owner_status_id_idx"),
+        ]
 
     def __str__(self):
         scope_info = (
@@ -68,4 +71,33 @@ class ActivityLog(models.Model):
 
     def __str__(self):
         actor = self.actor.username if self.actor else "System"
-        return f"{actor} {self.action} on {self.content_type} #{self.object_id}"
\ No newline at end of file
+        return f"{actor} {self.action} on {self.content_type} #{self.object_id}"
+
+class ActivityRollup(models.Model):
+    """
+    Daily ActivityLog counts per (owner, day, actor, content_type, action).
+    Maintained incrementally by services.activity_rollups so dashboards
+    never have to GROUP BY the raw log.
+    """
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="activity_rollups")
+    day = models.DateField()
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name="+")
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    action = models.CharField(max_length=255)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("owner", "day", "actor", "content_type", "action")
+        ordering = ["-day"]
+
+    def __str__(self):
+        return f"{self.owner_id} {self.day} {self.action} x{self.count}"
+
+class ActivityRollupCheckpoint(models.Model):
+    """High-water mark (last processed ActivityLog id) for a rollup job."""
+    name = models.CharField(max_length=50, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_id}"
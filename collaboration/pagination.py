@@ -0,0 +1,12 @@
+from rest_framework.pagination import CursorPagination
+
+class CollaboratorCursorPagination(CursorPagination):
+    """
+    Keyset pagination for collaborator listings.
+    Each page is a `WHERE id < cursor ORDER BY id DESC LIMIT n` range scan,
+    so deep pages cost the same as the first one (no OFFSET, no COUNT).
+    """
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    ordering = "-id"
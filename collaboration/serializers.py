@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from .models import Invitation, AccountAccess, ActivityLog
+from .constants import ROLE_CHOICES, BULK_INVITE_MAX_SIZE
 from django.utils import timezone
 
 class InvitationSerializer(serializers.ModelSerializer):
@@ -8,12 +9,29 @@ class InvitationSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Invitation
-        fields = ['id', 'inviter', 'email', 'role', 'token', 'created_at', 'accepted']
-        read_only_fields = ['token', 'created_at', 'accepted']
+        fields = ['id', 'inviter', 'email', 'role', 'created_at', 'accepted']
+        read_only_fields = ['created_at', 'accepted']
+
+
+class BulkInvitationEntrySerializer(serializers.Serializer):
+    email = serializers.EmailField()
+    role = serializers.ChoiceField(choices=ROLE_CHOICES)
+
+
+class BulkInvitationSerializer(serializers.Serializer):
+    """
+    Envelope only: entries are validated one by one in the view so a bad
+    address is reported per entry instead of failing the whole batch.
+    """
+    invitations = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=BULK_INVITE_MAX_SIZE,
+    )
 
 
 class AcceptInvitationSerializer(serializers.Serializer):
-    token = serializers.UUIDField()
+    token = serializers.CharField(max_length=64)
 
 
 class AccountAccessSerializer(serializers.ModelSerializer):
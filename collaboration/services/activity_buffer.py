@@ -0,0 +1,144 @@
+# collaboration/services/activity_buffer.py
+import atexit
+import threading
+import time
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from collaboration.models import ActivityLog
+
+def coalesce_window():
+    """Seconds within which repeated updates to one object merge (0 = off)."""
+    return getattr(settings, "ACTIVITY_LOG_COALESCE_SECONDS", 0) or 0
+
+def _max_pending():
+    return getattr(settings, "ACTIVITY_LOG_BUFFER_MAX", 500)
+
+def merge_changes(merged, diff):
+    """
+    Fold `diff` ({field: [old, new]}) into `merged` in place, keeping the
+    first old value and the last new value per field. Fields that end up
+    back at their original value are dropped.
+    """
+    for name, (old_val, new_val) in (diff or {}).items():
+        if name in merged:
+            merged[name] = [merged[name][0], new_val]
+        else:
+            merged[name] = [old_val, new_val]
+        if merged[name][0] == merged[name][1]:
+            del merged[name]
+    return merged
+
+class ActivityLogBuffer:
+    """
+    In-process buffer for "updated" ActivityLog entries.
+
+    Updates from the same actor to the same (content_type, object_id) that
+    arrive within the coalescing window become a single row. Entries are
+    written in bulk when their window expires, when the buffer is full, or
+    at interpreter exit. Each process keeps its own buffer, so a burst split
+    across workers yields one row per worker rather than one per save.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}  # (actor_id, content_type_id, object_id) -> entry
+        self._flusher = None
+
+    def add_update(self, owner_id, actor_id, content_type_id, object_id, changes):
+        key = (actor_id, content_type_id, object_id)
+        now = time.monotonic()
+        window = coalesce_window()
+        expired = []
+
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry and now - entry["started"] > window:
+                expired.append(self._pending.pop(key))
+                entry = None
+
+            if entry:
+                merge_changes(entry["changes"], changes)
+            else:
+                self._pending[key] = {
+                    "key": key,
+                    "started": now,
+                    "created_at": timezone.now(),
+                    "owner_id": owner_id,
+                    "changes": merge_changes({}, changes),
+                }
+
+            if len(self._pending) >= _max_pending():
+                expired.extend(self._pending.values())
+                self._pending = {}
+
+        self._write(expired)
+        self._ensure_flusher(window)
+
+    def flush_object(self, actor_id, content_type_id, object_id):
+        """
+        Write out any pending update for this object now, so it lands
+        before a subsequent "deleted" row.
+        """
+        with self._lock:
+            entry = self._pending.pop((actor_id, content_type_id, object_id), None)
+        if entry:
+            self._write([entry])
+
+    def flush(self, expired_only=False):
+        """Write buffered entries (all, or only those past their window)."""
+        now = time.monotonic()
+        window = coalesce_window()
+        with self._lock:
+            if expired_only:
+                keys = [k for k, e in self._pending.items() if now - e["started"] > window]
+            else:
+                keys = list(self._pending)
+            entries = [self._pending.pop(k) for k in keys]
+        self._write(entries)
+        return len(entries)
+
+    def _write(self, entries):
+        if not entries:
+            return
+        rows = []
+        for entry in entries:
+            actor_id, content_type_id, object_id = entry["key"]
+            rows.append(ActivityLog(
+                owner_id=entry["owner_id"],
+                actor_id=actor_id,
+                action="updated",
+                content_type_id=content_type_id,
+                object_id=object_id,
+                changes=entry["changes"],
+                created_at=entry["created_at"],
+            ))
+        try:
+            ActivityLog.objects.bulk_create(rows)
+        except Exception as e:
+            print(f"Error writing buffered activity logs: {e}")
+
+    def _ensure_flusher(self, window):
+        """Start a daemon thread that writes out expired entries."""
+        if self._flusher and self._flusher.is_alive():
+            return
+
+        def run():
+            while True:
+                time.sleep(max(window, 1))
+                self.flush(expired_only=True)
+
+        self._flusher = threading.Thread(target=run, name="activity-log-flusher", daemon=True)
+        self._flusher.start()
+
+activity_buffer = ActivityLogBuffer()
+atexit.register(activity_buffer.flush)
+
+def buffer_update(owner_id, actor_id, content_type_id, object_id, changes):
+    """
+    Queue an "updated" entry once the surrounding transaction commits,
+    so rolled-back saves are never logged.
+    """
+    transaction.on_commit(
+        lambda: activity_buffer.add_update(owner_id, actor_id, content_type_id, object_id, changes)
+    )
@@ -0,0 +1,101 @@
+# collaboration/services/activity_rollups.py
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from collaboration.models import ActivityLog, ActivityRollup, ActivityRollupCheckpoint
+
+CHECKPOINT_NAME = "activity_log"
+BATCH_SIZE = 5000  # ActivityLog ids folded per transaction
+SETTLE_SECONDS = 60  # leave very recent rows for the next run (open transactions may still commit below them)
+
+def _upper_bound(last_id):
+    """
+    Highest ActivityLog id that is safe to fold in now.
+    """
+    pending = ActivityLog.objects.filter(id__gt=last_id)
+    recent_min = pending.filter(
+        created_at__gte=timezone.now() - timedelta(seconds=SETTLE_SECONDS)
+    ).aggregate(m=Min("id"))["m"]
+    if recent_min is not None:
+        return recent_min - 1
+    return pending.aggregate(m=Max("id"))["m"] or last_id
+
+def _fold(start_id, end_id):
+    """
+    Add ActivityLog rows with start_id < id <= end_id into the rollup table.
+    """
+    groups = (
+        ActivityLog.objects.filter(id__gt=start_id, id__lte=end_id)
+        .annotate(day=TruncDate("created_at"))
+        .values("owner_id", "day", "actor_id", "content_type_id", "action")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+
+    increments = {}
+    for g in groups:
+        key = (g["owner_id"], g["day"], g["actor_id"], g["content_type_id"], g["action"])
+        increments[key] = increments.get(key, 0) + g["n"]
+    if not increments:
+        return 0
+
+    existing = ActivityRollup.objects.filter(
+        owner_id__in={k[0] for k in increments},
+        day__in={k[1] for k in increments},
+    )
+    by_key = {
+        (r.owner_id, r.day, r.actor_id, r.content_type_id, r.action): r
+        for r in existing
+    }
+
+    to_update, to_create = [], []
+    for key, n in increments.items():
+        row = by_key.get(key)
+        if row:
+            row.count += n
+            to_update.append(row)
+        else:
+            owner_id, day, actor_id, content_type_id, action = key
+            to_create.append(ActivityRollup(
+                owner_id=owner_id, day=day, actor_id=actor_id,
+                content_type_id=content_type_id, action=action, count=n,
+            ))
+
+    if to_update:
+        ActivityRollup.objects.bulk_update(to_update, ["count"])
+    if to_create:
+        ActivityRollup.objects.bulk_create(to_create)
+    return sum(increments.values())
+
+def update_activity_rollups(batch_size=BATCH_SIZE):
+    """
+    Catch the rollup table up with ActivityLog from the stored high-water mark.
+    Safe to run concurrently: the checkpoint row is locked for each batch.
+    Returns the number of log rows folded in.
+    """
+    folded = 0
+    while True:
+        with transaction.atomic():
+            checkpoint, _ = (
+                ActivityRollupCheckpoint.objects.select_for_update()
+                .get_or_create(name=CHECKPOINT_NAME)
+            )
+            upper = _upper_bound(checkpoint.last_id)
+            if upper <= checkpoint.last_id:
+                return folded
+
+            end_id = min(checkpoint.last_id + batch_size, upper)
+            folded += _fold(checkpoint.last_id, end_id)
+            checkpoint.last_id = end_id
+            checkpoint.save(update_fields=["last_id", "updated_at"])
+
+def rebuild_activity_rollups(batch_size=BATCH_SIZE):
+    """
+    Drop all rollups and rebuild them from the full ActivityLog (backfill).
+    """
+    with transaction.atomic():
+        ActivityRollupCheckpoint.objects.select_for_update().filter(name=CHECKPOINT_NAME).delete()
+        ActivityRollup.objects.all().delete()
+    return update_activity_rollups(batch_size=batch_size)
@@ -0,0 +1,98 @@
+# collaboration/services/invitations.py
+from django.db import transaction
+from django.db.models import CharField, Value
+from collaboration.models import Invitation, AccountAccess
+from collaboration.serializers import BulkInvitationEntrySerializer
+from collaboration.utils.email_utils import send_invitation_emails
+
+def _existing_statuses(inviter, emails):
+    """
+    One UNION query: which of `emails` already have a pending invitation
+    from `inviter` or are already collaborators on the inviter's account.
+    Returns {email_lower: status}.
+    """
+    invited = (
+        Invitation.objects.filter(inviter=inviter, accepted=False, email__in=emails)
+        .annotate(existing=Value("already_invited", output_field=CharField()))
+        .values_list("email", "existing")
+    )
+    collaborating = (
+        AccountAccess.objects.filter(owner=inviter, collaborator__email__in=emails)
+        .annotate(existing=Value("already_collaborator", output_field=CharField()))
+        .values_list("collaborator__email", "existing")
+    )
+
+    statuses = {}
+    for email, status in invited.union(collaborating, all=True):
+        # An existing collaborator wins over a stale pending invitation
+        if statuses.get(email.lower()) != "already_collaborator":
+            statuses[email.lower()] = status
+    return statuses
+
+def _fill_primary_keys(inviter, invitations):
+    """
+    MySQL's bulk_create does not return primary keys; the tokens need them.
+    The new rows are the only pending invitations for these addresses, so
+    one lookup by email recovers them.
+    """
+    missing = {i.email: i for i in invitations if i.pk is None}
+    if not missing:
+        return
+    rows = Invitation.objects.filter(
+        inviter=inviter, accepted=False, email__in=list(missing)
+    ).values_list("email", "pk").order_by("pk")
+    for email, pk in rows:
+        missing[email].pk = pk
+
+def bulk_invite(inviter, entries):
+    """
+    Invite many addresses at once.
+    entries: list of {"email": ..., "role": ...} dicts (unvalidated).
+    Returns a list of per-address results in input order.
+    """
+    results = []
+    pending = {}  # email_lower -> (result dict, role)
+
+    for entry in entries:
+        serializer = BulkInvitationEntrySerializer(data=entry)
+        if not serializer.is_valid():
+            results.append({
+                "email": entry.get("email") if isinstance(entry, dict) else None,
+                "status": "invalid",
+                "errors": serializer.errors,
+            })
+            continue
+
+        email = serializer.validated_data["email"].strip().lower()
+        role = serializer.validated_data["role"]
+        result = {"email": email, "role": role}
+        results.append(result)
+
+        if email == (inviter.email or "").lower():
+            result["status"] = "invalid"
+            result["errors"] = {"email": ["You cannot invite yourself."]}
+        elif email in pending:
+            result["status"] = "duplicate"
+        else:
+            pending[email] = (result, role)
+
+    if not pending:
+        return results
+
+    existing = _existing_statuses(inviter, list(pending))
+
+    to_create = []
+    for email, (result, role) in pending.items():
+        if email in existing:
+            result["status"] = existing[email]
+            continue
+        result["status"] = "invited"
+        to_create.append(Invitation(inviter=inviter, email=email, role=role))
+
+    if to_create:
+        with transaction.atomic():
+            Invitation.objects.bulk_create(to_create)
+            _fill_primary_keys(inviter, to_create)
+            send_invitation_emails(to_create)
+
+    return results
@@ -2,6 +2,7 @@ from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.contenttypes.models import ContentType
 from .models import ActivityLog
+from .services.activity_buffer import activity_buffer, buffer_update, coalesce_window
 
 
 @receiver(pre_save)
@@ -48,11 +49,18 @@ def track_save_action(sender, instance, created, **kwargs):
             if old_val != new_val:
                 diff[name] = [old_val, new_val]
 
+    content_type = ContentType.objects.get_for_model(sender)
+
+    # Autosave-style bursts: merge successive updates in the write buffer
+    if not created and coalesce_window():
+        buffer_update(instance.owner.pk, actor.pk, content_type.pk, instance.pk, diff)
+        return
+
     ActivityLog.objects.create(
         owner=instance.owner,
         actor=actor,
         action="created" if created else "updated",
-        content_type=ContentType.objects.get_for_model(sender),
+        content_type=content_type,
         object_id=instance.pk,
         changes=diff or {},
     )
@@ -72,11 +80,16 @@ def track_delete_action(sender, instance, **kwargs):
     if not actor:
         return
 
+    content_type = ContentType.objects.get_for_model(sender)
+    if coalesce_window():
+        # Keep the feed ordered: pending updates land before the delete
+        activity_buffer.flush_object(actor.pk, content_type.pk, instance.pk)
+
     ActivityLog.objects.create(
         owner=instance.owner,
         actor=actor,
         action="deleted",
-        content_type=ContentType.objects.get_for_model(sender),
+        content_type=content_type,
         object_id=instance.pk,
         changes=None,
     )
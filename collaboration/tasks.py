@@ -0,0 +1,11 @@
+from celery import shared_task
+from collaboration.services.activity_rollups import update_activity_rollups
+
+
+@shared_task(name="collaboration.update_activity_rollups")
+def update_activity_rollups_task():
+    """
+    Periodic task: fold new ActivityLog rows into ActivityRollup
+    from the stored high-water mark.
+    """
+    return update_activity_rollups()
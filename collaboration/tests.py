@@ -1,3 +1,205 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+from django.contrib.auth.models import User
+from django.db import connection
+from datetime import timedelta
+from django.contrib.contenttypes.models import ContentType
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from collaboration.models import Invitation, AccountAccess, ActivityLog, ActivityRollup
+from collaboration.services.activity_buffer import activity_buffer, buffer_update
+from collaboration.services.activity_rollups import update_activity_rollups, rebuild_activity_rollups
+from collaboration.services.invitations import bulk_invite
+from collaboration.views import AccountCollaboratorsView, AcceptInvitationView, ActivityRollupView
+from auth_core.models import OneTimeToken, TokenPurpose
+from auth_core.tokens import issue_token
+from email_outbox.models import OutboundEmail
 
-# Create your tests here.
+
+class BulkInviteTest(TestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user("owner", "owner@example.com", "pw")
+        self.collaborator = User.objects.create_user("collab", "collab@example.com", "pw")
+        AccountAccess.objects.create(owner=self.owner, collaborator=self.collaborator, role="viewer")
+        Invitation.objects.create(inviter=self.owner, email="pending@example.com", role="viewer")
+        OutboundEmail.objects.all().delete()
+
+    def test_per_address_statuses(self):
+        results = bulk_invite(self.owner, [
+            {"email": "new@example.com", "role": "editor"},
+            {"email": "NEW@example.com", "role": "viewer"},
+            {"email": "pending@example.com", "role": "viewer"},
+            {"email": "collab@example.com", "role": "admin"},
+            {"email": "owner@example.com", "role": "admin"},
+            {"email": "not-an-email", "role": "viewer"},
+            {"email": "other@example.com", "role": "superuser"},
+        ])
+
+        self.assertEqual(
+            [r["status"] for r in results],
+            ["invited", "duplicate", "already_invited", "already_collaborator", "invalid", "invalid", "invalid"],
+        )
+        self.assertTrue(Invitation.objects.filter(email="new@example.com", role="editor").exists())
+        self.assertEqual(list(OutboundEmail.objects.values_list("to", flat=True)), [["new@example.com"]])
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        def run(prefix, size):
+            entries = [{"email": f"{prefix}{i}@example.com", "role": "viewer"} for i in range(size)]
+            with CaptureQueriesContext(connection) as ctx:
+                bulk_invite(self.owner, entries)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(run("small", 3), run("large", 60))
+        self.assertEqual(Invitation.objects.filter(email__startswith="large").count(), 60)
+        invitation_ids = set(Invitation.objects.filter(email__startswith="large").values_list("pk", flat=True))
+        token_ids = set(OneTimeToken.objects.filter(purpose=TokenPurpose.INVITATION).values_list("object_id", flat=True))
+        self.assertTrue(invitation_ids <= token_ids)
+
+
+class AcceptInvitationTest(TestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user("owner", "owner@example.com", "pw")
+        self.invitee = User.objects.create_user("invitee", "invitee@example.com", "pw")
+        self.other = User.objects.create_user("other", "other@example.com", "pw")
+        self.invitation = Invitation.objects.create(inviter=self.owner, email="invitee@example.com", role="editor")
+        self.token = issue_token(TokenPurpose.INVITATION, user=self.owner, object_id=self.invitation.pk)
+
+    def accept(self, user):
+        request = APIRequestFactory().post("/", {"token": self.token}, format="json")
+        force_authenticate(request, user=user)
+        return AcceptInvitationView.as_view(throttle_classes=[])(request)
+
+    def test_wrong_account_does_not_spend_the_token(self):
+        self.assertEqual(self.accept(self.other).status_code, 403)
+        self.assertEqual(self.accept(self.invitee).status_code, 200)
+        self.assertTrue(AccountAccess.objects.filter(owner=self.owner, collaborator=self.invitee).exists())
+        self.assertEqual(self.accept(self.invitee).status_code, 404)
+
+
+class ActivityRollupTest(TestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user("owner", "owner@example.com", "pw")
+        self.ct = ContentType.objects.get_for_model(Invitation)
+        self.old = timezone.now() - timedelta(days=1)
+
+    def log(self, action, created_at):
+        return ActivityLog.objects.create(
+            owner=self.owner, actor=self.owner, action=action,
+            content_type=self.ct, object_id=1, created_at=created_at,
+        )
+
+    def counts(self):
+        return dict(ActivityRollup.objects.values_list("action", "count"))
+
+    def test_incremental_fold_matches_rebuild(self):
+        self.log("created", self.old)
+        self.log("updated", self.old)
+        self.log("updated", self.old)
+        self.assertEqual(update_activity_rollups(batch_size=2), 3)
+        self.assertEqual(self.counts(), {"created": 1, "updated": 2})
+
+        # New rows are added onto existing rollups; nothing is counted twice
+        self.log("updated", self.old)
+        self.assertEqual(update_activity_rollups(), 1)
+        self.assertEqual(update_activity_rollups(), 0)
+        self.assertEqual(self.counts(), {"created": 1, "updated": 3})
+
+        rebuild_activity_rollups()
+        self.assertEqual(self.counts(), {"created": 1, "updated": 3})
+
+    def test_recent_rows_wait_for_the_settle_window(self):
+        self.log("created", self.old)
+        self.log("updated", timezone.now())
+        update_activity_rollups()
+        self.assertEqual(self.counts(), {"created": 1})
+
+    def test_view_rejects_impossible_dates(self):
+        view = ActivityRollupView.as_view(throttle_classes=[])
+        for query in ("start=2025-02-30", "end=2025-13-01"):
+            request = APIRequestFactory().get(f"/api/activity/rollups/?{query}")
+            force_authenticate(request, user=self.owner)
+            self.assertEqual(view(request).status_code, 400)
+
+
+class AccountCollaboratorsViewTest(TestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user("owner", "owner@example.com", "pw", first_name="Olu")
+        self.view = AccountCollaboratorsView.as_view(throttle_classes=[])
+        self.factory = APIRequestFactory()
+
+    def add_collaborators(self, n, role="viewer", status="active"):
+        start = User.objects.count()
+        users = User.objects.bulk_create(
+            [User(username=f"user{start + i}", first_name="C", last_name=str(i)) for i in range(n)]
+        )
+        AccountAccess.objects.bulk_create(
+            [AccountAccess(owner=self.owner, collaborator=u, role=role, status=status) for u in users]
+        )
+
+    def get(self, **params):
+        request = self.factory.get("/api/account/collaborators/", params)
+        force_authenticate(request, user=self.owner)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.view(request)
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_query_count_is_constant(self):
+        self.add_collaborators(2)
+        _, small = self.get()
+        self.add_collaborators(40)
+        response, large = self.get()
+        self.assertEqual(small, large)
+        self.assertEqual(len(response.data["results"]), 42)
+
+    def test_filters_and_cursor(self):
+        self.add_collaborators(3, role="editor")
+        self.add_collaborators(2, role="viewer", status="revoked")
+
+        response, _ = self.get(role="editor")
+        self.assertEqual({r["role"] for r in response.data["results"]}, {"editor"})
+        self.assertEqual(len(response.data["results"]), 3)
+
+        response, _ = self.get(status="revoked")
+        self.assertEqual(len(response.data["results"]), 2)
+
+        response, _ = self.get(page_size=4)
+        self.assertEqual(len(response.data["results"]), 4)
+        self.assertIsNotNone(response.data["next"])
+
+
+@override_settings(ACTIVITY_LOG_COALESCE_SECONDS=60)
+class ActivityCoalescingTest(TestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user("owner", "owner@example.com", "pw")
+        self.ct = ContentType.objects.get_for_model(Invitation)
+
+    def update(self, object_id, changes):
+        with self.captureOnCommitCallbacks(execute=True):
+            buffer_update(self.owner.pk, self.owner.pk, self.ct.pk, object_id, changes)
+
+    def test_rapid_updates_merge_into_one_row(self):
+        self.update(1, {"title": ["a", "b"]})
+        self.update(1, {"title": ["b", "c"], "budget": [100, 200]})
+        self.update(1, {"budget": [200, 100]})
+        self.update(2, {"title": ["x", "y"]})
+        self.assertFalse(ActivityLog.objects.exists())
+
+        activity_buffer.flush()
+
+        log = ActivityLog.objects.get(object_id=1)
+        self.assertEqual(log.action, "updated")
+        self.assertEqual(log.changes, {"title": ["a", "c"]})
+        self.assertEqual(ActivityLog.objects.count(), 2)
+
+    def test_rolled_back_update_is_not_buffered(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            buffer_update(self.owner.pk, self.owner.pk, self.ct.pk, 1, {"title": ["a", "b"]})
+        self.assertEqual(len(callbacks), 1)
+        activity_buffer.flush()
+        self.assertFalse(ActivityLog.objects.exists())
@@ -1,5 +1,7 @@
-from django.core.mail import send_mail
 from django.conf import settings
+from email_outbox.services import enqueue_email, enqueue_emails
+from auth_core.models import TokenPurpose
+from auth_core.tokens import issue_token, issue_tokens
 
 business_name = settings.BUSINESS_NAME
 business_logo = settings.BUSINESS_LOGO
@@ -11,11 +13,11 @@ def _accept_url(token: str) -> str:
     base = getattr(settings, "FRONTEND_BASE_URL", "http://127.0.0.1:8001").rstrip("/")
     return f"{base}/collaboration/accept/?token={token}"
 
-def send_invitation_email(invitation):
+def build_invitation_email(invitation, token: str) -> dict:
     """
-    Send an invitation email with a token link.
+    Build the outbox keyword arguments for an invitation email.
     """
-    accept_url = _accept_url(str(invitation.token))
+    accept_url = _accept_url(token)
 
     subject = "You have been invited to collaborate!"
     message = f"""
@@ -29,10 +31,31 @@ def send_invitation_email(invitation):
     If you don’t have an account, sign up first then use the link.
     """
 
-    send_mail(
-        subject,
-        message,
-        from_email,
-        [invitation.email],
-        fail_silently=False,
+    return {
+        "subject": subject,
+        "message": message,
+        "recipient_list": [invitation.email],
+        "from_email": from_email,
+    }
+
+def send_invitation_email(invitation):
+    """
+    Queue an invitation email with a token link.
+    Delivery happens through the email outbox worker.
+    """
+    token = issue_token(TokenPurpose.INVITATION, user=invitation.inviter, object_id=invitation.pk)
+    enqueue_email(**build_invitation_email(invitation, token))
+
+def send_invitation_emails(invitations):
+    """
+    Queue invitation emails for many invitations with one token INSERT
+    and one outbox INSERT. The invitations must already have primary keys.
+    """
+    tokens = issue_tokens(
+        TokenPurpose.INVITATION,
+        [(invitation.inviter, invitation.pk) for invitation in invitations],
     )
+    enqueue_emails([
+        build_invitation_email(invitation, token)
+        for invitation, token in zip(invitations, tokens)
+    ])
@@ -1,13 +1,23 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import NotFound, PermissionDenied
 from django.contrib.auth.models import User
 from django.shortcuts import get_object_or_404
-from .models import Invitation, AccountAccess, ActivityLog
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from datetime import timedelta
+from .models import Invitation, AccountAccess, ActivityLog, ActivityRollup
 from auth_core.views import PrivateUserViewMixin
+from auth_core.models import TokenPurpose
+from auth_core.tokens import consume_token, peek_token
 from .utils.email_utils import send_invitation_email
+from .services.invitations import bulk_invite
+from .pagination import CollaboratorCursorPagination
 from .serializers import (
     InvitationSerializer,
+    BulkInvitationSerializer,
     AcceptInvitationSerializer,
     AccountAccessSerializer,
     UpdateRoleSerializer,
@@ -23,6 +33,32 @@ class InviteUserView(PrivateUserViewMixin, generics.CreateAPIView):
         invitation = serializer.save(inviter=inviter)
         send_invitation_email(invitation)
 
+# Invite many addresses in one request
+class BulkInviteUserView(PrivateUserViewMixin, generics.GenericAPIView):
+    """
+    POST /api/invitation/bulk_invite/
+    Body: { "invitations": [{"email": "a@example.com", "role": "editor"}, ...] }
+
+    Returns a per-address status: invited, already_invited,
+    already_collaborator, duplicate or invalid.
+    """
+    serializer_class = BulkInvitationSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = bulk_invite(request.user, serializer.validated_data["invitations"])
+
+        summary = {}
+        for result in results:
+            summary[result["status"]] = summary.get(result["status"], 0) + 1
+
+        return Response(
+            {"results": results, "summary": summary},
+            status=status.HTTP_201_CREATED if summary.get("invited") else status.HTTP_200_OK,
+        )
+
 # Accept an invite
 class AcceptInvitationView(PrivateUserViewMixin, generics.GenericAPIView):
     serializer_class = AcceptInvitationSerializer
@@ -32,11 +68,10 @@ class AcceptInvitationView(PrivateUserViewMixin, generics.GenericAPIView):
         serializer.is_valid(raise_exception=True)
 
         token = serializer.validated_data['token']
-        # print(f"Token: {token}")
-        invitation = get_object_or_404(Invitation, token=token, accepted=False)
-        # print(invitation)
-        # print(request.user.email.lower())
-        # print(invitation.email.lower())
+        record = peek_token(token, TokenPurpose.INVITATION)
+        if record is None:
+            raise NotFound("Invalid or expired invitation.")
+        invitation = get_object_or_404(Invitation, pk=record.object_id, accepted=False)
         # Ensure that the logged-in user's email matches the invited email
         if request.user.email.lower() != invitation.email.lower():
             raise PermissionDenied(
@@ -44,24 +79,52 @@ class AcceptInvitationView(PrivateUserViewMixin, generics.GenericAPIView):
                 "Please log in with the correct account."
             )
         
-        # Link invited user to inviter’s account
-        AccountAccess.objects.get_or_create(
-            owner=invitation.inviter,
-            collaborator=request.user,
-            defaults={'role': invitation.role}
-        )
+        # Spend the token only once the right account is presenting it
+        with transaction.atomic():
+            if consume_token(token, TokenPurpose.INVITATION) is None:
+                raise NotFound("Invalid or expired invitation.")
+
+            # Link invited user to inviter’s account
+            AccountAccess.objects.get_or_create(
+                owner=invitation.inviter,
+                collaborator=request.user,
+                defaults={'role': invitation.role}
+            )
 
-        invitation.accepted = True
-        invitation.save()
+            invitation.accepted = True
+            invitation.save()
 
         return Response({"message": "Invitation accepted successfully!"}, status=status.HTTP_200_OK)
 
 # List collaborators for current user’s account
 class AccountCollaboratorsView(PrivateUserViewMixin, generics.ListAPIView):
+    """
+    Lists the collaborators on the current user's account.
+    Cursor-paginated; optional ?role= and ?status= filters.
+    """
     serializer_class = AccountAccessSerializer
+    pagination_class = CollaboratorCursorPagination
 
     def get_queryset(self):
-        return AccountAccess.objects.filter(owner=self.request.user)
+        qs = (
+            AccountAccess.objects.filter(owner=self.request.user)
+            .select_related("owner", "collaborator")
+            .only(
+                "id", "role", "status", "created_at",
+                "owner__first_name", "owner__last_name",
+                "collaborator__first_name", "collaborator__last_name",
+            )
+        )
+
+        role = (self.request.query_params.get("role") or "").strip().lower()
+        if role:
+            qs = qs.filter(role=role)
+
+        status_ = (self.request.query_params.get("status") or "").strip().lower()
+        if status_:
+            qs = qs.filter(status=status_)
+
+        return qs
 
 class MyAccessibleAccountsView(PrivateUserViewMixin, generics.ListAPIView):
     """
@@ -90,7 +153,7 @@ class MyAccessibleAccountsView(PrivateUserViewMixin, generics.ListAPIView):
             AccountAccess.objects.filter(
                 id__in=[own_access.id] + list(collaborator_access.values_list("id", flat=True))
             )
-            .select_related("owner")
+            .select_related("owner", "collaborator")
             .order_by("owner__first_name", "owner__last_name")
         )
 
@@ -118,3 +181,58 @@ class ActivityFeedView(PrivateUserViewMixin, generics.ListAPIView):
     def get_queryset(self):
         # Show logs for the authenticated user's account
         return ActivityLog.objects.filter(owner=self.request.user).select_related("actor", "content_type")
+
+
+class ActivityRollupView(PrivateUserViewMixin, generics.GenericAPIView):
+    """
+    GET /api/activity/rollups/?start=2025-01-01&end=2025-01-31&group_by=day,actor
+
+    Dashboard counts read only from the ActivityRollup table.
+    group_by: any of day, actor, model, action (default: day,actor).
+    Date range defaults to the last 30 days.
+    """
+    GROUP_FIELDS = {
+        "day": ["day"],
+        "actor": ["actor_id", "actor__username"],
+        "model": ["content_type__model"],
+        "action": ["action"],
+    }
+    OUTPUT_NAMES = {"actor__username": "actor_username", "content_type__model": "model"}
+
+    def get(self, request, *args, **kwargs):
+        today = timezone.localdate()
+        try:
+            start = parse_date(request.query_params.get("start") or "") or today - timedelta(days=29)
+            end = parse_date(request.query_params.get("end") or "") or today
+        except ValueError:  # well formed but not a real date, e.g. 2025-02-30
+            return Response({"detail": "start and end must be valid dates"}, status=status.HTTP_400_BAD_REQUEST)
+        if start > end:
+            return Response({"detail": "start must be before end"}, status=status.HTTP_400_BAD_REQUEST)
+
+        group_by = [
+            g.strip() for g in (request.query_params.get("group_by") or "day,actor").split(",") if g.strip()
+        ]
+        unknown = [g for g in group_by if g not in self.GROUP_FIELDS]
+        if unknown or not group_by:
+            return Response(
+                {"detail": f"group_by must be a combination of {', '.join(self.GROUP_FIELDS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        fields = [f for g in group_by for f in self.GROUP_FIELDS[g]]
+        rows = (
+            ActivityRollup.objects.filter(owner=request.user, day__range=(start, end))
+            .values(*fields)
+            .annotate(total=Sum("count"))
+            .order_by(*(["day"] if "day" in group_by else []), "-total")
+        )
+
+        return Response({
+            "start": start,
+            "end": end,
+            "group_by": group_by,
+            "results": [
+                {self.OUTPUT_NAMES.get(k, k): v for k, v in row.items()}
+                for row in rows
+            ],
+        })
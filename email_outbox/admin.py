@@ -0,0 +1,26 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import OutboundEmail
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ("subject", "recipients", "status", "attempts", "available_at", "sent_at", "created_at")
+    list_filter = ("status", "created_at")
+    search_fields = ("subject", "to")
+    ordering = ("-created_at",)
+    readonly_fields = ("attempts", "last_error", "locked_at", "sent_at", "created_at")
+    actions = ["retry_selected"]
+
+    def recipients(self, obj):
+        return ", ".join(obj.to)
+
+    @admin.action(description="Retry selected emails now")
+    def retry_selected(self, request, queryset):
+        updated = queryset.exclude(status="sent").update(
+            status="pending", available_at=timezone.now(), locked_at=None
+        )
+        self.message_user(request, f"{updated} email(s) queued for another attempt.")
+
+    def has_add_permission(self, request):
+        # Emails are queued by application code, not by hand
+        return False
@@ -0,0 +1,14 @@
+from django.conf import settings
+
+# Built-in fallbacks for keys missing from settings.EMAIL_OUTBOX
+_HARD_DEFAULTS = {
+    "BACKEND": None,              # None → settings.EMAIL_BACKEND
+    "BATCH_SIZE": 50,             # messages claimed per worker pass
+    "MAX_ATTEMPTS": 5,            # give up after this many failed sends
+    "RETRY_BACKOFF_SECONDS": 60,  # doubled after every failed attempt
+    "RATE_PER_SECOND": 10,        # 0 disables rate control
+    "STALE_LOCK_SECONDS": 600,    # reclaim rows left in "sending" by a dead worker
+}
+
+def get_setting(key: str):
+    return (getattr(settings, "EMAIL_OUTBOX", None) or {}).get(key, _HARD_DEFAULTS.get(key))
@@ -0,0 +1,6 @@
+STATUS_CHOICES = [
+    ("pending", "Pending"),
+    ("sending", "Sending"),
+    ("sent", "Sent"),
+    ("failed", "Failed"),
+]
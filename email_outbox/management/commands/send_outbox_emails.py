@@ -0,0 +1,30 @@
+import time
+from django.core.management.base import BaseCommand
+from email_outbox.services import send_pending_emails
+
+class Command(BaseCommand):
+    help = "Deliver queued outbox emails in batches over a single mail connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None, help="Messages per batch")
+        parser.add_argument("--loop", action="store_true", help="Keep polling the outbox instead of exiting")
+        parser.add_argument("--interval", type=float, default=5, help="Seconds to sleep when the outbox is empty")
+
+    def handle(self, *args, **opts):
+        while True:
+            sent, failed = send_pending_emails(batch_size=opts["batch_size"])
+            if sent or failed:
+                self.stdout.write(f"Outbox batch: {sent} sent, {failed} failed.")
+
+            if not opts["loop"]:
+                break
+            if not (sent or failed):
+                time.sleep(opts["interval"])
+
+        self.stdout.write(self.style.SUCCESS("Outbox pass complete."))
+
+# run once:
+# python manage.py send_outbox_emails
+
+# run as a long-lived worker:
+# python manage.py send_outbox_emails --loop
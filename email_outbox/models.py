@@ -0,0 +1,32 @@
+from django.db import models
+from django.utils import timezone
+from .constants import STATUS_CHOICES
+
+class OutboundEmail(models.Model):
+    """
+    A queued transactional email. Rows are written in the caller's transaction
+    and delivered later by the outbox worker (see services.send_pending_emails).
+    """
+    subject = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=255, blank=True)
+    to = models.JSONField(default=list)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    available_at = models.DateTimeField(default=timezone.now)  # next delivery attempt
+    locked_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["status", "available_at"], name="outbox_status_available_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} → {', '.join(self.to)} ({self.status})"
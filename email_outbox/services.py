@@ -0,0 +1,127 @@
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .conf import get_setting
+from .models import OutboundEmail
+
+def _build(subject, message, recipient_list, from_email=None, html_message=None):
+    return OutboundEmail(
+        subject=subject,
+        body=message or "",
+        html_body=html_message or "",
+        from_email=from_email or settings.FROM_EMAIL,
+        to=list(recipient_list),
+    )
+
+def enqueue_email(subject, message, recipient_list, from_email=None, html_message=None):
+    """
+    Queue a single email. Mirrors the `send_mail` signature so call sites stay familiar.
+    The row is written in the caller's transaction: if it rolls back, nothing is sent.
+    """
+    email = _build(subject, message, recipient_list, from_email, html_message)
+    email.save()
+    return email
+
+def enqueue_emails(messages):
+    """
+    Queue many emails with a single INSERT.
+    messages: iterable of dicts with the `enqueue_email` keyword arguments.
+    """
+    return OutboundEmail.objects.bulk_create([_build(**m) for m in messages])
+
+def _claim_batch(batch_size):
+    """
+    Lock a batch of due messages and mark them as "sending" so concurrent
+    workers skip them. Locks are released before any SMTP traffic happens.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=get_setting("STALE_LOCK_SECONDS"))
+    with transaction.atomic():
+        ids = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status="pending", available_at__lte=now)
+                | Q(status="sending", locked_at__lt=stale)
+            )
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if ids:
+            OutboundEmail.objects.filter(id__in=ids).update(status="sending", locked_at=now)
+    return list(OutboundEmail.objects.filter(id__in=ids).order_by("id"))
+
+def _record_failure(email, error):
+    email.attempts += 1
+    email.last_error = str(error)
+    email.locked_at = None
+    if email.attempts >= get_setting("MAX_ATTEMPTS"):
+        email.status = "failed"
+    else:
+        backoff = get_setting("RETRY_BACKOFF_SECONDS") * (2 ** (email.attempts - 1))
+        email.status = "pending"
+        email.available_at = timezone.now() + timedelta(seconds=backoff)
+    email.save(update_fields=["attempts", "last_error", "locked_at", "status", "available_at"])
+
+def send_pending_emails(batch_size=None):
+    """
+    Deliver one batch of due messages over a single reused mail connection.
+    Returns (sent, failed) counts for this pass.
+    """
+    batch = _claim_batch(batch_size or get_setting("BATCH_SIZE"))
+    if not batch:
+        return 0, 0
+
+    rate = get_setting("RATE_PER_SECOND") or 0
+    min_interval = 1.0 / rate if rate else 0
+    last_sent = None
+    sent = failed = 0
+
+    connection = get_connection(backend=get_setting("BACKEND"), fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        for email in batch:
+            _record_failure(email, e)
+        return 0, len(batch)
+
+    try:
+        for email in batch:
+            if min_interval and last_sent is not None:
+                delay = min_interval - (time.monotonic() - last_sent)
+                if delay > 0:
+                    time.sleep(delay)
+
+            message = EmailMultiAlternatives(
+                email.subject, email.body, email.from_email, email.to, connection=connection
+            )
+            if email.html_body:
+                message.attach_alternative(email.html_body, "text/html")
+
+            try:
+                message.send()
+            except Exception as e:
+                failed += 1
+                _record_failure(email, e)
+                # The connection may be unusable after an SMTP error; start a fresh one.
+                connection.close()
+                try:
+                    connection.open()
+                except Exception:
+                    pass  # the next send retries the connection on its own
+            else:
+                sent += 1
+                email.status = "sent"
+                email.attempts += 1
+                email.sent_at = timezone.now()
+                email.locked_at = None
+                email.last_error = ""
+                email.save(update_fields=["status", "attempts", "sent_at", "locked_at", "last_error"])
+            last_sent = time.monotonic()
+    finally:
+        connection.close()
+
+    return sent, failed
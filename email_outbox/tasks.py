@@ -0,0 +1,12 @@
+from celery import shared_task
+from email_outbox.services import send_pending_emails
+
+
+@shared_task(name="email_outbox.send_pending_emails")
+def send_outbox_emails(batch_size=None):
+    """
+    Periodic task: deliver one batch of queued emails.
+    Schedule it every few seconds with celery beat.
+    """
+    sent, failed = send_pending_emails(batch_size=batch_size)
+    return {"sent": sent, "failed": failed}
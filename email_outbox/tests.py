@@ -0,0 +1,61 @@
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.test import TestCase, override_settings
+from email_outbox.models import OutboundEmail
+from email_outbox.services import enqueue_email, send_pending_emails
+
+
+class FailingBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionError("SMTP unavailable")
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    EMAIL_OUTBOX={"RATE_PER_SECOND": 0},
+)
+class EmailOutboxTest(TestCase):
+
+    def test_enqueue_does_not_send_inline(self):
+        enqueue_email("Hello", "Body", ["a@example.com"])
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboundEmail.objects.get().status, "pending")
+
+    def test_rolled_back_transaction_drops_email(self):
+        try:
+            with transaction.atomic():
+                enqueue_email("Hello", "Body", ["a@example.com"])
+                raise RuntimeError("abort")
+        except RuntimeError:
+            pass
+        self.assertFalse(OutboundEmail.objects.exists())
+
+    def test_worker_sends_batch(self):
+        enqueue_email("One", "Body", ["a@example.com"])
+        enqueue_email("Two", "Body", ["b@example.com"], html_message="<p>Body</p>")
+
+        sent, failed = send_pending_emails()
+
+        self.assertEqual((sent, failed), (2, 0))
+        self.assertEqual([m.subject for m in mail.outbox], ["One", "Two"])
+        self.assertFalse(OutboundEmail.objects.exclude(status="sent").exists())
+
+        # Nothing left to deliver on the next pass
+        self.assertEqual(send_pending_emails(), (0, 0))
+
+    @override_settings(EMAIL_OUTBOX={"BACKEND": "email_outbox.tests.FailingBackend", "MAX_ATTEMPTS": 2})
+    def test_failed_send_is_retried_then_given_up(self):
+        email = enqueue_email("Hello", "Body", ["a@example.com"])
+
+        self.assertEqual(send_pending_emails(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual(email.status, "pending")
+        self.assertEqual(email.attempts, 1)
+        self.assertIn("SMTP unavailable", email.last_error)
+
+        # Make it due again and fail the final attempt
+        OutboundEmail.objects.filter(pk=email.pk).update(available_at=email.created_at)
+        send_pending_emails()
+        email.refresh_from_db()
+        self.assertEqual(email.status, "failed")
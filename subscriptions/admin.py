@@ -4,8 +4,8 @@ from django.utils import timezone
 from django.contrib.admin import SimpleListFilter
 from django.core.exceptions import ValidationError
 from django.forms.models import BaseInlineFormSet
-from subscriptions.payment_gateway.router import get_gateway, get_config
-from .models import Plan, PlanPrice, Entitlement, Subscription, Usage, StripeEventLog, SubscriptionSetting, PaymentProviderSetting
+from subscriptions.payment_gateway.router import get_gateway
+from .models import Plan, PlanPrice, Entitlement, Subscription, Usage, UsageRollup, StripeEventLog, SubscriptionSetting, PaymentProviderSetting
 from .conf import get_setting
 
 class EntitlementForm(forms.ModelForm):
@@ -166,20 +166,9 @@ class SubscriptionAdmin(admin.ModelAdmin):
                     )
                     continue
 
-                config = get_config(sub.provider)
                 gateway = get_gateway(sub.provider)
-
-                if hasattr(gateway, "configure"):
-                    gateway.configure(config)
-
-                if hasattr(gateway, "sync_subscription_status"):
-                    gateway.sync_subscription_status(sub)
-                    updated += 1
-                else:
-                    messages.warning(
-                        request,
-                        f"{sub.provider.title()} gateway does not support syncing yet.",
-                    )
+                gateway.sync_subscription_status(sub)
+                updated += 1
             except Exception as e:
                 errors += 1
                 self.message_user(
@@ -215,24 +204,13 @@ class SubscriptionAdmin(admin.ModelAdmin):
                     )
                     continue
 
-                config = get_config(sub.provider)
                 gateway = get_gateway(sub.provider)
-
-                if hasattr(gateway, "configure"):
-                    gateway.configure(config)
-
-                if hasattr(gateway, "process_cancellation"):
-                    gateway.process_cancellation(
-                        sub,
-                        settings.cancel_effect,
-                        settings.refund_policy,
-                    )
-                    canceled += 1
-                else:
-                    messages.warning(
-                        request,
-                        f"{sub.provider.title()} gateway does not support remote cancellation yet.",
-                    )
+                gateway.process_cancellation(
+                    sub,
+                    settings.cancel_effect,
+                    settings.refund_policy,
+                )
+                canceled += 1
             except Exception as e:
                 errors += 1
                 self.message_user(
@@ -257,6 +235,11 @@ class UsageAdmin(admin.ModelAdmin):
     list_display = ("subscription", "key", "used", "period_start", "period_end")
     list_filter = ("key",)
 
+@admin.register(UsageRollup)
+class UsageRollupAdmin(admin.ModelAdmin):
+    list_display = ("subscription", "key", "month", "used", "buckets")
+    list_filter = ("key",)
+
 @admin.register(StripeEventLog)
 class StripeEventLogAdmin(admin.ModelAdmin):
     list_display = ("event_type", "received_at", "short_id")
@@ -6,4 +6,5 @@ class SubscriptionsConfig(AppConfig):
     name = 'subscriptions'
 
     def ready(self):
+        import subscriptions.checks
         import subscriptions.signals
\ No newline at end of file
@@ -0,0 +1,71 @@
+import threading
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+def _stamp_ttl():
+    """
+    None (persistent) on a shared cache, where bump() reaches every process.
+    On a process-local one, SNAPSHOT_VERSION_TTL bounds how stale a copy gets.
+    """
+    backend = settings.CACHES.get("default", {}).get("BACKEND", "")
+    if backend not in PROCESS_LOCAL_CACHES:
+        return None
+    return getattr(settings, "SNAPSHOT_VERSION_TTL", 60)
+
+class ProcessSnapshot:
+    """
+    An immutable value built once per process and shared by every request.
+
+    A random version stamp in the shared cache says which build is current:
+    bump() from any process makes the others rebuild on their next get().
+    Checking the stamp is one cache read and no database queries.
+
+    That needs the default cache to be shared (settings.CACHES, REDIS_URL);
+    there stamps never expire and a snapshot is rebuilt only after a bump.
+    On a process-local cache, which cannot carry a bump to other processes,
+    stamps expire after SNAPSHOT_VERSION_TTL seconds instead.
+    """
+
+    def __init__(self, version_key, builder):
+        self.version_key = version_key
+        self.builder = builder
+        self._lock = threading.Lock()
+        self._current = None  # (version, value)
+
+    def version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            # A fresh stamp, so an evicted one can never bring back an old build
+            cache.add(self.version_key, uuid.uuid4().hex, timeout=_stamp_ttl())
+            version = cache.get(self.version_key)
+        return version
+
+    def get(self):
+        return self.get_versioned()[1]
+
+    def get_versioned(self):
+        """(version, value): the stamp the returned value was built under."""
+        version = self.version()
+        current = self._current
+        if current is not None and current[0] == version:
+            return current
+
+        with self._lock:
+            current = self._current
+            if current is not None and current[0] == version:
+                return current
+            # Built under the stamp read above: a bump during the build
+            # leaves this copy stale and the next get() rebuilds it
+            current = (version, self.builder())
+            self._current = current
+            return current
+
+    def bump(self):
+        self._current = None
+        cache.set(self.version_key, uuid.uuid4().hex, timeout=_stamp_ttl())
@@ -0,0 +1,91 @@
+from collections import namedtuple
+from django.db.models import Prefetch
+from .cache import ProcessSnapshot
+from .models import Plan, PlanPrice
+from .serializers import PlanSerializer
+from .utils import build_comparison
+
+# One serialized plan: `data` is PlanSerializer output; the price views are
+# precomputed so a request only picks among them.
+CatalogPlan = namedtuple(
+    "CatalogPlan", ["interval", "data", "prices", "prices_by_currency", "fallback_price"]
+)
+Catalog = namedtuple("Catalog", ["plans", "comparison"])
+
+def _build_catalog():
+    plans = (
+        Plan.objects.filter(is_active=True)
+        .prefetch_related(Prefetch("prices", queryset=PlanPrice.objects.order_by("pk")), "entitlements")
+        .order_by("sort_order", "name")
+    )
+    serialized = PlanSerializer(plans, many=True, context={"prices_mode": "all"}).data
+
+    entries = []
+    for data in serialized:
+        data = dict(data)
+        prices = tuple(dict(p) for p in data.pop("prices"))
+        data.pop("selected_price")
+        fallback = next((p for p in prices if p["is_default"]), prices[0] if prices else None)
+        entries.append(CatalogPlan(
+            interval=(data["interval"] or "").lower(),
+            data=data,
+            prices=prices,
+            # Plan.get_price matches currency case-insensitively; first row wins
+            prices_by_currency={
+                p["currency"].upper(): p for p in reversed(prices)
+            },
+            fallback_price=fallback,
+        ))
+
+    # Grouped per interval, so a filtered list takes a subset of the groups
+    comparison = build_comparison([e.data for e in entries])
+    return Catalog(plans=tuple(entries), comparison=comparison)
+
+plan_catalog = ProcessSnapshot("subscriptions_catalog_version", _build_catalog)
+
+def _selected_price(entry, currency):
+    if currency:
+        price = entry.prices_by_currency.get(currency.upper())
+        if price:
+            return price
+    return entry.fallback_price
+
+def get_catalog_payload(intervals=None, currency=None, prices_mode="all", catalog=None):
+    """
+    The PlanListView body ({"plans": [...], "comparison": {...}}) served from
+    the process-cached catalog. Runs no queries once the catalog is built.
+    Treat the returned structures as read-only: they share the snapshot's dicts.
+    """
+    catalog = catalog or plan_catalog.get()
+    wanted = set(intervals or ())
+
+    plans = []
+    for entry in catalog.plans:
+        if wanted and entry.interval not in wanted:
+            continue
+        selected = _selected_price(entry, currency)
+        if prices_mode == "none":
+            prices = []
+        elif prices_mode == "selected":
+            prices = [selected] if selected else []
+        else:
+            prices = list(entry.prices)
+
+        data = entry.data
+        plans.append({
+            "slug": data["slug"],
+            "name": data["name"],
+            "description": data["description"],
+            "interval": data["interval"],
+            "is_active": data["is_active"],
+            "metadata": data["metadata"],
+            "prices": prices,
+            "entitlements": data["entitlements"],
+            "selected_price": selected,
+        })
+
+    comparison = {
+        interval: table for interval, table in catalog.comparison.items()
+        if not wanted or interval in wanted
+    }
+    return {"plans": plans, "comparison": comparison}
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+from .cache import PROCESS_LOCAL_CACHES
+
+@register()
+def shared_cache_check(app_configs, **kwargs):
+    """Snapshot invalidation and quota counters only work across processes with a shared cache."""
+    backend = settings.CACHES.get("default", {}).get("BACKEND", "")
+    if settings.DEBUG or backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        Warning(
+            "The default cache is process-local, so cache invalidation does not reach other workers.",
+            hint="Set REDIS_URL (or configure CACHES) to a cache shared by every process.",
+            id="subscriptions.W001",
+        )
+    ]
@@ -4,6 +4,14 @@ from .constants import SUBSCRIPTIONS
 # Built-in hard fallback in case key is missing in constants
 _HARD_DEFAULTS = {
     "PERIOD_FUNC": "subscriptions.periods.monthly_or_yearly",
+    # Cache-Control for the public plan catalog and policy endpoints (seconds)
+    "PUBLIC_CACHE_MAX_AGE": 60,
+    "PUBLIC_CACHE_STALE_WHILE_REVALIDATE": 600,
+    # Quota keys counted in the cache and written to Usage by flush_usage_counters
+    "USAGE_WRITE_BEHIND_KEYS": (),
+    "USAGE_FLUSH_BATCH_SIZE": 500,
+    # Day/week usage buckets older than this are compacted into UsageRollup
+    "USAGE_RETENTION_DAYS": 35,
 }
 
 def get_setting(key: str, default=None):
@@ -1,11 +1,15 @@
 SUBSCRIPTIONS = {
+    # "window" sets how quota keys are counted: "day", "week" (Mon-Sun),
+    # "month" (calendar, UTC) or "period" (billing period, the default)
     "ENTITLEMENTS": {
         "jobs_per_day": {
             "label": "Daily job applications quota",
+            "window": "day",  # usage counted per UTC day
             "order": 1
         },
         "jobs_per_month": {
             "label": "Monthly job applications quota",
+            "window": "month",  # usage counted per UTC calendar month
             "order": 2
         },
         "cover_letter_tier": {
@@ -19,10 +23,12 @@ SUBSCRIPTIONS = {
         },
         "api_calls_per_day": {
             "label": "API calls per day",
+            "window": "day",  # usage counted per UTC day
             "order": 4
         },
         "api_calls_per_month": {
             "label": "API calls per month",
+            "window": "month",  # usage counted per UTC calendar month
             "order": 5
         },
         "workflows": {
@@ -38,6 +44,9 @@ SUBSCRIPTIONS = {
             "order": 8
         }
     },
+    # Hot keys counted in the cache and flushed to Usage in batches
+    # (needs a shared cache and the subscriptions.flush_usage_counters task)
+    "USAGE_WRITE_BEHIND_KEYS": ["api_calls_per_day", "api_calls_per_month"],
     "CURRENCY_SYMBOLS": {  # keep currency symbols separate
         "USD": "$", "NGN": "₦", "EUR": "€", "GBP": "£", "GHS": "₵", "KES": "KSh", "ZAR": "R",
     },
@@ -0,0 +1,107 @@
+from types import MappingProxyType
+from django.core.cache import cache
+from django.utils import timezone
+from .cache import ProcessSnapshot
+from .models import Entitlement, Subscription, SubscriptionStatus
+
+SNAPSHOT_TTL = 300  # seconds; also capped at the end of the current period
+VERSION_CACHE_KEY = "subscriptions_entitlements_version"
+SNAPSHOT_CACHE_FORMAT = "subscriptions_entitlement_snapshot_{user_id}_v{version}"
+
+_EMPTY = MappingProxyType({})
+
+class EntitlementRecord:
+    """Immutable, slot-only view of one Entitlement row."""
+
+    __slots__ = ("key", "enabled", "limit_int", "limit_str")
+
+    def __init__(self, key, enabled, limit_int, limit_str):
+        object.__setattr__(self, "key", key)
+        object.__setattr__(self, "enabled", enabled)
+        object.__setattr__(self, "limit_int", limit_int)
+        object.__setattr__(self, "limit_str", limit_str)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("EntitlementRecord is read-only")
+
+    def __repr__(self):
+        return f"EntitlementRecord({self.key!r}, enabled={self.enabled}, limit_int={self.limit_int}, limit_str={self.limit_str!r})"
+
+def _build_plan_entitlements():
+    plans = {}
+    rows = Entitlement.objects.values_list("plan_id", "key", "enabled", "limit_int", "limit_str")
+    for plan_id, key, enabled, limit_int, limit_str in rows.iterator():
+        plans.setdefault(plan_id, {})[key] = EntitlementRecord(key, enabled, limit_int, limit_str)
+    return MappingProxyType({plan_id: MappingProxyType(ents) for plan_id, ents in plans.items()})
+
+# {plan_id: {key: EntitlementRecord}} for every plan, shared by all requests
+plan_entitlements = ProcessSnapshot("subscriptions_plan_entitlements_version", _build_plan_entitlements)
+
+def get_plan_entitlements(plan_id):
+    """Read-only {key: EntitlementRecord} for a plan; a dict hit once built."""
+    return plan_entitlements.get().get(plan_id, _EMPTY)
+
+def get_plan_entitlement(plan_id, key):
+    return get_plan_entitlements(plan_id).get(key)
+
+def _version():
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        version = 1
+        cache.add(VERSION_CACHE_KEY, version, timeout=None)
+    return version
+
+def invalidate_entitlements(user_id=None):
+    """
+    Drop cached subscription snapshots: one user's (subscription changed)
+    or everyone's (plans changed). Entitlement rows live in plan_entitlements.
+    """
+    if user_id is not None:
+        cache.delete(SNAPSHOT_CACHE_FORMAT.format(user_id=user_id, version=_version()))
+        return
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, 2, timeout=None)
+
+def _build_snapshot(user_id):
+    now = timezone.now()
+    sub = (
+        Subscription.objects.filter(
+            user_id=user_id,
+            status__in=[SubscriptionStatus.ACTIVE, SubscriptionStatus.TRIALING],
+            current_period_end__gte=now,
+        )
+        .select_related("plan")
+        .first()
+    )
+    if not sub:
+        return {"plan": None, "plan_id": None, "subscription_id": None, "period_start": None, "period_end": None}
+    return {
+        "plan": sub.plan.slug,
+        "plan_id": sub.plan_id,
+        "subscription_id": sub.pk,
+        "period_start": sub.current_period_start,
+        "period_end": sub.current_period_end,
+    }
+
+def get_entitlement_snapshot(user_id):
+    """
+    The user's active plan and its entitlements:
+    {"plan": slug | None, "plan_id": int | None, "subscription_id": int | None,
+     "period_start": datetime | None, "period_end": datetime | None,
+     "entitlements": {key: EntitlementRecord}}
+    The subscription part is cached per user; entitlements come from the
+    shared per-plan map.
+    """
+    cache_key = SNAPSHOT_CACHE_FORMAT.format(user_id=user_id, version=_version())
+    snapshot = cache.get(cache_key)
+    if snapshot is None:
+        snapshot = _build_snapshot(user_id)
+        ttl = SNAPSHOT_TTL
+        if snapshot["period_end"]:
+            ttl = max(1, min(ttl, int((snapshot["period_end"] - timezone.now()).total_seconds())))
+        cache.set(cache_key, snapshot, timeout=ttl)
+
+    entitlements = get_plan_entitlements(snapshot["plan_id"]) if snapshot.get("plan_id") else _EMPTY
+    return {**snapshot, "entitlements": entitlements}
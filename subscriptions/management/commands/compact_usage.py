@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from subscriptions.rollups import compact_usage
+
+class Command(BaseCommand):
+    help = "Roll old day/week usage buckets up into monthly UsageRollup rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Buckets compacted per transaction")
+
+    def handle(self, *args, **opts):
+        compacted = compact_usage(chunk_size=opts["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Compacted {compacted:,} usage buckets."))
+
+# python manage.py compact_usage
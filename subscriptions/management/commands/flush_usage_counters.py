@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from subscriptions.usage_counters import flush_usage_counters
+
+class Command(BaseCommand):
+    help = "Write the write-behind quota counters (USAGE_WRITE_BEHIND_KEYS) to Usage."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None, help="Windows read from the cache per round trip")
+
+    def handle(self, *args, **opts):
+        written = flush_usage_counters(batch_size=opts["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Flushed {written:,} usage counters."))
+
+# python manage.py flush_usage_counters
@@ -0,0 +1,41 @@
+# Generated by Django 5.0.12 on 2026-10-19 16:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0014_plan_stripe_product_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UsageRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=80)),
+                ('month', models.DateField()),
+                ('used', models.BigIntegerField(default=0)),
+                ('buckets', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='usage',
+            index=models.Index(fields=['subscription', 'key', 'period_start', 'period_end', 'used'], name='usage_bucket_covering_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usage',
+            index=models.Index(fields=['period_end'], name='usage_period_end_idx'),
+        ),
+        migrations.AddField(
+            model_name='usagerollup',
+            name='subscription',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usage_rollups', to='subscriptions.subscription'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='usagerollup',
+            unique_together={('subscription', 'key', 'month')},
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.0.12 on 2026-10-19 17:05
+
+from django.db import migrations
+from django.utils import timezone
+
+
+def carry_current_usage(apps, schema_editor):
+    # Keys with a day/week/month window used to count per billing period.
+    # Carry each current-period total into the key's current bucket so the
+    # deploy does not hand out a fresh quota; older buckets start empty.
+    from subscriptions.constants import SUBSCRIPTIONS
+    from subscriptions.periods import usage_bucket
+
+    Usage = apps.get_model('subscriptions', 'Usage')
+    windows = {
+        key: cfg['window']
+        for key, cfg in (SUBSCRIPTIONS.get('ENTITLEMENTS') or {}).items()
+        if cfg.get('window', 'period') != 'period'
+    }
+    if not windows:
+        return
+
+    now = timezone.now()
+    current = Usage.objects.filter(
+        key__in=list(windows), period_start__lte=now, period_end__gt=now, used__gt=0,
+    ).values_list('subscription_id', 'key', 'period_start', 'period_end', 'used')
+    for sub_id, key, period_start, period_end, used in current.iterator():
+        start, end = usage_bucket(windows[key], now=now)
+        if (start, end) == (period_start, period_end):
+            continue
+        row, created = Usage.objects.get_or_create(
+            subscription_id=sub_id, key=key, period_start=start, period_end=end,
+            defaults={'used': used},
+        )
+        if not created and row.used < used:
+            row.used = used
+            row.save(update_fields=['used'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0015_usage_buckets_and_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(carry_current_usage, migrations.RunPython.noop),
+    ]
@@ -30,19 +30,25 @@ class Plan(models.Model):
         return f"{self.name} ({self.interval})"
 
     def entitlement_for(self, key: str):
-        return self.entitlements.filter(key=key).first()
+        """The read-only EntitlementRecord for `key`, from the shared per-plan map."""
+        from .entitlements import get_plan_entitlement
+        return get_plan_entitlement(self.pk, key)
 
     def get_price(self, currency: str | None = None):
         """
         Pick the best PlanPrice for a currency. If not found, fallback to default (is_default=True) or first.
+        Filters in Python so prefetch_related("prices") is honoured (one query at most).
         """
-        qs = self.prices.all()
+        prices = sorted(self.prices.all(), key=lambda p: p.pk)
         if currency:
-            price = qs.filter(currency__iexact=currency).first()
-            if price:
+            currency = currency.upper()
+            for price in prices:
+                if price.currency.upper() == currency:
+                    return price
+        for price in prices:
+            if price.is_default:
                 return price
-        default_price = qs.filter(is_default=True).first()
-        return default_price or qs.first()
+        return prices[0] if prices else None
     
 class PlanPrice(models.Model):
     """
@@ -216,7 +222,8 @@ class Subscription(models.Model):
 
 class Usage(models.Model):
     """
-    Tracks numeric quota usage per subscription and period window for any 'key'.
+    Tracks numeric quota usage per subscription and time bucket for any 'key'.
+    Bucket bounds follow the key's window (see periods.usage_bucket).
     """
     subscription = models.ForeignKey(Subscription, on_delete=models.CASCADE, related_name="usage")
     key = models.CharField(max_length=80)
@@ -226,10 +233,35 @@ class Usage(models.Model):
 
     class Meta:
         unique_together = ("subscription", "key", "period_start", "period_end")
+        indexes = [
+            # Covers the current-bucket lookup: `used` is read from the index
+            models.Index(
+                fields=["subscription", "key", "period_start", "period_end", "used"],
+                name="usage_bucket_covering_idx",
+            ),
+            models.Index(fields=["period_end"], name="usage_period_end_idx"),
+        ]
 
     def __str__(self):
         return f"{self.subscription_id}:{self.key}={self.used}"
 
+class UsageRollup(models.Model):
+    """
+    Compacted usage: the day and week buckets of one calendar month summed
+    into a single row once they are older than USAGE_RETENTION_DAYS.
+    """
+    subscription = models.ForeignKey(Subscription, on_delete=models.CASCADE, related_name="usage_rollups")
+    key = models.CharField(max_length=80)
+    month = models.DateField()
+    used = models.BigIntegerField(default=0)
+    buckets = models.PositiveIntegerField(default=0)  # Usage rows folded in
+
+    class Meta:
+        unique_together = ("subscription", "key", "month")
+
+    def __str__(self):
+        return f"{self.subscription_id}:{self.key}@{self.month:%Y-%m}={self.used}"
+
 class SubscriptionSetting(models.Model):
     """Global configuration for subscription and billing behavior across all users."""
 
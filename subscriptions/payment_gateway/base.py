@@ -0,0 +1,46 @@
+from abc import ABC, abstractmethod
+from types import MappingProxyType
+
+
+class PaymentGateway(ABC):
+    """
+    Common interface for payment provider clients.
+
+    The router builds one instance per provider and shares it across
+    requests and threads until the provider settings change, so an
+    instance holds only its configuration and its own API client.
+    Per-call state belongs in arguments, never on self.
+    """
+
+    provider: str = ""
+
+    def __init__(self, config: dict):
+        self.config = MappingProxyType(dict(config))
+        self.success_url = self.config.get("success_url", "")
+        self.cancel_url = self.config.get("cancel_url", "")
+
+    @abstractmethod
+    def create_checkout_session(self, user, plan, success_url: str | None = None, cancel_url: str | None = None):
+        """Start a hosted checkout for `plan`; returns an object with a `url`."""
+
+    @abstractmethod
+    def process_upgrade(self, subscription, new_plan, prorate: bool | None = None) -> None:
+        """Move `subscription` to a higher-priced plan."""
+
+    @abstractmethod
+    def process_downgrade(self, subscription, new_plan, refund_policy: str | None = None) -> None:
+        """Move `subscription` to a lower-priced plan."""
+
+    @abstractmethod
+    def process_cancellation(self, subscription, cancel_effect: str, refund_policy: str) -> None:
+        """Cancel `subscription` remotely and locally."""
+
+    @abstractmethod
+    def sync_subscription_status(self, subscription) -> None:
+        """Refresh the local subscription from the provider."""
+
+    def handle_webhook(self, event) -> None:
+        raise NotImplementedError(f"{self.provider} does not handle webhooks.")
+
+    def __repr__(self):
+        return f"<{type(self).__name__} provider={self.provider!r}>"
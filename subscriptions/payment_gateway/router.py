@@ -1,22 +1,55 @@
-from importlib import import_module
+import threading
 from django.conf import settings
-from subscriptions.models import PaymentProviderSetting, SubscriptionSetting
+from subscriptions.cache import ProcessSnapshot
+from subscriptions.conf import load_callable
+from subscriptions.utils import get_subscription_setting, subscription_setting_snapshot
 
 
 GATEWAY_MAP = {
-    "stripe": "subscriptions.payment_gateway.stripe",
-    "paystack": "subscriptions.payment_gateway.paystack",
-    "flutterwave": "subscriptions.payment_gateway.flutterwave",
-    "manual": "subscriptions.payment_gateway.manual",
+    "stripe": "subscriptions.payment_gateway.stripe.StripeGateway",
+    "paystack": "subscriptions.payment_gateway.paystack.PaystackGateway",
+    "flutterwave": "subscriptions.payment_gateway.flutterwave.FlutterwaveGateway",
+    "manual": "subscriptions.payment_gateway.manual.ManualGateway",
 }
 
+_registry_lock = threading.Lock()
+_registry = {}  # provider -> ProcessSnapshot of its gateway instance
 
-def get_gateway(provider_name: str):
-    """Dynamically import and return the payment gateway module."""
+
+def _normalize(provider_name: str) -> str:
     provider_name = (provider_name or "").lower().strip()
     if provider_name not in GATEWAY_MAP:
         raise ValueError(f"Unsupported payment provider: {provider_name}")
-    return import_module(GATEWAY_MAP[provider_name])
+    return provider_name
+
+
+def _build_gateway(provider_name: str):
+    config = get_config(provider_name)
+    try:
+        gateway_class = load_callable(GATEWAY_MAP[provider_name])
+    except ImportError:
+        raise ValueError(f"No gateway implementation available for provider: {provider_name}")
+    return gateway_class(config)
+
+
+def get_gateway(provider_name: str):
+    """
+    Return the configured gateway client for a provider.
+    One instance per provider is shared across requests and threads; it is
+    rebuilt only when the subscription settings version changes.
+    """
+    provider_name = _normalize(provider_name)
+    snapshot = _registry.get(provider_name)
+    if snapshot is None:
+        with _registry_lock:
+            snapshot = _registry.setdefault(
+                provider_name,
+                ProcessSnapshot(
+                    subscription_setting_snapshot.version_key,
+                    lambda: _build_gateway(provider_name),
+                ),
+            )
+    return snapshot.get()
 
 
 def get_config(provider_name: str) -> dict:
@@ -25,12 +58,13 @@ def get_config(provider_name: str) -> dict:
     - Secret keys (from settings)
     - Webhook keys
     - Success/Cancel URLs (from SubscriptionSetting)
+    - Provider-specific additional_settings
     """
 
     provider_name = (provider_name or "").lower()
 
-    # --- Fetch global SubscriptionSetting (should always exist) ---
-    subscription_config = SubscriptionSetting.objects.first()
+    # --- Global SubscriptionSetting snapshot (process-cached, no queries) ---
+    subscription_config = get_subscription_setting()
 
     success_url = ""
     cancel_url = ""
@@ -40,9 +74,7 @@ def get_config(provider_name: str) -> dict:
         cancel_url = subscription_config.cancel_url or ""
 
     # --- 2️⃣ Optionally validate that the provider is enabled ---
-    provider_config = PaymentProviderSetting.objects.filter(
-        provider=provider_name, is_active=True
-    ).order_by("priority").first()
+    provider_config = subscription_config.get_provider(provider_name) if subscription_config else None
 
     if not provider_config:
         raise ValueError(f"No active configuration found for provider: {provider_name}")
@@ -62,8 +94,9 @@ def get_config(provider_name: str) -> dict:
 
     # --- Combine all configuration into one dict ---
     return {
+        **provider_config.additional_settings,
         "provider": provider_name,
         "success_url": success_url,
         "cancel_url": cancel_url,
         **keys,
-    }
\ No newline at end of file
+    }
@@ -1,5 +1,5 @@
 from django.utils import timezone
-from datetime import timedelta
+from datetime import timedelta, timezone as dt_timezone
 
 try:
     from dateutil.relativedelta import relativedelta
@@ -40,3 +40,30 @@ def monthly_or_yearly(interval: str, start=None):
     else:
         # print(f"[WARN] Unknown interval '{interval}', defaulting to +30 days.")
         return start + timedelta(days=30)
+
+
+USAGE_WINDOWS = ("day", "week", "month", "period")
+
+def usage_bucket(window: str, period=None, now=None):
+    """
+    (start, end) of the usage bucket containing `now`: the UTC day, the
+    Monday-start week, the calendar month, or `period`, the subscription's
+    current (start, end) billing period. Pure arithmetic, so callers go
+    straight to the row.
+    """
+    if window == "period":
+        return tuple(period)
+
+    now = (now or timezone.now()).astimezone(dt_timezone.utc)
+    day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if window == "day":
+        return day, day + timedelta(days=1)
+    if window == "week":
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(weeks=1)
+    if window == "month":
+        start = day.replace(day=1)
+        if start.month == 12:
+            return start, start.replace(year=start.year + 1, month=1)
+        return start, start.replace(month=start.month + 1)
+    raise ValueError(f"Unknown usage window '{window}'. Expected one of {USAGE_WINDOWS}.")
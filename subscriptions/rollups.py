@@ -0,0 +1,58 @@
+from datetime import timedelta, timezone as dt_timezone
+from django.db import models, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from .conf import get_setting
+from .models import Usage, UsageRollup
+from .utils import window_for_key
+
+COMPACT_CHUNK_SIZE = 1000
+COMPACTED_WINDOWS = ("day", "week")
+
+def compacted_keys():
+    """Quota keys counted in buckets small enough to be worth rolling up."""
+    return [key for key in get_setting("ENTITLEMENTS", {}) if window_for_key(key) in COMPACTED_WINDOWS]
+
+def compact_usage(before=None, chunk_size=COMPACT_CHUNK_SIZE):
+    """
+    Fold day and week buckets that ended before `before` (default: now minus
+    USAGE_RETENTION_DAYS) into one UsageRollup per subscription, key and
+    calendar month, deleting the buckets. Works in primary-key chunks, each
+    in its own transaction. Returns the number of buckets compacted.
+
+    Keep the retention well past a day so write-behind counters (which
+    outlive their bucket by a day) are flushed before it is compacted.
+    """
+    keys = compacted_keys()
+    if not keys:
+        return 0
+    before = before or timezone.now() - timedelta(days=get_setting("USAGE_RETENTION_DAYS"))
+    old = Usage.objects.filter(key__in=keys, period_end__lte=before)
+
+    compacted = 0
+    while True:
+        with transaction.atomic():
+            ids = list(old.order_by("pk").values_list("pk", flat=True)[:chunk_size])
+            if not ids:
+                return compacted
+            chunk = Usage.objects.filter(pk__in=ids)
+            groups = (
+                chunk.annotate(month=TruncMonth("period_start", output_field=models.DateField(), tzinfo=dt_timezone.utc))
+                .values("subscription_id", "key", "month")
+                .annotate(total=Sum("used"), buckets=Count("pk"))
+                .order_by()
+            )
+            for group in groups:
+                rollups = UsageRollup.objects.filter(
+                    subscription_id=group["subscription_id"], key=group["key"], month=group["month"]
+                )
+                if not rollups.update(used=F("used") + group["total"], buckets=F("buckets") + group["buckets"]):
+                    UsageRollup.objects.create(
+                        subscription_id=group["subscription_id"],
+                        key=group["key"],
+                        month=group["month"],
+                        used=group["total"],
+                        buckets=group["buckets"],
+                    )
+            compacted += chunk.delete()[0]
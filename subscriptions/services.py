@@ -1,7 +1,13 @@
-from django.db import transaction
+from collections import namedtuple
+from django.db import IntegrityError, transaction
+from django.db.models import F
 from django.utils import timezone
 from .models import Plan, PlanPrice, Subscription, Usage, SubscriptionStatus
 from .conf import get_setting, load_callable
+from .periods import usage_bucket
+from .utils import window_for_key
+from .entitlements import get_entitlement_snapshot, get_plan_entitlement
+from . import usage_counters
 
 def _period_end(plan, start=None):
     period_func = load_callable(get_setting("PERIOD_FUNC"))
@@ -58,14 +64,52 @@ def cancel_at_period_end(user) -> Subscription | None:
     sub.save(update_fields=["cancel_at_period_end"])
     return sub
 
-def _get_or_create_usage(sub: Subscription, key: str) -> Usage:
-    return Usage.objects.get_or_create(
-        subscription=sub,
-        key=key,
-        period_start=sub.current_period_start,
-        period_end=sub.current_period_end,
-        defaults={"used": 0},
-    )[0]
+QuotaState = namedtuple("QuotaState", ["key", "limit", "used", "reset"])
+
+def _bucket(sub_id, key, period, now=None):
+    """The (subscription_id, key, period_start, period_end) bucket counting `key` at `now`."""
+    start, end = usage_bucket(window_for_key(key), period, now)
+    return (sub_id, key, start, end)
+
+def _usage_window(sub: Subscription, key: str):
+    return _bucket(sub.pk, key, (sub.current_period_start, sub.current_period_end))
+
+def _consume_quota(window, amount: int, limit: int | None) -> bool:
+    """
+    Add `amount` to the window's Usage row with one conditional UPDATE
+    (used = used + amount WHERE used + amount <= limit), so concurrent
+    callers can never overspend. The row is created on first use.
+    """
+    if limit is not None and amount > limit:
+        return False
+    rows = usage_counters.window_rows(window)
+    if limit is not None:
+        rows = rows.filter(used__lte=limit - amount)
+    if rows.update(used=F("used") + amount):
+        return True
+
+    # No row yet, or no room left in it
+    sub_id, key, start, end = window
+    try:
+        with transaction.atomic():
+            Usage.objects.create(subscription_id=sub_id, key=key, period_start=start, period_end=end, used=amount)
+        return True
+    except IntegrityError:
+        return bool(rows.update(used=F("used") + amount))
+
+def _spend(window, amount: int, limit: int | None):
+    """(recorded, used after the attempt) for one bucket, write-behind or not."""
+    if usage_counters.is_write_behind(window[1]):
+        return usage_counters.consume(window, amount, limit)
+    recorded = _consume_quota(window, amount, limit)
+    return recorded, usage_counters.window_rows(window).values_list("used", flat=True).first() or 0
+
+def _release(window, amount: int):
+    """Give back an amount spent by _spend (an all-or-nothing spend that failed)."""
+    if usage_counters.is_write_behind(window[1]):
+        usage_counters.release(window, amount)
+    else:
+        usage_counters.window_rows(window).update(used=F("used") - amount)
 
 def get_remaining_quota(user, key: str) -> int | None:
     """
@@ -76,43 +120,85 @@ def get_remaining_quota(user, key: str) -> int | None:
     """
     sub = Subscription.objects.filter(
         user=user, status__in=[SubscriptionStatus.ACTIVE, SubscriptionStatus.TRIALING]
-    ).select_related("plan").first()
+    ).first()
     if not sub or not sub.is_active:
         return 0
 
-    ent = sub.plan.entitlement_for(key)
+    ent = get_plan_entitlement(sub.plan_id, key)
     if not ent or not ent.enabled:
         return 0
 
     if ent.limit_int is None:
         return None  # unlimited
 
-    usage = _get_or_create_usage(sub, key)
-    return max(ent.limit_int - usage.used, 0)
+    window = _usage_window(sub, key)
+    if usage_counters.is_write_behind(key):
+        used = usage_counters.get_used(window)
+    else:
+        used = usage_counters.window_rows(window).values_list("used", flat=True).first() or 0
+    return max(ent.limit_int - used, 0)
 
 def record_quota_usage(user, key: str, amount: int = 1) -> bool:
     """
     Returns True if recorded, False if it would exceed quota or not enabled.
+    Keys listed in SUBSCRIPTIONS["USAGE_WRITE_BEHIND_KEYS"] are counted in
+    the cache and reach Usage on the next flush_usage_counters run.
     """
     sub = Subscription.objects.filter(
         user=user, status__in=[SubscriptionStatus.ACTIVE, SubscriptionStatus.TRIALING]
-    ).select_related("plan").first()
+    ).first()
     if not sub or not sub.is_active:
         return False
 
-    ent = sub.plan.entitlement_for(key)
+    ent = get_plan_entitlement(sub.plan_id, key)
     if not ent or not ent.enabled:
         return False
 
-    usage = _get_or_create_usage(sub, key)
-    if ent.limit_int is None:
-        usage.used += amount
-        usage.save(update_fields=["used"])
-        return True
+    window = _usage_window(sub, key)
+    if usage_counters.is_write_behind(key):
+        return usage_counters.consume(window, amount, ent.limit_int)[0]
+    return _consume_quota(window, amount, ent.limit_int)
 
-    if usage.used + amount > ent.limit_int:
-        return False
+def _quota_windows(user_id, keys):
+    """(key, limit, bucket) for each of `keys` the user's active plan defines."""
+    snapshot = get_entitlement_snapshot(user_id)
+    if not snapshot.get("subscription_id"):
+        return
+    now = timezone.now()
+    period = (snapshot["period_start"], snapshot["period_end"])
+    for key in keys:
+        ent = snapshot["entitlements"].get(key)
+        if ent:
+            limit = ent.limit_int if ent.enabled else 0
+            yield key, limit, _bucket(snapshot["subscription_id"], key, period, now)
+
+def spend_quotas(user_id, keys, amount: int = 1):
+    """
+    Record `amount` against every key in `keys` on the user's active plan,
+    or against none of them. The plan and billing period come from the
+    cached entitlement snapshot, so write-behind keys cost cache round
+    trips only. Keys the plan does not define are not governed.
 
-    usage.used += amount
-    usage.save(update_fields=["used"])
-    return True
+    Returns (allowed, states): on success a QuotaState per limited key,
+    otherwise the QuotaStates of the keys that ran out.
+    """
+    spent, states, rejected = [], [], []
+    for key, limit, window in _quota_windows(user_id, keys):
+        recorded, used = _spend(window, amount, limit)
+        if not recorded:
+            rejected.append(QuotaState(key, limit, used, window[3]))
+            continue
+        spent.append(window)
+        if limit is not None:
+            states.append(QuotaState(key, limit, used, window[3]))
+
+    if rejected:
+        for window in spent:
+            _release(window, amount)
+        return False, rejected
+    return True, states
+
+def release_quotas(user_id, keys, amount: int = 1):
+    """Give back an amount spend_quotas recorded (the work it paid for never ran)."""
+    for _, _, window in _quota_windows(user_id, keys):
+        _release(window, amount)
@@ -1,7 +1,12 @@
-from django.db.models.signals import post_save
+from functools import partial
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
-from subscriptions.models import SubscriptionSetting
+from subscriptions.models import SubscriptionSetting, PaymentProviderSetting, Subscription, Plan, PlanPrice, Entitlement
+from subscriptions.entitlements import invalidate_entitlements, plan_entitlements
+from subscriptions.utils import subscription_setting_snapshot
+from subscriptions.catalog import plan_catalog
 
 @receiver(post_save, sender=SubscriptionSetting)
 def update_payment_policy_html(sender, instance, **kwargs):
@@ -96,4 +101,43 @@ def update_payment_policy_html(sender, instance, **kwargs):
     """
     sender.objects.filter(pk=instance.pk).update(policy_text=html)
 
-    # print("[Subscription Policy Updated] HTML policy regenerated successfully.")
\ No newline at end of file
+    # print("[Subscription Policy Updated] HTML policy regenerated successfully.")
+
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def invalidate_user_entitlements(sender, instance, **kwargs):
+    # On commit, so no process re-caches the old subscription under the new state
+    transaction.on_commit(partial(invalidate_entitlements, user_id=instance.user_id))
+
+
+@receiver(post_save, sender=Plan)
+@receiver(post_delete, sender=Plan)
+def invalidate_all_entitlements(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_entitlements)
+
+
+@receiver(post_save, sender=Entitlement)
+@receiver(post_delete, sender=Entitlement)
+def invalidate_plan_entitlements(sender, instance, **kwargs):
+    transaction.on_commit(plan_entitlements.bump)
+
+
+# Connected after update_payment_policy_html so the regenerated policy_text
+# is part of the next snapshot; on_commit keeps other processes from
+# rebuilding from uncommitted rows.
+@receiver(post_save, sender=SubscriptionSetting)
+@receiver(post_delete, sender=SubscriptionSetting)
+@receiver(post_save, sender=PaymentProviderSetting)
+@receiver(post_delete, sender=PaymentProviderSetting)
+def invalidate_subscription_setting_snapshot(sender, instance, **kwargs):
+    transaction.on_commit(subscription_setting_snapshot.bump)
+
+
+@receiver(post_save, sender=Plan)
+@receiver(post_delete, sender=Plan)
+@receiver(post_save, sender=PlanPrice)
+@receiver(post_delete, sender=PlanPrice)
+@receiver(post_save, sender=Entitlement)
+@receiver(post_delete, sender=Entitlement)
+def invalidate_plan_catalog(sender, instance, **kwargs):
+    transaction.on_commit(plan_catalog.bump)
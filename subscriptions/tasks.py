@@ -1,7 +1,10 @@
 from celery import shared_task
 from django.utils import timezone
-from subscriptions.models import Subscription, SubscriptionStatus, SubscriptionSetting
-from subscriptions.payment_gateway.router import get_gateway, get_config
+from subscriptions.models import Subscription, SubscriptionStatus
+from subscriptions.payment_gateway.router import get_gateway
+from subscriptions.utils import get_subscription_setting
+from subscriptions.usage_counters import flush_usage_counters
+from subscriptions.rollups import compact_usage
 
 
 @shared_task(name="subscriptions.sync_all_payment_providers")
@@ -13,17 +16,14 @@ def sync_all_payment_providers():
     print(f"[Celery] Starting full subscription sync at {timezone.now()}")
 
     # Try to get global settings
-    settings = SubscriptionSetting.objects.first()
+    settings = get_subscription_setting()
     if not settings:
         print("[Celery] No SubscriptionSetting found — aborting sync.")
         return
 
     # Determine which providers are enabled
     if settings.enable_multiple_gateways:
-        providers = [
-            provider.provider.lower()
-            for provider in settings.providers.filter(is_active=True)
-        ]
+        providers = [provider.provider.lower() for provider in settings.providers]
     else:
         providers = [settings.default_provider.lower()]
 
@@ -46,21 +46,15 @@ def sync_all_payment_providers():
         print(f"[Celery] Found {subs.count()} subscriptions for {provider}.")
 
         try:
-            config = get_config(provider)
             gateway = get_gateway(provider)
-            if hasattr(gateway, "configure"):
-                gateway.configure(config)
         except Exception as e:
             print(f"[Celery] Failed to load gateway for {provider}: {e}")
             continue
 
         for sub in subs:
             try:
-                if hasattr(gateway, "sync_subscription_status"):
-                    gateway.sync_subscription_status(sub)
-                    total_synced += 1
-                else:
-                    print(f"[Celery] Gateway {provider} has no sync_subscription_status().")
+                gateway.sync_subscription_status(sub)
+                total_synced += 1
             except Exception as e:
                 total_failed += 1
                 print(f"[Celery] Sync failed for {provider} subscription {sub.id}: {e}")
@@ -69,4 +63,20 @@ def sync_all_payment_providers():
         f"[Celery] Sync completed at {timezone.now()}: "
         f"{total_synced} succeeded, {total_failed} failed."
     )
- 
\ No newline at end of file
+ 
+
+@shared_task(name="subscriptions.flush_usage_counters")
+def flush_usage_counters_task():
+    """
+    Periodic task: write cached quota counters to Usage.
+    Schedule it every minute or so when USAGE_WRITE_BEHIND_KEYS is set.
+    """
+    return flush_usage_counters()
+
+
+@shared_task(name="subscriptions.compact_usage")
+def compact_usage_task():
+    """
+    Periodic task: roll old day/week usage buckets into monthly rollups.
+    """
+    return compact_usage()
@@ -1,3 +1,297 @@
-from django.test import TestCase
+import stripe
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from subscriptions.constants import SUBSCRIPTIONS
+from subscriptions.models import SubscriptionSetting, PaymentProviderSetting, Plan, PlanPrice, Entitlement, Subscription, Usage, UsageRollup
+from subscriptions.periods import usage_bucket
+from subscriptions.rollups import compact_usage
+from subscriptions.services import get_remaining_quota, record_quota_usage
+from subscriptions.usage_counters import flush_usage_counters
+from subscriptions.cache import _stamp_ttl
+from subscriptions.catalog import get_catalog_payload, plan_catalog
+from subscriptions.entitlements import plan_entitlements
+from subscriptions.views import PlanListView, SubscriptionPolicyView
+from rest_framework.test import APIRequestFactory
+from subscriptions.payment_gateway.router import get_config, get_gateway
+from subscriptions.payment_gateway.stripe import StripeGateway
+from subscriptions.utils import get_subscription_setting, subscription_setting_snapshot
 
-# Create your tests here.
+
+class SubscriptionSettingSnapshotTest(TestCase):
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.setting = SubscriptionSetting.objects.create(success_url="https://example.com/ok")
+            PaymentProviderSetting.objects.create(subscription_setting=self.setting, provider="stripe")
+            PaymentProviderSetting.objects.create(subscription_setting=self.setting, provider="paystack", is_active=False)
+
+    def tearDown(self):
+        subscription_setting_snapshot.bump()
+
+    def test_warm_snapshot_needs_no_queries(self):
+        get_subscription_setting()
+        with self.assertNumQueries(0):
+            snapshot = get_subscription_setting()
+            config = get_config("stripe")
+        self.assertTrue(snapshot.policy_text)
+        self.assertEqual([p.provider for p in snapshot.providers], ["stripe"])
+        self.assertEqual(config["success_url"], "https://example.com/ok")
+        with self.assertRaises(ValueError):
+            get_config("paystack")
+
+    def test_saves_publish_a_new_snapshot_on_commit(self):
+        self.assertTrue(get_subscription_setting().allow_upgrade)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.setting.allow_upgrade = False
+            self.setting.save()
+            self.assertTrue(get_subscription_setting().allow_upgrade)
+        self.assertFalse(get_subscription_setting().allow_upgrade)
+
+    def test_stamps_expire_only_on_a_process_local_cache(self):
+        with mock.patch("subscriptions.cache.settings") as settings:
+            settings.SNAPSHOT_VERSION_TTL = 60
+            settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache"}}
+            self.assertIsNone(_stamp_ttl())
+            settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+            self.assertEqual(_stamp_ttl(), 60)
+
+
+@override_settings(STRIPE_SECRET_KEY="sk_test_gateway")
+class GatewayRegistryTest(TestCase):
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.setting = SubscriptionSetting.objects.create()
+            self.provider = PaymentProviderSetting.objects.create(subscription_setting=self.setting, provider="stripe")
+
+    def tearDown(self):
+        subscription_setting_snapshot.bump()
+
+    def test_client_is_shared_until_provider_settings_change(self):
+        gateway = get_gateway("stripe")
+        self.assertIsInstance(gateway, StripeGateway)
+        with self.assertNumQueries(0):
+            self.assertIs(get_gateway("Stripe"), gateway)
+        self.assertIsNone(stripe.api_key)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.provider.additional_settings = {"max_network_retries": 0}
+            self.provider.save()
+        rebuilt = get_gateway("stripe")
+        self.assertIsNot(rebuilt, gateway)
+        self.assertEqual(rebuilt.config["max_network_retries"], 0)
+
+    def test_unknown_or_inactive_provider_is_rejected(self):
+        with self.assertRaises(ValueError):
+            get_gateway("bitcoin")
+        with self.assertRaises(ValueError):
+            get_gateway("paystack")
+
+
+class PlanEntitlementMapTest(TestCase):
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.plan = Plan.objects.create(slug="basic", name="Basic")
+            self.jobs = Entitlement.objects.create(plan=self.plan, key="jobs_per_month", enabled=True, limit_int=20)
+            Entitlement.objects.create(plan=self.plan, key="support", enabled=False, limit_str="email")
+
+    def tearDown(self):
+        plan_entitlements.bump()
+
+    def test_warm_lookup_needs_no_queries(self):
+        self.plan.entitlement_for("jobs_per_month")
+        with self.assertNumQueries(0):
+            jobs = self.plan.entitlement_for("jobs_per_month")
+            support = self.plan.entitlement_for("support")
+            missing = self.plan.entitlement_for("seats")
+        self.assertEqual((jobs.enabled, jobs.limit_int), (True, 20))
+        self.assertEqual((support.enabled, support.limit_str), (False, "email"))
+        self.assertIsNone(missing)
+
+    def test_records_are_read_only(self):
+        with self.assertRaises(AttributeError):
+            self.plan.entitlement_for("jobs_per_month").limit_int = 1000
+
+    def test_entitlement_change_rebuilds_on_commit(self):
+        self.plan.entitlement_for("jobs_per_month")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.jobs.limit_int = 50
+            self.jobs.save()
+        self.assertEqual(self.plan.entitlement_for("jobs_per_month").limit_int, 50)
+
+
+class PlanCatalogTest(TestCase):
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.basic = Plan.objects.create(slug="basic", name="Basic", interval="monthly", sort_order=1)
+            PlanPrice.objects.create(plan=self.basic, currency="USD", amount="10.00", is_default=True)
+            self.basic_ngn = PlanPrice.objects.create(plan=self.basic, currency="NGN", amount="9000.00")
+            Entitlement.objects.create(plan=self.basic, key="jobs_per_month", enabled=True, limit_int=20)
+            self.pro = Plan.objects.create(slug="pro-yearly", name="Pro", interval="yearly", sort_order=2)
+            PlanPrice.objects.create(plan=self.pro, currency="USD", amount="100.00", is_default=True)
+
+    def tearDown(self):
+        plan_catalog.bump()
+
+    def test_warm_catalog_needs_no_queries(self):
+        get_catalog_payload()
+        with self.assertNumQueries(0):
+            payload = get_catalog_payload(intervals=["monthly"], currency="ngn", prices_mode="selected")
+        self.assertEqual([p["slug"] for p in payload["plans"]], ["basic"])
+        self.assertEqual(list(payload["comparison"]), ["monthly"])
+        self.assertEqual(payload["plans"][0]["selected_price"]["currency"], "NGN")
+        self.assertEqual(payload["plans"][0]["prices"], [payload["plans"][0]["selected_price"]])
+
+    def test_selection_matches_plan_get_price(self):
+        payload = get_catalog_payload(currency="EUR")
+        for plan_data, plan in zip(payload["plans"], [self.basic, self.pro]):
+            self.assertEqual(plan_data["selected_price"]["currency"], plan.get_price("EUR").currency)
+            self.assertEqual(len(plan_data["prices"]), plan.prices.count())
+
+    def test_price_change_rebuilds_on_commit(self):
+        get_catalog_payload()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.basic_ngn.amount = "9500.00"
+            self.basic_ngn.save()
+        selected = get_catalog_payload(currency="NGN")["plans"][0]["selected_price"]
+        self.assertEqual(selected["amount"], "9500.00")
+
+    def get(self, view, query="", **headers):
+        request = APIRequestFactory().get(f"/{query}", HTTP_X_API_KEY="test", **headers)
+        return view.as_view(authentication_classes=[], throttle_classes=[])(request)
+
+    def test_plan_list_etag_and_304(self):
+        response = self.get(PlanListView, "?interval=yearly,monthly&currency=usd")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("stale-while-revalidate=", response["Cache-Control"])
+        etag = response["ETag"]
+
+        same = self.get(PlanListView, "?interval=monthly&interval=yearly&currency=USD", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(same.status_code, 304)
+        self.assertEqual(same["ETag"], etag)
+        self.assertNotEqual(self.get(PlanListView, "?interval=monthly,yearly&currency=NGN")["ETag"], etag)
+
+        # A new stamp over unchanged plans (expiry, another process) keeps the ETag
+        plan_catalog.bump()
+        self.assertEqual(self.get(PlanListView, "?interval=monthly,yearly&currency=USD", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.basic_ngn.amount = "9500.00"
+            self.basic_ngn.save()
+        self.assertEqual(self.get(PlanListView, "?interval=monthly,yearly&currency=USD", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_policy_etag_follows_settings(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            setting = SubscriptionSetting.objects.create()
+        try:
+            etag = self.get(SubscriptionPolicyView)["ETag"]
+            self.assertEqual(self.get(SubscriptionPolicyView, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            with self.captureOnCommitCallbacks(execute=True):
+                setting.can_cancel = False
+                setting.save()
+            self.assertEqual(self.get(SubscriptionPolicyView, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        finally:
+            subscription_setting_snapshot.bump()
+
+
+class QuotaUsageTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("alice", "alice@example.com", "pw")
+        with self.captureOnCommitCallbacks(execute=True):
+            plan = Plan.objects.create(slug="starter", name="Starter")
+            Entitlement.objects.create(plan=plan, key="jobs_per_month", enabled=True, limit_int=2)
+            Entitlement.objects.create(plan=plan, key="api_calls_per_day", enabled=True, limit_int=3)
+            Entitlement.objects.create(plan=plan, key="workflows", enabled=True)
+            Entitlement.objects.create(plan=plan, key="jobs_per_day", enabled=True, limit_int=1)
+        self.sub = Subscription.objects.create(
+            user=self.user, plan=plan, current_period_end=timezone.now() + timedelta(days=30)
+        )
+
+    def tearDown(self):
+        plan_entitlements.bump()
+
+    def used(self, key):
+        return Usage.objects.get(subscription=self.sub, key=key).used
+
+    def test_limit_is_enforced_in_the_update(self):
+        self.assertTrue(record_quota_usage(self.user, "jobs_per_month"))
+        with self.assertNumQueries(2):  # subscription + conditional UPDATE
+            self.assertTrue(record_quota_usage(self.user, "jobs_per_month"))
+        self.assertFalse(record_quota_usage(self.user, "jobs_per_month"))
+        self.assertFalse(record_quota_usage(self.user, "jobs_per_month", amount=5))
+        self.assertEqual(self.used("jobs_per_month"), 2)
+        self.assertEqual(get_remaining_quota(self.user, "jobs_per_month"), 0)
+
+    def test_unlimited_keys_still_count(self):
+        self.assertTrue(record_quota_usage(self.user, "workflows", amount=10))
+        self.assertTrue(record_quota_usage(self.user, "workflows", amount=10))
+        self.assertEqual(self.used("workflows"), 20)
+        self.assertIsNone(get_remaining_quota(self.user, "workflows"))
+
+    def test_write_behind_counts_in_cache_until_flushed(self):
+        with mock.patch.dict(SUBSCRIPTIONS, {"USAGE_WRITE_BEHIND_KEYS": ["api_calls_per_day"]}):
+            self.assertTrue(record_quota_usage(self.user, "api_calls_per_day"))
+            self.assertTrue(record_quota_usage(self.user, "api_calls_per_day"))
+            self.assertFalse(Usage.objects.exists())
+            self.assertEqual(get_remaining_quota(self.user, "api_calls_per_day"), 1)
+
+            self.assertEqual(flush_usage_counters(), 1)
+            self.assertEqual(self.used("api_calls_per_day"), 2)
+            self.assertEqual(flush_usage_counters(), 0)
+
+            self.assertTrue(record_quota_usage(self.user, "api_calls_per_day"))
+            self.assertFalse(record_quota_usage(self.user, "api_calls_per_day"))
+            self.assertEqual(flush_usage_counters(), 1)
+            self.assertEqual(self.used("api_calls_per_day"), 3)
+
+    def test_daily_keys_count_per_utc_day(self):
+        self.assertTrue(record_quota_usage(self.user, "jobs_per_day"))
+        self.assertFalse(record_quota_usage(self.user, "jobs_per_day"))
+        self.assertTrue(record_quota_usage(self.user, "jobs_per_month"))
+
+        tomorrow = timezone.now() + timedelta(days=1)
+        with mock.patch("django.utils.timezone.now", return_value=tomorrow):
+            self.assertEqual(get_remaining_quota(self.user, "jobs_per_day"), 1)
+            self.assertTrue(record_quota_usage(self.user, "jobs_per_day"))
+            self.assertEqual(get_remaining_quota(self.user, "jobs_per_month"), 1)
+        self.assertEqual(Usage.objects.filter(key="jobs_per_day").count(), 2)
+
+    def test_old_daily_buckets_are_compacted(self):
+        def bucket(day, used):
+            start, end = usage_bucket("day", now=datetime(2026, day[0], day[1], 12, tzinfo=dt_timezone.utc))
+            Usage.objects.create(subscription=self.sub, key="jobs_per_day", period_start=start, period_end=end, used=used)
+
+        bucket((1, 30), 3)
+        bucket((1, 31), 4)
+        bucket((2, 1), 5)
+        bucket((3, 10), 7)
+        cutoff = datetime(2026, 3, 1, tzinfo=dt_timezone.utc)
+
+        self.assertEqual(compact_usage(before=cutoff, chunk_size=2), 3)
+        self.assertEqual(compact_usage(before=cutoff), 0)
+        rollups = UsageRollup.objects.order_by("month").values_list("month", "used", "buckets")
+        self.assertEqual([(m.month, used, n) for m, used, n in rollups], [(1, 7, 2), (2, 5, 1)])
+        self.assertEqual(list(Usage.objects.values_list("used", flat=True)), [7])
+
+
+class UsageBucketTest(TestCase):
+
+    def test_bucket_bounds(self):
+        now = datetime(2026, 12, 31, 23, 30, tzinfo=dt_timezone.utc)  # a Thursday
+        day = datetime(2026, 12, 31, tzinfo=dt_timezone.utc)
+        self.assertEqual(usage_bucket("day", now=now), (day, day + timedelta(days=1)))
+        self.assertEqual(usage_bucket("week", now=now)[0], datetime(2026, 12, 28, tzinfo=dt_timezone.utc))
+        self.assertEqual(
+            usage_bucket("month", now=now),
+            (datetime(2026, 12, 1, tzinfo=dt_timezone.utc), datetime(2027, 1, 1, tzinfo=dt_timezone.utc)),
+        )
+        with self.assertRaises(ValueError):
+            usage_bucket("fortnight", now=now)
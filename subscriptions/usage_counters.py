@@ -0,0 +1,150 @@
+from datetime import timedelta
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from .conf import get_setting
+from .models import Usage
+
+# Write-behind counting for hot quota keys (SUBSCRIPTIONS["USAGE_WRITE_BEHIND_KEYS"]).
+#
+# A usage window is (subscription_id, key, period_start, period_end), i.e. one
+# Usage row. Its running total lives in a cache counter seeded from the row;
+# increments are a cache incr and flush_usage_counters() writes totals back
+# with used = GREATEST(used, total), so a repeated or late flush never moves a
+# row backwards. Needs a cache shared by every process (Redis, Memcached).
+#
+# Dirty windows are found through numbered slots: the first increment after a
+# flush claims the window's dirty flag and records it in the next slot.
+
+TOTAL_CACHE_FORMAT = "subscriptions_usage_{window}"
+DIRTY_CACHE_FORMAT = "subscriptions_usage_dirty_{window}"
+SLOT_CACHE_FORMAT = "subscriptions_usage_slot_{slot}"
+SEQ_CACHE_KEY = "subscriptions_usage_seq"
+CURSOR_CACHE_KEY = "subscriptions_usage_cursor"
+RETRY_CACHE_KEY = "subscriptions_usage_retry"
+FLUSH_LOCK_KEY = "subscriptions_usage_flush_lock"
+FLUSH_LOCK_TTL = 300  # seconds
+GRACE = timedelta(days=1)  # counters outlive their window so a late flush still finds them
+
+def is_write_behind(key):
+    return key in get_setting("USAGE_WRITE_BEHIND_KEYS")
+
+def _window_id(window):
+    sub_id, key, start, end = window
+    return f"{sub_id}_{key}_{int(start.timestamp())}_{int(end.timestamp())}"
+
+def _timeout(window):
+    return max(60, int((window[3] + GRACE - timezone.now()).total_seconds()))
+
+def window_rows(window):
+    sub_id, key, start, end = window
+    return Usage.objects.filter(subscription_id=sub_id, key=key, period_start=start, period_end=end)
+
+def _seed(window):
+    """Cache key of the window's total, seeding it from the Usage row when missing."""
+    cache_key = TOTAL_CACHE_FORMAT.format(window=_window_id(window))
+    if cache.get(cache_key) is None:
+        used = window_rows(window).values_list("used", flat=True).first() or 0
+        cache.add(cache_key, used, timeout=_timeout(window))
+    return cache_key
+
+def _mark_dirty(window):
+    if not cache.add(DIRTY_CACHE_FORMAT.format(window=_window_id(window)), 1, timeout=_timeout(window)):
+        return  # already waiting for a flush
+    cache.add(SEQ_CACHE_KEY, 0, timeout=None)
+    slot = cache.incr(SEQ_CACHE_KEY)
+    cache.set(SLOT_CACHE_FORMAT.format(slot=slot), window, timeout=_timeout(window))
+
+def get_used(window):
+    return cache.get(_seed(window)) or 0
+
+def consume(window, amount, limit):
+    """
+    Add `amount` to the window's counter unless that would pass `limit`
+    (None = unlimited). No database writes. Returns (recorded, used): the
+    incr result decides, so concurrent callers cannot overspend.
+    """
+    cache_key = _seed(window)
+    try:
+        total = cache.incr(cache_key, amount)
+    except ValueError:  # evicted between seeding and incr
+        cache_key = _seed(window)
+        total = cache.incr(cache_key, amount)
+
+    if limit is not None and total > limit:
+        cache.decr(cache_key, amount)
+        return False, total - amount
+    _mark_dirty(window)
+    return True, total
+
+def release(window, amount):
+    """Undo a consume() whose caller gave up (e.g. another quota ran out)."""
+    try:
+        cache.decr(TOTAL_CACHE_FORMAT.format(window=_window_id(window)), amount)
+    except ValueError:  # expired meanwhile: nothing left to undo
+        pass
+
+def _write(window, total):
+    rows = window_rows(window)
+    if rows.update(used=Greatest(F("used"), Value(total))):
+        return
+    sub_id, key, start, end = window
+    try:
+        with transaction.atomic():
+            Usage.objects.create(subscription_id=sub_id, key=key, period_start=start, period_end=end, used=total)
+    except IntegrityError:  # created since the update above
+        rows.update(used=Greatest(F("used"), Value(total)))
+
+def _flush_slots(slots, retry):
+    """Write the windows recorded in `slots`; returns (written, slots not yet filled)."""
+    slot_keys = {SLOT_CACHE_FORMAT.format(slot=slot): slot for slot in slots}
+    found = cache.get_many(list(slot_keys))
+    missing = [slot for cache_key, slot in slot_keys.items() if cache_key not in found and slot not in retry]
+
+    windows = list(found.values())
+    ids = [_window_id(window) for window in windows]
+    # Clear the flags before reading totals: any later increment re-registers
+    cache.delete_many([DIRTY_CACHE_FORMAT.format(window=i) for i in ids])
+    totals = cache.get_many([TOTAL_CACHE_FORMAT.format(window=i) for i in ids])
+
+    written = 0
+    for window, window_id in zip(windows, ids):
+        total = totals.get(TOTAL_CACHE_FORMAT.format(window=window_id))
+        if total is None:
+            continue
+        _write(window, total)
+        written += 1
+    cache.delete_many(list(found))
+    return written, missing
+
+def flush_usage_counters(batch_size=None):
+    """
+    Write every dirty counter to its Usage row, `batch_size` windows per
+    cache round trip. Returns the number of windows written. Only one
+    flush runs at a time; a concurrent call returns 0.
+    """
+    if not cache.add(FLUSH_LOCK_KEY, 1, timeout=FLUSH_LOCK_TTL):
+        return 0
+    try:
+        batch_size = batch_size or get_setting("USAGE_FLUSH_BATCH_SIZE")
+        end = cache.get(SEQ_CACHE_KEY) or 0
+        cursor = cache.get(CURSOR_CACHE_KEY) or 0
+        if cursor > end:  # the sequence was evicted and started over
+            cursor = 0
+        # Slots claimed but not yet filled at the last flush get one more look
+        retry = set(cache.get(RETRY_CACHE_KEY) or ())
+        slots = sorted(retry) + list(range(cursor + 1, end + 1))
+
+        written, missing = 0, []
+        for i in range(0, len(slots), batch_size):
+            batch_written, batch_missing = _flush_slots(slots[i:i + batch_size], retry)
+            written += batch_written
+            missing += batch_missing
+
+        cache.set(CURSOR_CACHE_KEY, end, timeout=None)
+        cache.set(RETRY_CACHE_KEY, missing, timeout=None)
+        return written
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
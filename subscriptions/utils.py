@@ -1,6 +1,9 @@
+from collections import namedtuple
 from decimal import Decimal, InvalidOperation
+from types import MappingProxyType
+from .cache import ProcessSnapshot
 from .constants import SUBSCRIPTIONS as CFG
-from .models import SubscriptionSetting
+from .models import SubscriptionSetting, PaymentProviderSetting
 
 def _ents():
     return CFG.get("ENTITLEMENTS", {}) or {}
@@ -23,6 +26,10 @@ def order_for_key(key: str) -> int:
     cfg = _ents().get(key) or {}
     return int(cfg.get("order", 9999))
 
+def window_for_key(key: str) -> str:
+    cfg = _ents().get(key) or {}
+    return cfg.get("window") or "period"
+
 def feature_keys_in_order(union_keys: set[str]) -> list[str]:
     cfg = _ents()
     configured = [k for k in cfg if k in union_keys]
@@ -106,6 +113,43 @@ def build_comparison(plans: list[dict]) -> dict:
 
     return comparison
 
+ProviderConfig = namedtuple("ProviderConfig", ["provider", "priority", "additional_settings"])
+
+_SETTING_FIELDS = tuple(f.attname for f in SubscriptionSetting._meta.concrete_fields)
+
+class SubscriptionSettingSnapshot(namedtuple("SubscriptionSettingSnapshot", _SETTING_FIELDS + ("providers",))):
+    """
+    Read-only copy of the global SubscriptionSetting with the same attribute
+    names, plus `providers`: its active PaymentProviderSettings by priority.
+    """
+    __slots__ = ()
+
+    def get_provider(self, name):
+        name = (name or "").lower()
+        for provider in self.providers:
+            if provider.provider == name:
+                return provider
+        return None
+
+def _build_setting_snapshot():
+    setting = SubscriptionSetting.objects.first()  # always one, enforced by validation
+    if setting is None:
+        return None
+    providers = tuple(
+        ProviderConfig(provider, priority, MappingProxyType(dict(additional or {})))
+        for provider, priority, additional in PaymentProviderSetting.objects.filter(
+            subscription_setting=setting, is_active=True
+        ).order_by("priority").values_list("provider", "priority", "additional_settings")
+    )
+    return SubscriptionSettingSnapshot(
+        *(getattr(setting, name) for name in _SETTING_FIELDS), providers
+    )
+
+subscription_setting_snapshot = ProcessSnapshot("subscriptions_setting_version", _build_setting_snapshot)
+
 def get_subscription_setting():
-    """Safely return the single global SubscriptionSetting instance."""
-    return SubscriptionSetting.objects.first()  # always one, enforced by validation
+    """
+    The global subscription settings as an immutable, process-cached
+    snapshot (None if none exist). Load the model itself to change them.
+    """
+    return subscription_setting_snapshot.get()
@@ -7,7 +7,7 @@ from decimal import Decimal
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from auth_core.views import PrivateUserViewMixin
-from subscriptions.payment_gateway.router import get_gateway, get_config
+from subscriptions.payment_gateway.router import get_gateway
 from .utils import get_subscription_setting
 from .models import Plan, Subscription, SubscriptionStatus
 
@@ -113,17 +113,7 @@ class StripeCheckoutView(PrivateUserViewMixin, APIView):
         # --- Proceed to Stripe checkout (only if all checks pass) ---
         provider = "stripe"
         gateway = get_gateway(provider)
-        config = get_config(provider)
-
-        if hasattr(gateway, "configure"):
-            gateway.configure(config)
-
-        session = gateway.create_checkout_session(
-            request.user,
-            plan,
-            config["success_url"],
-            config["cancel_url"],
-        )
+        session = gateway.create_checkout_session(request.user, plan)
 
         return Response(
             {
@@ -147,24 +137,18 @@ class StripeWebhookView(View):
 
     def post(self, request, *args, **kwargs):
         gateway = get_gateway(self.provider)
-        keys = get_config(self.provider)
 
         payload = request.body
         sig_header = request.META.get("HTTP_STRIPE_SIGNATURE")
 
         try:
             import stripe
-            event = stripe.Webhook.construct_event(
-                payload, sig_header, keys["webhook_secret"]
-            )
+            event = gateway.construct_event(payload, sig_header)
         except ValueError:
             return HttpResponse("Invalid payload", status=400)
         except stripe.error.SignatureVerificationError:
             return HttpResponse("Invalid signature", status=400)
 
-        if hasattr(gateway, "configure"):
-            gateway.configure(keys)
-
         try:
             gateway.handle_webhook(event)
         except Exception as e:
@@ -5,23 +5,25 @@ from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from auth_core.views import PrivateUserViewMixin, PublicViewMixin
-from .models import Plan, Subscription, SubscriptionSetting
-from .serializers import PlanSerializer, SubscriptionSerializer
+from .models import Plan, Subscription
+from .serializers import SubscriptionSerializer
 from .services import start_or_change_subscription, cancel_at_period_end, get_remaining_quota
-from .utils import build_comparison, get_subscription_setting
+from .utils import get_subscription_setting, subscription_setting_snapshot
+from .catalog import get_catalog_payload, plan_catalog
+from .http_cache import snapshot_response
 from .pagination import PlanPagination, SubscriptionPagination
-from subscriptions.payment_gateway.router import get_gateway, get_config
+from subscriptions.payment_gateway.router import get_gateway
 
 
-class PlanListView(PublicViewMixin, generics.ListAPIView):
+class PlanListView(PublicViewMixin, APIView):
     """
     GET /api/subscription/plans/
     Returns all active plans (non-paginated) with optional interval filtering.
+    Served from the process-cached plan catalog (see catalog.py) with a
+    strong ETag, If-None-Match support and a public Cache-Control.
     """
-    serializer_class = PlanSerializer
 
-    def get_queryset(self):
-        qs = Plan.objects.filter(is_active=True)
+    def get_intervals(self):
         raw = self.request.query_params.getlist("interval") or []
         if not raw:
             single = (self.request.query_params.get("interval") or "").strip()
@@ -34,37 +36,24 @@ class PlanListView(PublicViewMixin, generics.ListAPIView):
                 part = part.strip().lower()
                 if part and part != "all":
                     intervals.append(part)
+        return intervals
 
-        if intervals:
-            qs = qs.filter(interval__in=intervals)
-
-        qs = qs.prefetch_related("prices", "entitlements").order_by("sort_order", "name")
-
-        # print(f"\n[DEBUG] get_queryset() -> intervals={intervals or 'all'} | count={qs.count()}")
-        # for plan in qs:
-        #     print(f"   ↳ {plan.slug} ({plan.interval}) | active={plan.is_active}")
-
-        return qs
-
-    def get_serializer_context(self):
-        ctx = super().get_serializer_context()
-        ctx["currency"] = (self.request.query_params.get("currency") or "").strip().upper() or None
-        ctx["prices_mode"] = (self.request.query_params.get("prices") or "all").strip().lower()
-        return ctx
-
-    def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        plans = serializer.data
-        comparison = build_comparison(plans)
+    def get(self, request, *args, **kwargs):
+        intervals = sorted(set(self.get_intervals()))
+        currency = (request.query_params.get("currency") or "").strip().upper() or None
+        prices_mode = (request.query_params.get("prices") or "all").strip().lower()
+        if prices_mode not in ("none", "selected"):
+            prices_mode = "all"
 
         # Directly return the complete data (no pagination)
-        return Response({
-            "plans": plans,
-            "comparison": comparison
-        })
+        return snapshot_response(
+            request,
+            plan_catalog,
+            ("plans", ",".join(intervals), currency or "", prices_mode),
+            lambda catalog: get_catalog_payload(intervals, currency, prices_mode, catalog=catalog),
+        )
+
 
-    
 @method_decorator(csrf_exempt, name="dispatch")
 class MySubscriptionView(PrivateUserViewMixin, generics.ListAPIView):
     """
@@ -128,11 +117,7 @@ class SubscriptionUpgradeView(PrivateUserViewMixin, APIView):
             return Response({"error": "Selected plan is not an upgrade."}, status=400)
 
         try:
-            config = get_config(provider)
             gateway = get_gateway(provider)
-            if hasattr(gateway, "configure"):
-                gateway.configure(config)
-
             gateway.process_upgrade(subscription, plan)
             return Response({
                 "message": f"Subscription upgraded to {plan.name} successfully.",
@@ -176,11 +161,7 @@ class SubscriptionDowngradeView(PrivateUserViewMixin, APIView):
             return Response({"error": "Selected plan is not a downgrade."}, status=400)
 
         try:
-            config = get_config(provider)
             gateway = get_gateway(provider)
-            if hasattr(gateway, "configure"):
-                gateway.configure(config)
-
             gateway.process_downgrade(subscription, plan)
             return Response({
                 "message": f"Subscription downgraded to {plan.name} successfully.",
@@ -229,22 +210,14 @@ class SubscriptionCancelView(PrivateUserViewMixin, APIView):
             )
 
         try:
-            # Load gateway dynamically
-            config = get_config(provider)
+            # Shared, already-configured client for this provider
             gateway = get_gateway(provider)
-            if hasattr(gateway, "configure"):
-                gateway.configure(config)
 
             cancel_effect = settings.cancel_effect
             refund_policy = settings.refund_policy
 
             # Always check with gateway if still active remotely
-            if hasattr(gateway, "process_cancellation"):
-                gateway.process_cancellation(subscription, cancel_effect, refund_policy)
-            else:
-                # Fallback local cancellation
-                subscription.status = "canceled"
-                subscription.save(update_fields=["status"])
+            gateway.process_cancellation(subscription, cancel_effect, refund_policy)
 
             # Construct message
             if subscription.is_active:
@@ -276,19 +249,22 @@ class SubscriptionCancelView(PrivateUserViewMixin, APIView):
 class SubscriptionPolicyView(PublicViewMixin, APIView):
     """
     Returns the current subscription & payment policy in HTML format.
+    Cacheable: strong ETag from the settings version, honours If-None-Match.
     """
     def get(self, request, *args, **kwargs):
-        setting = SubscriptionSetting.objects.first()
+        setting = get_subscription_setting()
         if not setting or not setting.policy_text:
             return Response(
                 {"error": "Subscription policy not available."},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        return Response(
-            {
+        return snapshot_response(
+            request,
+            subscription_setting_snapshot,
+            ("policy",),
+            lambda setting: {
                 "last_updated": setting.updated_at,
                 "policy_html": setting.policy_text,
             },
-            status=status.HTTP_200_OK,
         )
\ No newline at end of file
@@ -1,5 +1,6 @@
+from django.contrib.auth.models import User
 from rest_framework import authentication, exceptions
-from .models import UserKeyPair
+from .key_cache import get_key_record
 
 class PublicKeyAuthentication(authentication.BaseAuthentication):
     """
@@ -10,12 +11,13 @@ class PublicKeyAuthentication(authentication.BaseAuthentication):
         if not public_key:
             return None
 
-        try:
-            key_pair = UserKeyPair.objects.get(revoked=False)
-        except UserKeyPair.DoesNotExist:
+        record = get_key_record(public_key)
+        if record is None:
             raise exceptions.AuthenticationFailed("Invalid or revoked public key.")
 
-        if public_key != key_pair.public_key:
-            raise exceptions.AuthenticationFailed("Invalid or outdated public key.")
+        try:
+            user = User.objects.get(pk=record.user_id, is_active=True)
+        except User.DoesNotExist:
+            raise exceptions.AuthenticationFailed("Invalid or revoked public key.")
 
-        return (key_pair.user, None)
+        return (user, record)
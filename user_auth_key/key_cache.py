@@ -0,0 +1,75 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from django.conf import settings
+from django.core.cache import cache
+from .models import UserKeyPair
+
+# What the external authentication needs from a key pair, without the model instance
+KeyRecord = namedtuple("KeyRecord", ["id", "user_id", "private_key"])
+
+VERSION_CACHE_KEY = "user_key_pair_version"
+
+_lock = threading.Lock()
+_entries = OrderedDict()  # public_key -> (KeyRecord, expires_at, version)
+
+def _max_size():
+    return getattr(settings, "USER_KEY_CACHE_SIZE", 1024)
+
+def _ttl():
+    return getattr(settings, "USER_KEY_CACHE_TTL", 300)
+
+def _current_version():
+    """
+    Shared version counter: bumped on every key pair change so entries
+    held by other processes are dropped on their next lookup.
+    """
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        version = 1
+        cache.add(VERSION_CACHE_KEY, version, timeout=None)
+    return version
+
+def invalidate_key_cache():
+    with _lock:
+        _entries.clear()
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, 2, timeout=None)
+
+def get_key_record(public_key):
+    """
+    Resolve an active key pair by public key.
+    Returns a KeyRecord, or None if the key is unknown or revoked.
+    """
+    if not public_key:
+        return None
+
+    version = _current_version()
+    now = time.monotonic()
+
+    with _lock:
+        hit = _entries.get(public_key)
+        if hit:
+            record, expires_at, cached_version = hit
+            if expires_at > now and cached_version == version:
+                _entries.move_to_end(public_key)
+                return record
+            del _entries[public_key]
+
+    row = (
+        UserKeyPair.objects.filter(public_key=public_key, revoked=False)
+        .values_list("id", "user_id", "private_key")
+        .first()
+    )
+    if row is None:
+        return None
+
+    record = KeyRecord(*row)
+    with _lock:
+        _entries[public_key] = (record, now + _ttl(), version)
+        _entries.move_to_end(public_key)
+        while len(_entries) > _max_size():
+            _entries.popitem(last=False)
+    return record
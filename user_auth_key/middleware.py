@@ -1,8 +1,8 @@
-import hmac
-import hashlib
 import time
+from django.contrib.auth.models import User
 from rest_framework import authentication, exceptions
-from .models import UserKeyPair
+from .key_cache import get_key_record
+from .signing import SIGNATURE_VERSION_HEADER, LEGACY_VERSION, SUPPORTED_VERSIONS, verify_signature
 
 class UserAuthKeyHMACAuthentication(authentication.BaseAuthentication):
     """
@@ -10,6 +10,8 @@ class UserAuthKeyHMACAuthentication(authentication.BaseAuthentication):
     - X-PUBLIC-KEY header
     - X-TIMESTAMP header
     - X-SIGNATURE header (HMAC-SHA256 of timestamp + body using private key)
+    - X-SIGNATURE-VERSION header (optional): "1" (default) signs "{timestamp}:" + body,
+      "2" also covers the method and full path (see signing.py)
     """
     TIMEOUT = 300  # 5 minutes
 
@@ -21,6 +23,10 @@ class UserAuthKeyHMACAuthentication(authentication.BaseAuthentication):
         if not all([public_key, timestamp, signature]):
             raise exceptions.AuthenticationFailed("Missing required headers")
 
+        version = request.headers.get(SIGNATURE_VERSION_HEADER) or LEGACY_VERSION
+        if version not in SUPPORTED_VERSIONS:
+            raise exceptions.AuthenticationFailed("Unsupported signature version")
+
         # Validate timestamp (prevent replay attacks)
         try:
             ts = int(timestamp)
@@ -31,25 +37,27 @@ class UserAuthKeyHMACAuthentication(authentication.BaseAuthentication):
         if abs(now - ts) > self.TIMEOUT:
             raise exceptions.AuthenticationFailed("Request expired")
 
-        # Find the user by derived public key
-        try:
-            key_pair = UserKeyPair.objects.get(revoked=False)
-        except UserKeyPair.DoesNotExist:
-            raise exceptions.AuthenticationFailed("Invalid public key")
-
-        if key_pair.public_key != public_key:
+        # Find the key pair by its persisted public key (indexed, cached)
+        record = get_key_record(public_key)
+        if record is None:
             raise exceptions.AuthenticationFailed("Invalid public key")
 
-        # Compute expected HMAC signature
-        body = request.body or b""
-        message = f"{timestamp}:{body.decode()}".encode()
-        expected_signature = hmac.new(
-            key_pair.private_key.encode(),
-            message,
-            hashlib.sha256
-        ).hexdigest()
-
-        if not hmac.compare_digest(expected_signature, signature):
+        # Hash the raw body bytes directly (no decode/re-encode copies)
+        if not verify_signature(
+            signature,
+            record.private_key,
+            timestamp,
+            request.body or b"",
+            method=request.method,
+            path=request.get_full_path(),
+            version=version,
+        ):
             raise exceptions.AuthenticationFailed("Invalid signature")
 
-        return (key_pair.user, None)
+        try:
+            user = User.objects.get(pk=record.user_id, is_active=True)
+        except User.DoesNotExist:
+            raise exceptions.AuthenticationFailed("Invalid public key")
+
+        # The KeyRecord becomes request.auth for the throttle and views
+        return (user, record)
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.12 on 2026-10-19 07:12
+
+import hashlib
+from django.db import migrations, models
+
+
+def populate_public_keys(apps, schema_editor):
+    UserKeyPair = apps.get_model("user_auth_key", "UserKeyPair")
+    for key_pair in UserKeyPair.objects.only("id", "private_key").iterator():
+        digest = hashlib.sha256(key_pair.private_key.encode()).hexdigest()
+        UserKeyPair.objects.filter(pk=key_pair.pk).update(public_key=f"public_{digest}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_auth_key', '0004_alter_userkeypair_private_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userkeypair',
+            name='public_key',
+            field=models.CharField(editable=False, max_length=71, null=True),
+        ),
+        migrations.RunPython(populate_public_keys, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='userkeypair',
+            name='public_key',
+            field=models.CharField(editable=False, max_length=71, unique=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.12 on 2026-10-19 06:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_auth_key', '0005_userkeypair_public_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='keyregenerationlog',
+            index=models.Index(fields=['user', 'timestamp'], name='keyregen_user_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='privatekeyaccesslog',
+            index=models.Index(fields=['user', 'action', 'success', 'timestamp'], name='keyaccess_user_action_ts_idx'),
+        ),
+    ]
@@ -1,10 +1,8 @@
 from rest_framework import permissions
-from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.exceptions import AuthenticationFailed
-from .authentication import PublicKeyAuthentication
+from rest_framework.exceptions import PermissionDenied
 from .middleware import UserAuthKeyHMACAuthentication
-from .throttling import ExternalPlatformRateThrottle
+from .throttling import ExternalPlatformRateThrottle, PlanQuotaThrottle
 
 class ExternalPlatformPrivateUserViewMixin(APIView):
     """
@@ -12,31 +10,37 @@ class ExternalPlatformPrivateUserViewMixin(APIView):
     Combines:
       - Public key check
       - HMAC verification using user's private key
-      - Throttling per public key
+      - Throttling per key pair, plus the plan's daily/monthly API quotas
+        (only requests the per-key throttle lets through are charged to the plan)
+
+    Authentication runs once, inside DRF's normal pipeline. The HMAC class
+    resolves the key pair by public key, so a separate public-key pass is
+    not needed; the resolved KeyRecord is left on `request.auth` for the
+    throttle and the view to reuse.
     """
 
-    authentication_classes = [PublicKeyAuthentication, UserAuthKeyHMACAuthentication]
+    authentication_classes = [UserAuthKeyHMACAuthentication]
     permission_classes = [permissions.IsAuthenticated]
-    throttle_classes = [ExternalPlatformRateThrottle]
-
-    def dispatch(self, *args, **kwargs):
-        # Ensure public key exists
-        public_key = self.request.headers.get("X-PUBLIC-KEY")
-        if not public_key:
-            return Response({"detail": "Public key missing."}, status=403)
+    throttle_classes = [ExternalPlatformRateThrottle, PlanQuotaThrottle]
 
-        # Authenticate using both authentication classes
-        user = None
-        for auth_class in self.authentication_classes:
-            try:
-                user_auth_result = auth_class().authenticate(self.request)
-                if user_auth_result:
-                    user, _ = user_auth_result
-            except AuthenticationFailed as e:
-                return Response({"detail": str(e)}, status=403)
+    def initial(self, request, *args, **kwargs):
+        # Ensure public key exists before doing any authentication work
+        if not request.headers.get("X-PUBLIC-KEY"):
+            raise PermissionDenied("Public key missing.")
+        super().initial(request, *args, **kwargs)
 
-        if not user:
-            return Response({"detail": "Authentication failed."}, status=403)
+    def check_throttles(self, request):
+        # DRF asks every throttle even after one refuses; stop at the first
+        # refusal so a rejected request never spends the caller's plan quota
+        for throttle in self.get_throttles():
+            if not throttle.allow_request(request, self):
+                self.throttled(request, throttle.wait())
 
-        self.request.user = user
-        return super().dispatch(*args, **kwargs)
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        quota = getattr(request, "rate_limit", None)
+        if quota:
+            response["X-RateLimit-Limit"] = str(quota["limit"])
+            response["X-RateLimit-Remaining"] = str(quota["remaining"])
+            response["X-RateLimit-Reset"] = str(int(quota["reset"].timestamp()))
+        return response
@@ -8,22 +8,40 @@ class KeyRegenerationLog(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "timestamp"], name="keyregen_user_ts_idx"),
+        ]
+
     def __str__(self):
         return f"Key regeneration for {self.user.username} at {self.timestamp}"
 
+def generate_private_key():
+    return f"private_{secrets.token_hex(32)}"
+
+def derive_public_key(private_key):
+    """
+    One-way deterministic conversion from private key
+    """
+    hash_bytes = hashlib.sha256(private_key.encode()).hexdigest()
+    return f"public_{hash_bytes}"
+
 class UserKeyPair(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='key_pair')
     private_key = models.CharField(max_length=128, unique=True)
+    # Persisted digest of private_key so external requests resolve with one indexed lookup
+    public_key = models.CharField(max_length=71, unique=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     revoked = models.BooleanField(default=False)
 
-    @property
-    def public_key(self):
-        """
-        One-way deterministic conversion from private key
-        """
-        hash_bytes = hashlib.sha256(self.private_key.encode()).hexdigest()
-        return f"public_{hash_bytes}"
+    def save(self, *args, **kwargs):
+        if not self.private_key:
+            self.private_key = generate_private_key()
+        self.public_key = derive_public_key(self.private_key)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "private_key" in update_fields:
+            kwargs["update_fields"] = set(update_fields) | {"public_key"}
+        super().save(*args, **kwargs)
     
     
     @property
@@ -43,7 +61,7 @@ class UserKeyPair(models.Model):
             raise ValueError(message)
 
         # Otherwise regenerate
-        self.private_key = f"private_{secrets.token_hex(32)}"
+        self.private_key = generate_private_key()
         self.revoked = False
         self.save()
         return self.public_key
@@ -61,5 +79,11 @@ class PrivateKeyAccessLog(models.Model):
     action = models.CharField(max_length=50, choices=ACTION_CHOICES)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Covers the failed-attempt window query used to seed the cache
+            models.Index(fields=["user", "action", "success", "timestamp"], name="keyaccess_user_action_ts_idx"),
+        ]
+
     def __str__(self):
         return f"{self.user} - {self.action} - {'Success' if self.success else 'Failed'}"
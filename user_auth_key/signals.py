@@ -1,17 +1,36 @@
-import secrets
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import UserKeyPair, KeyRegenerationLog
+from .models import UserKeyPair, KeyRegenerationLog, PrivateKeyAccessLog, generate_private_key
+from .key_cache import invalidate_key_cache
+from .utils import record_failed_attempt, record_regeneration
 
 @receiver(post_save, sender=User)
 def create_user_key_pair(sender, instance, created, **kwargs):
     if created:
-        private_key = f"private_{secrets.token_hex(32)}"
-        UserKeyPair.objects.create(user=instance, private_key=private_key)
+        UserKeyPair.objects.create(user=instance, private_key=generate_private_key())
+
+@receiver(post_save, sender=UserKeyPair)
+@receiver(post_delete, sender=UserKeyPair)
+def invalidate_cached_key_pairs(sender, instance, **kwargs):
+    # Regeneration or revocation must stop the old public key working everywhere.
+    # On commit, so no process can re-cache the old row under the new version.
+    transaction.on_commit(invalidate_key_cache)
 
 @receiver(post_save, sender=UserKeyPair)
 def log_key_regeneration(sender, instance, created, **kwargs):
     # Log regeneration only when the private key changes (not on initial create).
     if not created:  # avoid logging the initial key at user creation
-        KeyRegenerationLog.objects.create(user=instance.user)
\ No newline at end of file
+        KeyRegenerationLog.objects.create(user=instance.user)
+
+@receiver(post_save, sender=PrivateKeyAccessLog)
+def count_failed_key_access(sender, instance, created, **kwargs):
+    # Keep the cached failed-attempt window in step with the durable log
+    if created and not instance.success:
+        record_failed_attempt(instance)
+
+@receiver(post_save, sender=KeyRegenerationLog)
+def count_key_regeneration(sender, instance, created, **kwargs):
+    if created:
+        record_regeneration(instance)
@@ -0,0 +1,41 @@
+import hmac
+import hashlib
+
+SIGNATURE_VERSION_HEADER = "X-SIGNATURE-VERSION"
+LEGACY_VERSION = "1"
+CANONICAL_VERSION = "2"
+SUPPORTED_VERSIONS = (LEGACY_VERSION, CANONICAL_VERSION)
+
+CHUNK_SIZE = 64 * 1024
+
+def signing_prefix(timestamp, method=None, path=None, version=LEGACY_VERSION):
+    """
+    Bytes hashed before the body.
+      v1 (legacy): "{timestamp}:"
+      v2 (canonical): "v2\\n{METHOD}\\n{path}\\n{timestamp}\\n"
+    """
+    if version == CANONICAL_VERSION:
+        return f"v2\n{(method or '').upper()}\n{path or ''}\n{timestamp}\n".encode()
+    return f"{timestamp}:".encode()
+
+def compute_signature(private_key, timestamp, body=b"", method=None, path=None, version=LEGACY_VERSION):
+    """
+    HMAC-SHA256 hex digest of prefix + raw body.
+    `body` may be bytes or an iterable of byte chunks (e.g. an upload stream);
+    bytes are fed through a memoryview so the body is never copied or decoded.
+    """
+    mac = hmac.new(private_key.encode(), digestmod=hashlib.sha256)
+    mac.update(signing_prefix(timestamp, method, path, version))
+
+    if isinstance(body, (bytes, bytearray, memoryview)):
+        view = memoryview(body)
+        for start in range(0, len(view), CHUNK_SIZE):
+            mac.update(view[start:start + CHUNK_SIZE])
+    else:
+        for chunk in body:
+            mac.update(chunk)
+    return mac.hexdigest()
+
+def verify_signature(signature, private_key, timestamp, body=b"", method=None, path=None, version=LEGACY_VERSION):
+    expected = compute_signature(private_key, timestamp, body, method, path, version)
+    return hmac.compare_digest(expected, signature or "")
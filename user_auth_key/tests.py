@@ -0,0 +1,233 @@
+import hashlib
+import hmac
+import time
+from unittest.mock import patch
+from django.contrib.auth.models import User
+from datetime import timedelta
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+from user_auth_key.key_cache import get_key_record
+from user_auth_key.models import derive_public_key, PrivateKeyAccessLog
+from user_auth_key.utils import too_many_failed_attempts, too_many_regenerations
+from user_auth_key.signing import compute_signature
+from subscriptions.models import Plan, Entitlement, Subscription, Usage
+from subscriptions.services import get_remaining_quota
+from subscriptions.usage_counters import flush_usage_counters
+from user_profile.external_views import ExternalUserProfileView, ExternalBillingAddressView
+
+
+class PublicKeyLookupTest(TestCase):
+
+    def setUp(self):
+        self.alice = User.objects.create_user("alice", "alice@example.com", "pw")
+        self.bob = User.objects.create_user("bob", "bob@example.com", "pw")
+
+    def test_public_key_is_persisted_and_resolves_per_user(self):
+        for user in (self.alice, self.bob):
+            key_pair = user.key_pair
+            self.assertEqual(key_pair.public_key, derive_public_key(key_pair.private_key))
+            self.assertEqual(get_key_record(key_pair.public_key).user_id, user.pk)
+
+    def test_cached_lookup_skips_the_database(self):
+        public_key = self.alice.key_pair.public_key
+        get_key_record(public_key)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_key_record(public_key).user_id, self.alice.pk)
+
+    def test_regeneration_and_revocation_invalidate_the_cache(self):
+        key_pair = self.alice.key_pair
+        old_public_key = key_pair.public_key
+        get_key_record(old_public_key)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            new_public_key = key_pair.regenerate_keys()
+            # Not before commit: other processes would re-cache the old row
+            self.assertEqual(get_key_record(old_public_key).user_id, self.alice.pk)
+        self.assertTrue(callbacks)
+        self.assertIsNone(get_key_record(old_public_key))
+        self.assertEqual(get_key_record(new_public_key).user_id, self.alice.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            key_pair.revoked = True
+            key_pair.save()
+        self.assertIsNone(get_key_record(new_public_key))
+
+
+class ExternalRequestTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user("alice", "alice@example.com", "pw")
+        self.key_pair = self.user.key_pair
+        self.view = ExternalUserProfileView.as_view()
+        self.factory = APIRequestFactory()
+
+    def signed_get(self, private_key=None):
+        timestamp = str(int(time.time()))
+        signature = hmac.new(
+            (private_key or self.key_pair.private_key).encode(),
+            f"{timestamp}:".encode(),
+            hashlib.sha256,
+        ).hexdigest()
+        return self.factory.get(
+            "/api/user/profile/",
+            HTTP_X_PUBLIC_KEY=self.key_pair.public_key,
+            HTTP_X_TIMESTAMP=timestamp,
+            HTTP_X_SIGNATURE=signature,
+        )
+
+    def signed_post_v2(self, path, body, signed_path=None):
+        timestamp = str(int(time.time()))
+        signature = compute_signature(
+            self.key_pair.private_key, timestamp, body,
+            method="POST", path=signed_path or path, version="2",
+        )
+        return self.factory.post(
+            path, body, content_type="application/json",
+            HTTP_X_PUBLIC_KEY=self.key_pair.public_key,
+            HTTP_X_TIMESTAMP=timestamp,
+            HTTP_X_SIGNATURE=signature,
+            HTTP_X_SIGNATURE_VERSION="2",
+        )
+
+
+
+class ExternalPlatformAuthenticationTest(ExternalRequestTestCase):
+
+    def test_one_key_lookup_and_one_hmac_per_request(self):
+        request = self.signed_get()
+        with patch("user_auth_key.middleware.get_key_record", wraps=get_key_record) as lookup, \
+                patch("hmac.new", wraps=hmac.new) as digest:
+            response = self.view(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["username"], "alice")
+        self.assertEqual(lookup.call_count, 1)
+        self.assertEqual(digest.call_count, 1)
+
+    def test_missing_public_key_and_bad_signature_are_rejected(self):
+        response = self.view(self.factory.get("/api/user/profile/"))
+        self.assertEqual(response.status_code, 403)
+
+        response = self.view(self.signed_get(private_key="private_wrong"))
+        self.assertEqual(response.status_code, 403)
+
+    def test_canonical_signature_covers_method_and_path(self):
+        view = ExternalBillingAddressView.as_view()
+        body = b'{"address": "1 Main St", "city": "Lagos", "country": "NG"}'
+
+        response = view(self.signed_post_v2("/api/billing_address/", body))
+        self.assertNotEqual(response.status_code, 403)
+
+        # Signature made for another path must not verify here
+        response = view(self.signed_post_v2("/api/billing_address/", body, signed_path="/api/user/profile/"))
+        self.assertEqual(response.status_code, 403)
+
+    def test_streamed_and_legacy_signatures_match(self):
+        body = b"x" * 200_000
+        legacy = hmac.new(b"private_k", b"123:" + body, hashlib.sha256).hexdigest()
+        self.assertEqual(compute_signature("private_k", "123", body), legacy)
+        self.assertEqual(compute_signature("private_k", "123", [body[:7], body[7:]]), legacy)
+
+
+class PlanQuotaThrottleTest(ExternalRequestTestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        plan = Plan.objects.create(slug="starter", name="Starter")
+        Entitlement.objects.create(plan=plan, key="api_calls_per_day", enabled=True, limit_int=2)
+        Entitlement.objects.create(plan=plan, key="api_calls_per_month", enabled=True, limit_int=100)
+        Subscription.objects.create(
+            user=self.user, plan=plan, current_period_end=timezone.now() + timedelta(days=30)
+        )
+
+    def test_daily_quota_is_enforced_with_headers(self):
+        first = self.view(self.signed_get())
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first["X-RateLimit-Limit"], "2")
+        self.assertEqual(first["X-RateLimit-Remaining"], "1")
+
+        self.assertEqual(self.view(self.signed_get()).status_code, 200)
+
+        request = self.signed_get()
+        with CaptureQueriesContext(connection) as ctx:
+            rejected = self.view(request)
+        self.assertEqual(rejected.status_code, 429)
+        self.assertEqual(rejected["X-RateLimit-Remaining"], "0")
+        self.assertIn("Retry-After", rejected)
+        self.assertFalse([q for q in ctx.captured_queries if not q["sql"].startswith("SELECT")])
+
+
+    def test_throttle_and_remaining_quota_share_the_usage_buckets(self):
+        for _ in range(2):
+            self.assertEqual(self.view(self.signed_get()).status_code, 200)
+        self.assertEqual(self.view(self.signed_get()).status_code, 429)
+
+        self.assertEqual(get_remaining_quota(self.user, "api_calls_per_day"), 0)
+        # The rejected request gave its monthly increment back
+        self.assertEqual(get_remaining_quota(self.user, "api_calls_per_month"), 98)
+        flush_usage_counters()
+        self.assertEqual(
+            dict(Usage.objects.values_list("key", "used")),
+            {"api_calls_per_day": 2, "api_calls_per_month": 2},
+        )
+
+
+    def test_burst_rejections_do_not_spend_the_plan_quota(self):
+        self.assertEqual(self.view(self.signed_get()).status_code, 200)
+        # The per-key burst limit is used up
+        cache.set(f"throttle_key_pair_{self.key_pair.pk}", [timezone.now()] * 100, timeout=60)
+
+        self.assertEqual(self.view(self.signed_get()).status_code, 429)
+        self.assertEqual(get_remaining_quota(self.user, "api_calls_per_day"), 1)
+        self.assertEqual(get_remaining_quota(self.user, "api_calls_per_month"), 99)
+
+
+class FailedAttemptCounterTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("alice", "alice@example.com", "pw")
+
+    def fail(self):
+        PrivateKeyAccessLog.objects.create(user=self.user, success=False, action="show_private_key")
+
+    def test_counts_come_from_the_cache_once_seeded(self):
+        self.fail()
+        self.assertFalse(too_many_failed_attempts(self.user, action="show_private_key"))
+
+        for _ in range(4):
+            self.fail()
+        with self.assertNumQueries(0):
+            self.assertTrue(too_many_failed_attempts(self.user, action="show_private_key"))
+
+    def test_reseeding_does_not_count_twice(self):
+        for _ in range(2):
+            self.fail()
+        self.assertFalse(too_many_failed_attempts(self.user, action="show_private_key"))
+        for _ in range(2):
+            self.fail()
+
+        # The seeded marker goes; the buckets holding the counts are still there
+        cache.delete(f"key_access_failures_{self.user.pk}_show_private_key_seeded")
+        self.assertFalse(too_many_failed_attempts(self.user, action="show_private_key", limit=5))
+        self.assertTrue(too_many_failed_attempts(self.user, action="show_private_key", limit=4))
+
+    def test_regeneration_limit(self):
+        key_pair = self.user.key_pair
+        for _ in range(2):
+            key_pair.regenerate_keys()
+        with self.assertNumQueries(0):
+            self.assertEqual(too_many_regenerations(self.user), (False, None))
+
+        key_pair.regenerate_keys()
+        with self.assertNumQueries(1):  # the hit is confirmed from the log
+            exceeded, message = too_many_regenerations(self.user)
+        self.assertTrue(exceeded)
+        self.assertIn("regeneration limit", message)
+        # Counted from the first regeneration, not the end of its bucket
+        self.assertIn("Please try again in 23h 59m", message)
@@ -3,13 +3,15 @@ from rest_framework.exceptions import Throttled
 from django.core.cache import cache
 from django.utils import timezone
 from datetime import timedelta
-from .models import UserKeyPair
+from subscriptions.services import spend_quotas, release_quotas
 
 class ExternalPlatformRateThrottle(BaseThrottle):
     """
-    Rate limit per public key for external platform requests.
+    Rate limit per key pair for external platform requests.
+    Keys off the KeyRecord authentication left on request.auth, so it never
+    repeats the key lookup.
     """
-    cache_format = 'throttle_public_key_{key}'
+    cache_format = 'throttle_key_pair_{key}'
 
     def __init__(self, rate_limit=100, rate_period=timedelta(minutes=1)):
         self.rate_limit = rate_limit
@@ -17,12 +19,13 @@ class ExternalPlatformRateThrottle(BaseThrottle):
         self._retry_after = None
 
     def get_cache_key(self, request):
-        public_key = request.headers.get("X-PUBLIC-KEY")
-        if not public_key:
+        key_pair_id = getattr(request.auth, "id", None)
+        if key_pair_id is None:
             return None
-        return self.cache_format.format(key=public_key)
+        return self.cache_format.format(key=key_pair_id)
 
-    def allow_request(self, request, view):
+    def allow_request(self, request, view, count=1):
+        """Admit `count` requests at once (a batch), or none of them."""
         cache_key = self.get_cache_key(request)
         if not cache_key:
             return False
@@ -32,17 +35,75 @@ class ExternalPlatformRateThrottle(BaseThrottle):
         window_start = now - self.rate_period
         history = [ts for ts in history if ts > window_start]
 
-        if len(history) >= self.rate_limit:
-            # Rate limit exceeded
-            self._retry_after = (history[0] + self.rate_period - now).total_seconds()
+        if len(history) + count > self.rate_limit:
+            # Rate limit exceeded: wait until enough of the window has expired
+            freed = min(len(history) + count - self.rate_limit, len(history))
+            oldest = history[freed - 1] if freed else now
+            self._retry_after = (oldest + self.rate_period - now).total_seconds()
             return False
 
-        # Add current request
-        history.append(now)
+        # Add current request(s)
+        history.extend([now] * count)
         cache.set(cache_key, history, timeout=int(self.rate_period.total_seconds()))
         self._retry_after = None
         return True
 
+    def release(self, request, count=1):
+        """Take back the last `count` requests admitted (a batch refused elsewhere)."""
+        cache_key = self.get_cache_key(request)
+        history = cache.get(cache_key) if cache_key else None
+        if history:
+            cache.set(cache_key, history[:-count], timeout=int(self.rate_period.total_seconds()))
+
+    def wait(self):
+        return self._retry_after
+
+
+class PlanQuotaThrottle(BaseThrottle):
+    """
+    Enforce the caller's plan `api_calls_per_day` / `api_calls_per_month`
+    entitlements. Each request is spent with subscriptions.services.spend_quotas
+    into the same usage buckets get_remaining_quota reads, so
+    RemainingQuotaView reports what this throttle enforces. With the keys in
+    USAGE_WRITE_BEHIND_KEYS (the default) a request costs cache round trips
+    only and rejected ones write nothing at all.
+    Users whose plan does not define a key are not limited on it.
+    Quota state is left on `request.rate_limit` for the response headers.
+    """
+    keys = ("api_calls_per_day", "api_calls_per_month")
+
+    def __init__(self):
+        self._retry_after = None
+
+    def allow_request(self, request, view, count=1):
+        """Spend `count` requests at once (a batch), or none of them."""
+        user = request.user
+        if not user or not user.is_authenticated:
+            return True
+
+        allowed, states = spend_quotas(user.id, self.keys, count)
+        now = timezone.now()
+        if not allowed:
+            # The quota that frees up last decides when a retry can succeed
+            state = max(states, key=lambda s: s.reset)
+            self._retry_after = (state.reset - now).total_seconds()
+            request.rate_limit = {"limit": state.limit, "remaining": 0, "reset": state.reset}
+            return False
+
+        if states:
+            state = min(states, key=lambda s: s.limit - s.used)
+            request.rate_limit = {
+                "limit": state.limit, "remaining": max(state.limit - state.used, 0), "reset": state.reset,
+            }
+        self._retry_after = None
+        return True
+
+    def release(self, request, count=1):
+        """Give back `count` requests spent by allow_request."""
+        user = request.user
+        if user and user.is_authenticated:
+            release_quotas(user.id, self.keys, count)
+
     def wait(self):
         return self._retry_after
 
@@ -1,10 +1,110 @@
+from collections import Counter
 from datetime import timedelta
+from django.core.cache import cache
 from django.utils import timezone
 from .models import PrivateKeyAccessLog, KeyRegenerationLog
 
+# Windows kept in the cache; checks over longer windows fall back to the DB
+FAILED_ATTEMPT_WINDOW_MINUTES = 15
+REGENERATION_PERIOD_HOURS = 24
+
+# Counts are kept per fixed bucket; a window check sums the buckets it overlaps
+FAILED_ATTEMPT_BUCKET = timedelta(minutes=1)
+REGENERATION_BUCKET = timedelta(hours=1)
+
+FAILED_ATTEMPTS_CACHE_FORMAT = "key_access_failures_{user_id}_{action}"
+REGENERATIONS_CACHE_FORMAT = "key_regenerations_{user_id}"
+
+def _bucket_start(ts, size):
+    step = int(size.total_seconds())
+    return int(ts.timestamp()) // step * step
+
+def _incr(cache_key, timeout, amount=1):
+    cache.add(cache_key, 0, timeout=timeout)
+    try:
+        cache.incr(cache_key, amount)
+    except ValueError:  # expired between add() and incr()
+        cache.set(cache_key, amount, timeout=timeout)
+
+def _timeouts(retention, size):
+    """
+    (bucket, marker) timeouts. A bucket outlives its window; the seeded
+    marker outlives every bucket, so a reseed never finds one still holding
+    the counts it is about to load.
+    """
+    bucket = int((retention + size).total_seconds())
+    return bucket, bucket + int(size.total_seconds())
+
+def _seed(prefix, retention, size, load):
+    """
+    Fill the buckets from the DB once (an indexed range scan). Every bucket
+    in the window is overwritten, so a reseed can never count a row twice.
+    """
+    bucket_timeout, marker_timeout = _timeouts(retention, size)
+    if not cache.add(f"{prefix}_seeded", 1, timeout=marker_timeout):
+        return
+    now = timezone.now()
+    counts = Counter(_bucket_start(ts, size) for ts in load(now - retention))
+    step = int(size.total_seconds())
+    first, last = _bucket_start(now - retention, size), _bucket_start(now, size)
+    cache.set_many(
+        {f"{prefix}_{start}": counts.get(start, 0) for start in range(first, last + 1, step)},
+        timeout=bucket_timeout,
+    )
+
+def _bucket_counts(prefix, retention, size, load, since):
+    """{bucket start: count} for the non-empty buckets overlapping [since, now]."""
+    _seed(prefix, retention, size, load)
+    step = int(size.total_seconds())
+    first, last = _bucket_start(since, size), _bucket_start(timezone.now(), size)
+    keys = {f"{prefix}_{start}": start for start in range(first, last + 1, step)}
+    return {keys[k]: count for k, count in cache.get_many(list(keys)).items() if count}
+
+def _record(prefix, retention, size, timestamp):
+    """
+    Count a new log row with one atomic incr, extending the seeded marker
+    past the bucket's lifetime. Before the first read seeds the buckets
+    nothing is counted: that seed reads this row from the DB.
+    """
+    bucket_timeout, marker_timeout = _timeouts(retention, size)
+    if not cache.touch(f"{prefix}_seeded", marker_timeout):
+        return
+    _incr(f"{prefix}_{_bucket_start(timestamp, size)}", bucket_timeout)
+
+def record_failed_attempt(log):
+    """Called when a failed PrivateKeyAccessLog row is written."""
+    _record(
+        FAILED_ATTEMPTS_CACHE_FORMAT.format(user_id=log.user_id, action=log.action),
+        timedelta(minutes=FAILED_ATTEMPT_WINDOW_MINUTES),
+        FAILED_ATTEMPT_BUCKET,
+        log.timestamp,
+    )
+
+def record_regeneration(log):
+    """Called when a KeyRegenerationLog row is written."""
+    _record(
+        REGENERATIONS_CACHE_FORMAT.format(user_id=log.user_id),
+        timedelta(hours=REGENERATION_PERIOD_HOURS),
+        REGENERATION_BUCKET,
+        log.timestamp,
+    )
+
 def too_many_failed_attempts(user, action=None, limit=5, window_minutes=15):
     # Check if a user has too many failed attempts within the given time window.
     cutoff = timezone.now() - timedelta(minutes=window_minutes)
+
+    if action and window_minutes <= FAILED_ATTEMPT_WINDOW_MINUTES:
+        counts = _bucket_counts(
+            FAILED_ATTEMPTS_CACHE_FORMAT.format(user_id=user.pk, action=action),
+            timedelta(minutes=FAILED_ATTEMPT_WINDOW_MINUTES),
+            FAILED_ATTEMPT_BUCKET,
+            lambda since: PrivateKeyAccessLog.objects.filter(
+                user=user, action=action, success=False, timestamp__gt=since
+            ).values_list("timestamp", flat=True),
+            cutoff,
+        )
+        return sum(counts.values()) >= limit
+
     qs = PrivateKeyAccessLog.objects.filter(
         user=user, success=False, timestamp__gte=cutoff
     )
@@ -17,17 +117,31 @@ def too_many_regenerations(user, limit=3, period_hours=24):
     # Check if a user has exceeded the allowed number of key regenerations
     # within the given time period.
     since = timezone.now() - timedelta(hours=period_hours)
-    logs = KeyRegenerationLog.objects.filter(
-        user=user,
-        timestamp__gte=since
-    ).order_by("timestamp")
 
-    regen_count = logs.count()
+    if period_hours <= REGENERATION_PERIOD_HOURS:
+        counts = _bucket_counts(
+            REGENERATIONS_CACHE_FORMAT.format(user_id=user.pk),
+            timedelta(hours=REGENERATION_PERIOD_HOURS),
+            REGENERATION_BUCKET,
+            lambda cutoff: KeyRegenerationLog.objects.filter(
+                user=user, timestamp__gt=cutoff
+            ).values_list("timestamp", flat=True),
+            since,
+        )
+        # The oldest bucket may reach past the window, so the buckets can
+        # only clear a user; a hit is confirmed from the real timestamps
+        if sum(counts.values()) < limit:
+            return False, None
+
+    timestamps = list(
+        KeyRegenerationLog.objects.filter(user=user, timestamp__gte=since)
+        .order_by("timestamp")
+        .values_list("timestamp", flat=True)[:limit]
+    )
 
-    if regen_count >= limit:
+    if len(timestamps) >= limit:
         # Find when the first regeneration in this window will expire
-        earliest_log = logs.first()
-        next_allowed_time = earliest_log.timestamp + timedelta(hours=period_hours)
+        next_allowed_time = timestamps[0] + timedelta(hours=period_hours)
         remaining = next_allowed_time - timezone.now()
 
         hours, remainder = divmod(int(remaining.total_seconds()), 3600)
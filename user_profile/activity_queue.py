@@ -0,0 +1,115 @@
+import atexit
+import queue
+import threading
+from django.conf import settings
+from django.db import close_old_connections
+from .models import UserActivity
+
+_STOP = object()
+
+class BackgroundBatchWriter:
+    """
+    Bounded queue drained by a fixed pool of worker threads.
+    Workers hand batches of up to `batch_size` items to `write_batch`.
+    When the queue is full new items are dropped and counted rather than
+    blocking the request thread.
+    """
+
+    def __init__(self, write_batch, max_size=10000, workers=2, batch_size=100, name="batch-writer"):
+        self.write_batch = write_batch
+        self.queue = queue.Queue(maxsize=max_size)
+        self.worker_count = workers
+        self.batch_size = batch_size
+        self.name = name
+        self._threads = []
+        self._lock = threading.Lock()
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+
+    def submit(self, item):
+        self._ensure_workers()
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+    def stats(self):
+        return {
+            "queue_depth": self.queue.qsize(),
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+            "workers": sum(t.is_alive() for t in self._threads),
+        }
+
+    def drain(self, timeout=10):
+        """Stop the workers after everything queued so far is written."""
+        threads = [t for t in self._threads if t.is_alive()]
+        for _ in threads:
+            self.queue.put(_STOP)
+        for t in threads:
+            t.join(timeout)
+        self._threads = []
+
+    def _ensure_workers(self):
+        if len(self._threads) == self.worker_count and all(t.is_alive() for t in self._threads):
+            return
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            while len(self._threads) < self.worker_count:
+                t = threading.Thread(target=self._run, name=f"{self.name}-{len(self._threads)}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            stop = item is _STOP
+            batch = [] if stop else [item]
+            while not stop and len(batch) < self.batch_size:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            if batch:
+                self._write(batch)
+            if stop:
+                return
+
+    def _write(self, batch):
+        close_old_connections()
+        try:
+            self.write_batch(batch)
+            with self._lock:
+                self.written += len(batch)
+        except Exception as e:
+            with self._lock:
+                self.failed += len(batch)
+            print(f"Error writing {self.name} batch: {e}")
+        finally:
+            close_old_connections()
+
+def _write_activity(rows):
+    UserActivity.objects.bulk_create(rows)
+
+login_activity_writer = BackgroundBatchWriter(
+    _write_activity,
+    max_size=getattr(settings, "USER_ACTIVITY_QUEUE_SIZE", 10000),
+    workers=getattr(settings, "USER_ACTIVITY_WORKERS", 2),
+    batch_size=getattr(settings, "USER_ACTIVITY_BATCH_SIZE", 100),
+    name="user-activity",
+)
+atexit.register(login_activity_writer.drain)
+
+def activity_queue_stats():
+    """Queue depth and drop/write counters for the login activity writer."""
+    return login_activity_writer.stats()
@@ -1,11 +1,45 @@
 from django.contrib import admin
-from .models import Profile
+from .models import Profile, SessionDailyStat, SessionDailySketch
+from .hyperloglog import HyperLogLog
 # Register your models here.
 
 
 class ProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'referred_by', 'email_verified', 'is_verified', 'is_active')
-    readonly_fields = ('user', 'password_reset_token_is_used', 'email_verified', 'password_reset_token_created_on')
+    readonly_fields = ('user', 'email_verified')
     list_filter = ('email_verified', 'is_verified', 'is_active') 
 
-admin.site.register(Profile, ProfileAdmin)
\ No newline at end of file
+admin.site.register(Profile, ProfileAdmin)
+
+
+@admin.register(SessionDailyStat)
+class SessionDailyStatAdmin(admin.ModelAdmin):
+    list_select_related = ("user",)
+    raw_id_fields = ("user",)
+    list_display = ("day", "user", "device_family", "browser_family", "logins", "sessions_closed", "total_session_seconds")
+    list_filter = ("day", "device_family", "browser_family")
+    ordering = ("-day",)
+
+    def has_add_permission(self, request):
+        # Maintained by the session analytics job only
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(SessionDailySketch)
+class SessionDailySketchAdmin(admin.ModelAdmin):
+    list_display = ("day", "distinct_users")
+    ordering = ("-day",)
+    exclude = ("registers",)
+
+    @admin.display(description="Distinct users (est.)")
+    def distinct_users(self, obj):
+        return HyperLogLog.from_bytes(bytes(obj.registers)).count()
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
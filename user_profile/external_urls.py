@@ -1,10 +1,12 @@
 from django.urls import path
 from .external_views import (
                     ExternalUserProfileView,
-                    ExternalBillingAddressView
+                    ExternalBillingAddressView,
+                    ExternalBatchView,
                     )
 
 urlpatterns = [
     path('api/user/profile/', ExternalUserProfileView.as_view(), name="profile"),
     path('api/billing_address/', ExternalBillingAddressView.as_view(), name="billing_address"),
+    path('api/batch/', ExternalBatchView.as_view(), name="batch"),
 ]
\ No newline at end of file
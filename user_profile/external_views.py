@@ -1,53 +1,149 @@
+from django.db import transaction
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework import status
+from rest_framework import serializers, status
 from .serializers import BillingAddressSerializer
 from .models import BillingAddress
+from .profile_cache import profile_response, get_profile_payload
 from user_auth_key.mixins import ExternalPlatformPrivateUserViewMixin
 
+BATCH_MAX_OPERATIONS = 50
+
+def upsert_billing_address(user, data):
+    """
+    Create or update the user's verified billing address.
+    Returns (status_code, body).
+    """
+    serializer = BillingAddressSerializer(data=data)
+
+    if serializer.is_valid():
+        validated_data = serializer.validated_data
+        validated_data["is_verified"] = True 
+        # Update if already exists, or create new
+        billing_address, created = BillingAddress.objects.update_or_create(
+            user=user,
+            defaults=validated_data
+        )
+        return status.HTTP_200_OK, {
+            "success": True,
+            "created": created,
+            "billing_address": BillingAddressSerializer(billing_address).data
+        }
+
+    return status.HTTP_400_BAD_REQUEST, serializer.errors
+
+# Operations accepted by ExternalBatchView: name -> (handler(request, data), writes)
+BATCH_OPERATIONS = {
+    "profile.get": (lambda request, data: (status.HTTP_200_OK, get_profile_payload(request.user)), False),
+    "billing_address.update": (lambda request, data: upsert_billing_address(request.user, data), True),
+}
+
 # Create your views here.
 class ExternalUserProfileView(ExternalPlatformPrivateUserViewMixin, APIView):
     def get(self, request):
-        user = request.user
-        billing = getattr(user, 'billing_address', None)
-
-        billing_data = None
-        if billing:
-            billing_data = {
-                "address": billing.address,
-                "state": billing.state,
-                "city": billing.city,
-                "apartment": billing.apartment,
-                "country": billing.country,
-                "zip_code": billing.zip_code,
-                "is_verified": billing.is_verified,
-            }
-
-        return Response({
-            "username": user.username,
-            "email": user.email,
-            "first_name": user.first_name,
-            "last_name": user.last_name,
-            "billing_address": billing_data
-        })
+        return profile_response(request, request.user)
     
 class ExternalBillingAddressView(ExternalPlatformPrivateUserViewMixin, APIView):
     def post(self, request):
-        user = request.user
-        serializer = BillingAddressSerializer(data=request.data)
-
-        if serializer.is_valid():
-            validated_data = serializer.validated_data
-            validated_data["is_verified"] = True 
-            # Update if already exists, or create new
-            billing_address, created = BillingAddress.objects.update_or_create(
-                user=user,
-                defaults=validated_data
+        status_code, body = upsert_billing_address(request.user, request.data)
+        return Response(body, status=status_code)
+
+class _RollBack(Exception):
+    pass
+
+class ExternalBatchView(ExternalPlatformPrivateUserViewMixin, APIView):
+    """
+    POST api/batch/ (external_urls)
+    Body (signed once like any other external request):
+      {"atomic": true,
+       "operations": [{"id": "1", "op": "profile.get"},
+                      {"id": "2", "op": "billing_address.update", "data": {...}}]}
+
+    Every operation is charged against the caller's throttles. With
+    "atomic" (the default) all writes commit together, or none do if any
+    operation fails. Returns per-operation results in request order.
+    """
+
+    def post(self, request):
+        operations = request.data.get("operations")
+        if not isinstance(operations, list) or not operations:
+            return Response({"error": "operations must be a non-empty list."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(operations) > BATCH_MAX_OPERATIONS:
+            return Response(
+                {"error": f"A batch may contain at most {BATCH_MAX_OPERATIONS} operations."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        for op in operations:
+            if not isinstance(op, dict) or op.get("op") not in BATCH_OPERATIONS:
+                return Response(
+                    {"error": "Unknown operation.", "operation": op,
+                     "supported": sorted(BATCH_OPERATIONS)},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        try:
+            # A real boolean: "false" / "0" from form or query input must not count as true
+            atomic = serializers.BooleanField().to_internal_value(
+                request.data.get("atomic", request.query_params.get("atomic", True))
             )
-            return Response({
-                "success": True,
-                "created": created,
-                "billing_address": BillingAddressSerializer(billing_address).data
-            }, status=status.HTTP_200_OK)
+        except serializers.ValidationError:
+            return Response({"error": "atomic must be a boolean."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # The envelope itself was charged once by DRF; charge the rest now
+        self.charge_throttles(request, len(operations) - 1)
+
+        writes = any(BATCH_OPERATIONS[op["op"]][1] for op in operations)
+        results = []
+
+        if atomic and writes:
+            try:
+                with transaction.atomic():
+                    results = self.run_operations(request, operations)
+                    if any(r["status"] >= 400 for r in results):
+                        raise _RollBack
+            except _RollBack:
+                return Response(
+                    {"atomic": True, "committed": False, "results": results},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        else:
+            results = self.run_operations(request, operations)
+
+        return Response({"atomic": bool(atomic and writes), "committed": True, "results": results})
+
+    def run_operations(self, request, operations):
+        results = []
+        for op in operations:
+            results.append({"id": op.get("id"), "op": op["op"], **self.run_operation(request, op)})
+        return results
+
+    def run_operation(self, request, op):
+        """
+        One operation in its own savepoint: a handler error becomes that
+        operation's result (failing an atomic batch) instead of a 500 that
+        loses every other result.
+        """
+        handler, _ = BATCH_OPERATIONS[op["op"]]
+        try:
+            with transaction.atomic():
+                status_code, body = handler(request, op.get("data") or {})
+        except Exception as e:
+            print(f"Batch operation {op['op']} failed: {e}")
+            return {"status": status.HTTP_500_INTERNAL_SERVER_ERROR, "body": {"error": "Operation failed."}}
+        return {"status": status_code, "body": body}
 
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+    def charge_throttles(self, request, count):
+        """
+        Charge `count` extra requests against every throttle at once. If one
+        refuses, the throttles already charged get the requests back: a
+        refused batch runs nothing, so it costs only its envelope.
+        """
+        if count <= 0:
+            return
+        charged = []
+        for throttle in self.get_throttles():
+            if not throttle.allow_request(request, self, count=count):
+                for done in charged:
+                    done.release(request, count)
+                self.throttled(request, throttle.wait())
+            charged.append(throttle)
@@ -0,0 +1,47 @@
+import hashlib
+import math
+
+class HyperLogLog:
+    """
+    Minimal HyperLogLog distinct counter (Flajolet et al.).
+    2**p one-byte registers; p=12 gives 4 KiB per sketch and ~1.6% standard error.
+    Sketches with the same p merge losslessly, so daily sketches roll up to WAU/MAU.
+    """
+
+    def __init__(self, p=12, registers=None):
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.m)
+        if len(self.registers) != self.m:
+            raise ValueError("Register count does not match precision")
+
+    @classmethod
+    def from_bytes(cls, data, p=12):
+        return cls(p, registers=data) if data else cls(p)
+
+    def to_bytes(self):
+        return bytes(self.registers)
+
+    def add(self, value):
+        x = int.from_bytes(hashlib.sha1(str(value).encode()).digest()[:8], "big")
+        index = x >> (64 - self.p)
+        rest = x & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        if other.p != self.p:
+            raise ValueError("Cannot merge sketches of different precision")
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+        return self
+
+    def count(self):
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction: linear counting
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from user_profile.session_analytics import update_session_analytics
+
+class Command(BaseCommand):
+    help = "Fold new UserActivity rows into the daily session analytics and distinct-user sketches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000, help="UserActivity ids per transaction")
+
+    def handle(self, *args, **opts):
+        folded = update_session_analytics(batch_size=opts["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Session analytics updated: {folded} logins folded in."))
+
+# python manage.py update_session_analytics
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.12 on 2026-10-19 06:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_profile', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='useractivity',
+            index=models.Index(fields=['user', 'login_time'], name='activity_user_login_idx'),
+        ),
+    ]
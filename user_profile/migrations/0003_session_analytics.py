@@ -0,0 +1,49 @@
+# Generated by Django 5.0.12 on 2026-10-19 06:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_profile', '0002_useractivity_user_login_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionAnalyticsCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SessionDailySketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('registers', models.BinaryField()),
+            ],
+            options={
+                'ordering': ['-day'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SessionDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('device_family', models.CharField(max_length=100)),
+                ('browser_family', models.CharField(max_length=100)),
+                ('logins', models.PositiveIntegerField(default=0)),
+                ('sessions_closed', models.PositiveIntegerField(default=0)),
+                ('total_session_seconds', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-day'],
+                'unique_together': {('day', 'device_family', 'browser_family')},
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.0.12 on 2026-10-19 06:13
+
+import hashlib
+from datetime import timedelta
+from django.db import migrations
+from django.utils import timezone
+
+
+def copy_outstanding_tokens(apps, schema_editor):
+    # Links already emailed keep working: store their hashes as one-time tokens
+    Profile = apps.get_model('user_profile', 'Profile')
+    OneTimeToken = apps.get_model('auth_core', 'OneTimeToken')
+    now = timezone.now()
+    rows = []
+    for user_id, token in Profile.objects.filter(email_verified=False).values_list('user_id', 'verification_token').iterator():
+        if token:
+            rows.append(OneTimeToken(
+                token_hash=hashlib.sha256(str(token).encode()).hexdigest(),
+                purpose='email_verification',
+                user_id=user_id,
+                expires_at=now + timedelta(days=7),
+            ))
+    resets = Profile.objects.filter(
+        password_reset_token__isnull=False,
+        password_reset_token_is_used=False,
+        password_reset_token_created_on__gt=now - timedelta(minutes=15),
+    ).values_list('user_id', 'password_reset_token', 'password_reset_token_created_on')
+    for user_id, token, created_on in resets.iterator():
+        rows.append(OneTimeToken(
+            token_hash=hashlib.sha256(str(token).encode()).hexdigest(),
+            purpose='password_reset',
+            user_id=user_id,
+            expires_at=created_on + timedelta(minutes=15),
+        ))
+    OneTimeToken.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_profile', '0003_session_analytics'),
+        ('auth_core', '0003_onetimetoken'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_outstanding_tokens, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='profile',
+            name='password_reset_token',
+        ),
+        migrations.RemoveField(
+            model_name='profile',
+            name='password_reset_token_created_on',
+        ),
+        migrations.RemoveField(
+            model_name='profile',
+            name='password_reset_token_is_used',
+        ),
+        migrations.RemoveField(
+            model_name='profile',
+            name='verification_token',
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.12 on 2026-10-19 17:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_profile', '0004_move_tokens_to_onetimetoken'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='sessiondailystat',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='sessiondailystat',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='session_daily_stats', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterUniqueTogether(
+            name='sessiondailystat',
+            unique_together={('day', 'user', 'device_family', 'browser_family')},
+        ),
+        migrations.AddIndex(
+            model_name='sessiondailystat',
+            index=models.Index(fields=['user', 'day'], name='sessionstat_user_day_idx'),
+        ),
+    ]
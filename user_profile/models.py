@@ -1,6 +1,5 @@
 from django.db import models
 from django.contrib.auth.models import User
-import uuid
 from django.utils import timezone
 from .constants import ROLE
 from . import utils
@@ -14,10 +13,6 @@ class Profile(models.Model):
     is_active = models.BooleanField(default=True)
     email_verified = models.BooleanField(default=False)
     profile_is_submited = models.BooleanField(default=False)
-    verification_token = models.UUIDField(default=uuid.uuid4, editable=False)
-    password_reset_token = models.UUIDField(editable=False, null=True, blank=True)
-    password_reset_token_is_used = models.BooleanField(default=True)
-    password_reset_token_created_on = models.DateTimeField(null=True, blank=True)
     failed_login_attempts = models.PositiveIntegerField(default=0)
     created_on = models.DateTimeField(auto_now_add=True)
     updated_on = models.DateTimeField(auto_now=True)
@@ -25,17 +20,14 @@ class Profile(models.Model):
     def generate_verification_token(self):
         return utils.generate_verification_token(self)
 
-    def get_verification_url(self):
-        return utils.get_verification_url(self)
+    def get_verification_url(self, token=None):
+        return utils.get_verification_url(self, token)
 
     def generate_password_reset_token(self):
         return utils.generate_password_reset_token(self)
 
-    def get_password_reset_token_url(self):
-        return utils.get_password_reset_token_url(self)
-
-    def is_password_reset_token_valid(self):
-        return utils.is_password_reset_token_valid(self)
+    def get_password_reset_token_url(self, token=None):
+        return utils.get_password_reset_token_url(self, token)
 
 class UserActivity(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -47,6 +39,12 @@ class UserActivity(models.Model):
     login_successful = models.BooleanField(default=True)
     session_duration = models.DurationField(null=True, blank=True)
     failed_login_attempts = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Latest-login lookup on logout
+            models.Index(fields=["user", "login_time"], name="activity_user_login_idx"),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.login_time}"
@@ -77,4 +75,45 @@ class Phone(models.Model):
     class Meta:
         constraints = [
             models.UniqueConstraint(fields=['user', 'phone'], name='unique_user_phone')
-        ]
\ No newline at end of file
+        ]
+class SessionDailyStat(models.Model):
+    """
+    Login/session counts per day, user, device family and browser family.
+    Folded from UserActivity by user_profile.session_analytics.
+    Rows folded before the user dimension existed have no user.
+    """
+    day = models.DateField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name="session_daily_stats")
+    device_family = models.CharField(max_length=100)
+    browser_family = models.CharField(max_length=100)
+    logins = models.PositiveIntegerField(default=0)
+    sessions_closed = models.PositiveIntegerField(default=0)
+    total_session_seconds = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("day", "user", "device_family", "browser_family")
+        indexes = [models.Index(fields=["user", "day"], name="sessionstat_user_day_idx")]
+        ordering = ["-day"]
+
+    def __str__(self):
+        return f"{self.day} {self.user_id} {self.device_family}/{self.browser_family}: {self.logins}"
+
+class SessionDailySketch(models.Model):
+    """HyperLogLog registers of the distinct users who logged in on `day`."""
+    day = models.DateField(unique=True)
+    registers = models.BinaryField()
+
+    class Meta:
+        ordering = ["-day"]
+
+    def __str__(self):
+        return f"Distinct users {self.day}"
+
+class SessionAnalyticsCheckpoint(models.Model):
+    """High-water mark: UserActivity ids up to last_id are folded in."""
+    name = models.CharField(max_length=50, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_id}"
@@ -0,0 +1,68 @@
+import uuid
+from django.core.cache import cache
+from django.db import connection
+from auth_core.conditional import quote_etag, conditional_response
+from .models import BillingAddress
+
+PAYLOAD_TTL = 60 * 60  # seconds; writes bump the version stamp on commit
+VERSION_CACHE_FORMAT = "user_profile_version_{user_id}"
+PAYLOAD_CACHE_FORMAT = "user_profile_payload_{user_id}_{version}"
+
+def get_profile_version(user_id):
+    """
+    Opaque per-user version stamp. A fresh random stamp is used whenever
+    the cache has none, so an evicted stamp can never resurrect an old ETag.
+    """
+    key = VERSION_CACHE_FORMAT.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+def bump_profile_version(user_id):
+    """Call after commit (transaction.on_commit): readers re-cache what they see then."""
+    cache.set(VERSION_CACHE_FORMAT.format(user_id=user_id), uuid.uuid4().hex, timeout=None)
+
+def build_profile_payload(user):
+    billing = BillingAddress.objects.filter(user_id=user.pk).first()
+
+    billing_data = None
+    if billing:
+        billing_data = {
+            "address": billing.address,
+            "state": billing.state,
+            "city": billing.city,
+            "apartment": billing.apartment,
+            "country": billing.country,
+            "zip_code": billing.zip_code,
+            "is_verified": billing.is_verified,
+        }
+
+    return {
+        "username": user.username,
+        "email": user.email,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "billing_address": billing_data
+    }
+
+def get_profile_payload(user, version=None):
+    version = version or get_profile_version(user.pk)
+    key = PAYLOAD_CACHE_FORMAT.format(user_id=user.pk, version=version)
+    payload = cache.get(key)
+    if payload is None:
+        payload = build_profile_payload(user)
+        # Inside a transaction the rows may still roll back; only cache committed state
+        if not connection.in_atomic_block:
+            cache.set(key, payload, timeout=PAYLOAD_TTL)
+    return payload
+
+def profile_response(request, user):
+    """
+    Profile GET with ETag / If-None-Match support. A 304 needs only the
+    version stamp; a 200 is served from the cached payload when possible.
+    """
+    version = get_profile_version(user.pk)
+    etag = quote_etag(f"profile-{user.pk}-{version}")
+    return conditional_response(request, etag, lambda: get_profile_payload(user, version))
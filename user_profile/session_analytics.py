@@ -0,0 +1,179 @@
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import F, Max, Min, Sum
+from django.utils import timezone
+from .hyperloglog import HyperLogLog
+from .models import UserActivity, SessionDailyStat, SessionDailySketch, SessionAnalyticsCheckpoint
+from .user_agent_cache import parse_user_agent
+
+CHECKPOINT_NAME = "user_activity"
+BATCH_SIZE = 5000  # UserActivity ids folded per transaction
+SETTLE_SECONDS = 60  # login rows are written in the background; leave the newest for the next run
+
+def _dimensions(device_info, browser_info):
+    device = (device_info or "Unknown")[:100]
+    browser = parse_user_agent(browser_info).browser_family if browser_info else "Unknown"
+    return device, (browser or "Unknown")[:100]
+
+def _upper_bound(last_id):
+    pending = UserActivity.objects.filter(id__gt=last_id)
+    recent_min = pending.filter(
+        login_time__gte=timezone.now() - timedelta(seconds=SETTLE_SECONDS)
+    ).aggregate(m=Min("id"))["m"]
+    if recent_min is not None:
+        return recent_min - 1
+    return pending.aggregate(m=Max("id"))["m"] or last_id
+
+def _fold(start_id, end_id):
+    """
+    Add successful logins with start_id < id <= end_id to the daily stats and sketches.
+    Sessions that already have a duration are counted as closed here; later
+    logouts are added by record_session_end().
+    """
+    stats = {}
+    sketches = {}
+    rows = (
+        UserActivity.objects.filter(id__gt=start_id, id__lte=end_id, login_successful=True)
+        .values_list("user_id", "login_time", "device_info", "browser_info", "session_duration")
+    )
+    for user_id, login_time, device_info, browser_info, duration in rows.iterator():
+        day = timezone.localtime(login_time).date()
+        key = (day, user_id) + _dimensions(device_info, browser_info)
+        entry = stats.setdefault(key, [0, 0, 0])
+        entry[0] += 1
+        if duration is not None:
+            entry[1] += 1
+            entry[2] += int(duration.total_seconds())
+        sketches.setdefault(day, HyperLogLog()).add(user_id)
+
+    if not stats:
+        return 0
+
+    existing = {
+        (s.day, s.user_id, s.device_family, s.browser_family): s
+        for s in SessionDailyStat.objects.filter(
+            day__in={k[0] for k in stats}, user_id__in={k[1] for k in stats}
+        )
+    }
+    to_update, to_create = [], []
+    for (day, user_id, device, browser), (logins, closed, seconds) in stats.items():
+        stat = existing.get((day, user_id, device, browser))
+        if stat:
+            stat.logins += logins
+            stat.sessions_closed += closed
+            stat.total_session_seconds += seconds
+            to_update.append(stat)
+        else:
+            to_create.append(SessionDailyStat(
+                day=day, user_id=user_id, device_family=device, browser_family=browser,
+                logins=logins, sessions_closed=closed, total_session_seconds=seconds,
+            ))
+    if to_update:
+        SessionDailyStat.objects.bulk_update(to_update, ["logins", "sessions_closed", "total_session_seconds"])
+    if to_create:
+        SessionDailyStat.objects.bulk_create(to_create)
+
+    existing_sketches = {s.day: s for s in SessionDailySketch.objects.filter(day__in=list(sketches))}
+    for day, sketch in sketches.items():
+        row = existing_sketches.get(day)
+        if row:
+            row.registers = sketch.merge(HyperLogLog.from_bytes(row.registers)).to_bytes()
+            row.save(update_fields=["registers"])
+        else:
+            SessionDailySketch.objects.create(day=day, registers=sketch.to_bytes())
+
+    return sum(v[0] for v in stats.values())
+
+def update_session_analytics(batch_size=BATCH_SIZE):
+    """
+    Catch the analytics store up with UserActivity from the stored high-water mark.
+    Returns the number of logins folded in.
+    """
+    folded = 0
+    while True:
+        with transaction.atomic():
+            checkpoint, _ = (
+                SessionAnalyticsCheckpoint.objects.select_for_update()
+                .get_or_create(name=CHECKPOINT_NAME)
+            )
+            upper = _upper_bound(checkpoint.last_id)
+            if upper <= checkpoint.last_id:
+                return folded
+
+            end_id = min(checkpoint.last_id + batch_size, upper)
+            folded += _fold(checkpoint.last_id, end_id)
+            checkpoint.last_id = end_id
+            checkpoint.save(update_fields=["last_id", "updated_at"])
+
+def record_session_end(activity):
+    """
+    Logout path: add a newly closed session to its day's stats with an
+    F() update. Rows not yet folded are skipped; the job picks up their
+    duration when it reaches them.
+    """
+    if activity.session_duration is None or not activity.login_successful:
+        return
+    last_id = (
+        SessionAnalyticsCheckpoint.objects.filter(name=CHECKPOINT_NAME)
+        .values_list("last_id", flat=True).first()
+    ) or 0
+    if activity.id > last_id:
+        return
+
+    device, browser = _dimensions(activity.device_info, activity.browser_info)
+    SessionDailyStat.objects.filter(
+        day=timezone.localtime(activity.login_time).date(),
+        user_id=activity.user_id,
+        device_family=device,
+        browser_family=browser,
+    ).update(
+        sessions_closed=F("sessions_closed") + 1,
+        total_session_seconds=F("total_session_seconds") + int(activity.session_duration.total_seconds()),
+    )
+
+def _distinct_users(sketches, end, days):
+    merged = HyperLogLog()
+    start = end - timedelta(days=days - 1)
+    for day, registers in sketches.items():
+        if start <= day <= end:
+            merged.merge(HyperLogLog.from_bytes(registers))
+    return merged.count()
+
+def get_session_analytics(start, end, user_id=None):
+    """
+    DAU per day, WAU/MAU as of `end`, average session length and the
+    device/browser mix for start..end, read from the aggregate tables only.
+    With `user_id`, logins, session length and the mix are that user's;
+    the distinct-user counts stay site-wide.
+    """
+    sketch_start = min(start, end - timedelta(days=29))
+    sketches = {
+        s.day: bytes(s.registers)
+        for s in SessionDailySketch.objects.filter(day__gte=sketch_start, day__lte=end)
+    }
+    stats = SessionDailyStat.objects.filter(day__gte=start, day__lte=end)
+    if user_id is not None:
+        stats = stats.filter(user_id=user_id)
+    totals = stats.aggregate(
+        logins=Sum("logins"), closed=Sum("sessions_closed"), seconds=Sum("total_session_seconds")
+    )
+    closed = totals["closed"] or 0
+
+    return {
+        "start": start,
+        "end": end,
+        "dau": [
+            {"day": day, "users": HyperLogLog.from_bytes(registers).count()}
+            for day, registers in sorted(sketches.items()) if day >= start
+        ],
+        "wau": _distinct_users(sketches, end, 7),
+        "mau": _distinct_users(sketches, end, 30),
+        "logins": totals["logins"] or 0,
+        "avg_session_seconds": (totals["seconds"] or 0) / closed if closed else None,
+        "devices": list(
+            stats.values("device_family").annotate(logins=Sum("logins")).order_by("-logins")
+        ),
+        "browsers": list(
+            stats.values("browser_family").annotate(logins=Sum("logins")).order_by("-logins")
+        ),
+    }
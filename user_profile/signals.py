@@ -1,25 +1,25 @@
 from django.contrib.auth.models import User
 from .models import Profile, UserActivity, Phone, BillingAddress
 from django.contrib.auth.signals import user_logged_in, user_logged_out
-from django.db.models.signals import post_save
+from functools import partial
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
 from django.dispatch import receiver
 from django.conf import settings
-from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.utils import timezone
-from user_agents import parse
-import threading
-from concurrent.futures import ThreadPoolExecutor
+from .user_agent_cache import parse_user_agent
+from email_outbox.services import enqueue_email
+from .profile_cache import bump_profile_version
+from .activity_queue import login_activity_writer
+from .session_analytics import record_session_end
 get_from_email = settings.EMAIL_HOST_USER
 business_name = settings.BUSINESS_NAME
 business_logo = settings.BUSINESS_LOGO
 contact_email = settings.CONTACT_EMAIL
 from_email = business_name + "<" + get_from_email + ">"
 
-# Create a ThreadPoolExecutor for managing threads
-executor = ThreadPoolExecutor(max_workers=5)  # You can adjust the number of workers
-
-# Define a function to send email notifications asynchronously
+# Queue the signup emails in the outbox (same transaction as the user insert)
 def send_email_notifications(profile, instance, created, new_email):
     if created or (profile.email_verified is False and profile.user.email is not None):
         send_email_verification(profile, new_email=new_email)
@@ -27,30 +27,55 @@ def send_email_notifications(profile, instance, created, new_email):
         # Send notification email to admin email address.
         title = "New User Created"
         details = f"A new user ({instance}) just created an account on {business_name}, go to the admin dashboard to create a deposit wallet for this user."
-        send_mail(
-            title, 
-            details, 
-            from_email, 
+        enqueue_email(
+            title,
+            details,
             [contact_email],
-            fail_silently=False,
+            from_email=from_email,
         )
 
 
+# User fields the profile (and the cached profile payload) depend on.
+# Saves that touch none of them, such as the last_login update on every
+# login, skip the profile sync entirely.
+PROFILE_SYNC_FIELDS = ("username", "email", "first_name", "last_name", "is_active")
+
+def _profile_sync_snapshot(user):
+    # Read __dict__ so deferred fields are never loaded just to snapshot them
+    return tuple(user.__dict__.get(name) for name in PROFILE_SYNC_FIELDS)
+
+@receiver(post_init, sender=User)
+def remember_profile_sync_fields(sender, instance, **kwargs):
+    instance._profile_sync_snapshot = _profile_sync_snapshot(instance)
+
+def profile_sync_fields_changed(instance, created, update_fields):
+    if created:
+        return True
+    if update_fields is not None and not set(update_fields) & set(PROFILE_SYNC_FIELDS):
+        return False
+    return getattr(instance, "_profile_sync_snapshot", None) != _profile_sync_snapshot(instance)
+
 @receiver(post_save, sender=User)
-def create_or_update_user_profile(sender, instance, created, **kwargs):
-    profile, _ = Profile.objects.get_or_create(user=instance)
-    
-    # Explicitly set the verification_token for new profiles
+def create_or_update_user_profile(sender, instance, created, update_fields=None, **kwargs):
+    changed = profile_sync_fields_changed(instance, created, update_fields)
+    instance._profile_sync_changed = changed
+    instance._profile_sync_snapshot = _profile_sync_snapshot(instance)
+    if not changed:
+        return
+
     if created:
-        profile.verification_token = profile.generate_verification_token()
-        profile.save()
+        profile, _ = Profile.objects.get_or_create(user=instance)
 
-        # Submit the email sending task to the ThreadPoolExecutor
-        executor.submit(send_email_notifications, profile, instance, created, instance.email)
+        # Queue the verification and admin emails; the outbox worker delivers them
+        try:
+            send_email_notifications(profile, instance, created, instance.email)
+        except Exception as e:
+            print(f"Error queueing signup emails: {e}")
     
-    # If the user is updated, save the profile
-    elif not created:
-        instance.profile.save()
+    # If the user is updated, touch only the profile's timestamp
+    else:
+        if not Profile.objects.filter(user=instance).update(updated_on=timezone.now()):
+            Profile.objects.create(user=instance)
 
 
 
@@ -73,18 +98,17 @@ def send_email_verification(profile, new_email=None):
     html_message = render_to_string('email_templates/verification_email.html', context)
     details = f"Hi {user_name} Click the link below to verify your email {verification_url}"
     to_email = new_email or profile.user.email 
-    send_mail(
+    enqueue_email(
             title,
             details,
-            from_email,
             [to_email],
-            fail_silently=False,
+            from_email=from_email,
             html_message=html_message,
         )
 
 def send_password_reset_email(user, profile, token):
     base_url = settings.BASE_URL.rstrip('/')
-    reset_link = profile.get_password_reset_token_url()
+    reset_link = profile.get_password_reset_token_url(token)
     reset_link = f"{base_url}{reset_link}"
     title = 'Password Reset'
     context = {
@@ -98,14 +122,13 @@ def send_password_reset_email(user, profile, token):
     }
     html_message = render_to_string('email_templates/password_reset.html', context)
     details = f'Click the following link to reset your password: {reset_link}'
-    send_mail(
+    enqueue_email(
         title,
         details,
-        from_email,
         [user.email],
-        fail_silently=False,
+        from_email=from_email,
         html_message=html_message,
-    )    
+    )
 
 @receiver(post_save, sender=User)
 def create_phone_when_user_is_created(sender, instance, created, **kwargs):
@@ -114,40 +137,64 @@ def create_phone_when_user_is_created(sender, instance, created, **kwargs):
 
 
 def log_user_login_task(user, ip_address, browser_info, device_info, failed_login_attempts):
-    UserActivity.objects.create(
+    # Written in batches by the bounded background writer
+    login_activity_writer.submit(UserActivity(
         user=user,
+        login_time=timezone.now(),
         ip_address=ip_address,
         browser_info=browser_info,
         device_info=device_info,
         failed_login_attempts=failed_login_attempts,
         login_successful=True
-    )
+    ))
 
 @receiver(user_logged_in)
 def log_user_login(sender, request, user, **kwargs):
     try:
         ip_address = request.META.get('REMOTE_ADDR')
         browser_info = request.META.get('HTTP_USER_AGENT')
-        user_agent = parse(request.META.get('HTTP_USER_AGENT', ''))
-        device_info = user_agent.device.family
+        user_agent = parse_user_agent(request.META.get('HTTP_USER_AGENT', ''))
+        device_info = user_agent.device_family
         failed_login_attempts = user.profile.failed_login_attempts
 
-        # Run the logging task in a separate thread
-        threading.Thread(target=log_user_login_task, args=(user, ip_address, browser_info, device_info, failed_login_attempts)).start()
+        log_user_login_task(user, ip_address, browser_info, device_info, failed_login_attempts)
     except Exception as e:
         print(f"Error logging user activity: {e}")
 
 @receiver(user_logged_out)
 def log_user_logout(sender, request, user, **kwargs):
-    try:
-        last_activity = UserActivity.objects.filter(user=user).latest('login_time')
+    if not user:
+        return
+    # Uses the (user, login_time) index
+    last_activity = (
+        UserActivity.objects.filter(user=user)
+        .order_by('-login_time')
+        .only('id', 'user_id', 'login_time', 'logout_time', 'login_successful', 'device_info', 'browser_info')
+        .first()
+    )
+    if last_activity:
+        newly_closed = last_activity.logout_time is None
         last_activity.logout_time = timezone.now()
         last_activity.session_duration = last_activity.logout_time - last_activity.login_time
-        last_activity.save()
-    except UserActivity.DoesNotExist:
-        pass
+        last_activity.save(update_fields=['logout_time', 'session_duration'])
+        if newly_closed:
+            record_session_end(last_activity)
 
 @receiver(post_save, sender=User)
 def create_billing_address(sender, instance, created, **kwargs):
     if created:
-        BillingAddress.objects.create(user=instance)
\ No newline at end of file
+        BillingAddress.objects.create(user=instance)
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=BillingAddress)
+@receiver(post_delete, sender=BillingAddress)
+def invalidate_profile_payload(sender, instance, **kwargs):
+    # New version stamp: cached payloads and client ETags go stale together.
+    # On commit, so a rolled-back write never moves the stamp and nothing
+    # can cache uncommitted rows under the new one.
+    if sender is User:
+        # Set by create_or_update_user_profile, which runs first
+        if getattr(instance, "_profile_sync_changed", True):
+            transaction.on_commit(partial(bump_profile_version, instance.pk))
+        return
+    transaction.on_commit(partial(bump_profile_version, instance.user_id))
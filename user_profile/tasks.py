@@ -0,0 +1,11 @@
+from celery import shared_task
+from user_profile.session_analytics import update_session_analytics
+
+
+@shared_task(name="user_profile.update_session_analytics")
+def update_session_analytics_task():
+    """
+    Periodic task: fold new UserActivity rows into the session analytics
+    store from the stored high-water mark.
+    """
+    return update_session_analytics()
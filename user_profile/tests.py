@@ -1,3 +1,363 @@
-from django.test import TestCase
+import json
+import time
+from datetime import timedelta
+from django.utils import timezone
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+from user_profile.hyperloglog import HyperLogLog
+from user_profile.models import Profile, BillingAddress, UserActivity, SessionDailyStat
+from user_profile.session_analytics import update_session_analytics, get_session_analytics, record_session_end
+from user_auth_key.signing import compute_signature
+from user_profile.activity_queue import BackgroundBatchWriter
+from user_profile.user_agent_cache import parse_user_agent, user_agent_cache_stats
+from rest_framework.throttling import BaseThrottle
+from user_auth_key.throttling import ExternalPlatformRateThrottle
+from unittest.mock import patch
+from user_profile.external_views import ExternalBatchView, BATCH_OPERATIONS
+from user_profile.profile_cache import get_profile_payload
+from user_profile.signals import log_user_logout
+from user_profile.views import UserProfileView, ResetPasswordView, VerifyEmailView, SessionAnalyticsView
+from django.utils.http import urlsafe_base64_encode
+from django.utils.encoding import force_bytes
 
-# Create your tests here.
+
+class ProfileConditionalGetTest(TransactionTestCase):
+    # Payloads are only cached outside transactions, so no per-test atomic block
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("alice", "alice@example.com", "pw", first_name="Alice")
+        self.view = UserProfileView.as_view(throttle_classes=[])
+        self.factory = APIRequestFactory()
+
+    def get(self, etag=None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        request = self.factory.get("/api/user/profile/", **headers)
+        force_authenticate(request, user=self.user)
+        return self.view(request)
+
+    def test_etag_round_trip(self):
+        first = self.get()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.data["first_name"], "Alice")
+        etag = first["ETag"]
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get(etag).status_code, 304)
+            self.assertEqual(self.get().status_code, 200)  # cached payload
+
+        BillingAddress.objects.update_or_create(
+            user=self.user,
+            defaults={"address": "1 Main St", "state": "LA", "city": "Ikeja", "country": "NG", "zip_code": "100001"},
+        )
+        changed = self.get(etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], etag)
+        self.assertEqual(changed.data["billing_address"]["city"], "Ikeja")
+
+    def test_rolled_back_writes_leave_no_cached_state(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                billing = BillingAddress.objects.get(user=self.user)
+                billing.city = "Lekki"
+                billing.save()
+                self.assertEqual(get_profile_payload(self.user)["billing_address"]["city"], "Lekki")
+                raise RuntimeError
+        self.assertEqual(self.get().data["billing_address"]["city"], "")
+
+
+class ExternalBatchViewTest(TransactionTestCase):
+    # Real commits and rollbacks, so the profile cache behaves as in production
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("alice", "alice@example.com", "pw")
+        self.key_pair = self.user.key_pair
+        self.factory = APIRequestFactory()
+
+    def post(self, envelope, view=None):
+        body = json.dumps(envelope).encode()
+        timestamp = str(int(time.time()))
+        request = self.factory.post(
+            "/api/batch/", body, content_type="application/json",
+            HTTP_X_PUBLIC_KEY=self.key_pair.public_key,
+            HTTP_X_TIMESTAMP=timestamp,
+            HTTP_X_SIGNATURE=compute_signature(self.key_pair.private_key, timestamp, body),
+        )
+        return (view or ExternalBatchView.as_view())(request)
+
+    def address(self, city):
+        return {"address": "1 Main St", "state": "LA", "city": city, "country": "NG", "zip_code": "100001"}
+
+    def test_operations_run_in_order(self):
+        response = self.post({"operations": [
+            {"id": "a", "op": "billing_address.update", "data": self.address("Ikeja")},
+            {"id": "b", "op": "profile.get"},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r["status"] for r in response.data["results"]], [200, 200])
+        self.assertEqual(response.data["results"][1]["body"]["billing_address"]["city"], "Ikeja")
+
+    def test_failed_operation_rolls_back_the_batch(self):
+        response = self.post({"operations": [
+            {"id": "a", "op": "billing_address.update", "data": self.address("Ikeja")},
+            {"id": "b", "op": "billing_address.update", "data": {}},
+        ]})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.data["committed"])
+        self.assertFalse(BillingAddress.objects.filter(user=self.user, city="Ikeja").exists())
+
+    def test_rolled_back_batch_leaves_no_cached_state(self):
+        response = self.post({"operations": [
+            {"id": "a", "op": "billing_address.update", "data": self.address("Ikeja")},
+            {"id": "b", "op": "profile.get"},
+            {"id": "c", "op": "billing_address.update", "data": {}},
+        ]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["results"][1]["body"]["billing_address"]["city"], "Ikeja")
+        self.assertEqual(get_profile_payload(self.user)["billing_address"]["city"], "")
+
+    def test_handler_errors_become_results_and_roll_back(self):
+        def boom(request, data):
+            raise ValueError("boom")
+
+        with patch.dict(BATCH_OPERATIONS, {"boom": (boom, True)}):
+            response = self.post({"operations": [
+                {"id": "a", "op": "billing_address.update", "data": self.address("Ikeja")},
+                {"id": "b", "op": "boom"},
+            ]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([r["status"] for r in response.data["results"]], [200, 500])
+        self.assertFalse(BillingAddress.objects.filter(user=self.user, city="Ikeja").exists())
+
+    def test_atomic_false_from_form_input(self):
+        response = self.post({"atomic": "false", "operations": [
+            {"id": "a", "op": "billing_address.update", "data": self.address("Ikeja")},
+            {"id": "b", "op": "billing_address.update", "data": {}},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data["atomic"])
+        self.assertTrue(BillingAddress.objects.filter(user=self.user, city="Ikeja").exists())
+        self.assertEqual(self.post({"atomic": "maybe", "operations": [{"op": "profile.get"}]}).status_code, 400)
+
+    def test_each_operation_counts_against_the_throttle(self):
+        class TightThrottle(ExternalPlatformRateThrottle):
+            def __init__(self):
+                super().__init__(rate_limit=3)
+
+        view = ExternalBatchView.as_view(throttle_classes=[TightThrottle])
+        self.assertEqual(self.post({"operations": [{"op": "profile.get"}] * 3}, view).status_code, 200)
+        self.assertEqual(self.post({"operations": [{"op": "profile.get"}]}, view).status_code, 429)
+
+    def test_rejected_batches_cost_only_their_envelope(self):
+        class TightThrottle(ExternalPlatformRateThrottle):
+            def __init__(self):
+                super().__init__(rate_limit=4)
+
+        class EnvelopeOnlyThrottle(BaseThrottle):
+            def allow_request(self, request, view, count=1):
+                return count == 1
+
+            def release(self, request, count=1):
+                pass
+
+        view = ExternalBatchView.as_view(throttle_classes=[TightThrottle])
+        self.assertEqual(self.post({"atomic": "maybe", "operations": [{"op": "profile.get"}] * 3}, view).status_code, 400)
+
+        refusing = ExternalBatchView.as_view(throttle_classes=[TightThrottle, EnvelopeOnlyThrottle])
+        self.assertEqual(self.post({"operations": [{"op": "profile.get"}] * 3}, refusing).status_code, 429)
+        self.assertEqual(len(cache.get(f"throttle_key_pair_{self.key_pair.pk}")), 2)
+
+        # Both envelopes charged, nothing else: two more operations still fit
+        self.assertEqual(self.post({"operations": [{"op": "profile.get"}] * 2}, view).status_code, 200)
+
+
+class BackgroundBatchWriterTest(TestCase):
+
+    def test_batches_are_written_and_drained(self):
+        batches = []
+        writer = BackgroundBatchWriter(batches.append, max_size=100, workers=2, batch_size=10)
+        for i in range(35):
+            self.assertTrue(writer.submit(i))
+        writer.drain()
+
+        self.assertEqual(sorted(i for batch in batches for i in batch), list(range(35)))
+        self.assertTrue(all(len(batch) <= 10 for batch in batches))
+        self.assertEqual(writer.stats()["written"], 35)
+        self.assertEqual(writer.stats()["queue_depth"], 0)
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        writer = BackgroundBatchWriter(lambda batch: None, max_size=2, workers=0)
+        results = [writer.submit(i) for i in range(5)]
+        self.assertEqual(results, [True, True, False, False, False])
+        self.assertEqual(writer.stats()["dropped"], 3)
+        self.assertEqual(writer.stats()["queue_depth"], 2)
+
+
+class UserAgentCacheTest(TestCase):
+
+    UA = (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+    )
+
+    def test_repeated_strings_are_served_from_the_cache(self):
+        before = user_agent_cache_stats()
+        first = parse_user_agent(self.UA)
+        second = parse_user_agent(self.UA)
+        after = user_agent_cache_stats()
+
+        self.assertIs(first, second)
+        self.assertEqual(first.browser_family, "Chrome")
+        self.assertEqual(first.os_info, "Windows 10")
+        self.assertGreaterEqual(after["hits"] - before["hits"], 1)
+
+
+class SessionAnalyticsTest(TestCase):
+
+    UA = UserAgentCacheTest.UA
+
+    def setUp(self):
+        self.users = [User.objects.create_user(f"user{i}", f"user{i}@example.com", "pw") for i in range(3)]
+        self.yesterday = timezone.now() - timedelta(days=1)
+
+    def login(self, user, duration=None):
+        return UserActivity.objects.create(
+            user=user, login_time=self.yesterday, device_info="Other", browser_info=self.UA,
+            session_duration=duration,
+        )
+
+    def test_fold_and_logout_update(self):
+        self.login(self.users[0], duration=timedelta(minutes=10))
+        self.login(self.users[0])
+        open_session = self.login(self.users[1])
+        self.assertEqual(update_session_analytics(), 3)
+        self.assertEqual(update_session_analytics(), 0)
+
+        open_session.session_duration = timedelta(minutes=20)
+        record_session_end(open_session)
+
+        stats = {s.user_id: s for s in SessionDailyStat.objects.all()}
+        self.assertEqual(set(stats), {self.users[0].pk, self.users[1].pk})
+        first, second = stats[self.users[0].pk], stats[self.users[1].pk]
+        self.assertEqual((first.browser_family, first.logins, first.sessions_closed), ("Chrome", 2, 1))
+        self.assertEqual((second.logins, second.sessions_closed, second.total_session_seconds), (1, 1, 1200))
+
+        day = timezone.localtime(self.yesterday).date()
+        report = get_session_analytics(day, day)
+        self.assertEqual(report["dau"], [{"day": day, "users": 2}])
+        self.assertEqual(report["mau"], 2)
+        self.assertEqual(report["avg_session_seconds"], 900)
+        self.assertEqual(get_session_analytics(day, day, user_id=self.users[0].pk)["logins"], 2)
+
+    def test_logout_closes_the_session_without_deferred_loads(self):
+        self.login(self.users[0])
+        update_session_analytics()
+        # A field left out of only() is fetched later through refresh_from_db
+        with patch.object(UserActivity, "refresh_from_db") as deferred_load:
+            log_user_logout(sender=User, request=None, user=self.users[0])
+        deferred_load.assert_not_called()
+        self.assertEqual(SessionDailyStat.objects.get(user=self.users[0]).sessions_closed, 1)
+
+    def test_view_rejects_impossible_dates(self):
+        admin = User.objects.create_user("admin", "admin@example.com", "pw", is_staff=True)
+        for query in ("end=2025-02-30", "start=2025-02-30"):
+            request = APIRequestFactory().get(f"/api/analytics/sessions/?{query}")
+            force_authenticate(request, user=admin)
+            self.assertEqual(SessionAnalyticsView.as_view(throttle_classes=[])(request).status_code, 400)
+
+    def test_hyperloglog_estimate_and_merge(self):
+        a, b = HyperLogLog(), HyperLogLog()
+        for i in range(5000):
+            a.add(i)
+            b.add(i + 2500)
+        self.assertAlmostEqual(a.count(), 5000, delta=250)
+        self.assertAlmostEqual(a.merge(b).count(), 7500, delta=375)
+
+
+class ProfileSyncTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user("alice", "alice@example.com", "pw")
+
+    def test_login_save_costs_one_query(self):
+        user = User.objects.get(pk=self.user.pk)
+        user.last_login = timezone.now()
+        with self.assertNumQueries(1):
+            user.save(update_fields=["last_login"])
+
+    def test_real_login_query_count(self):
+        # Through django.contrib.auth.login: last_login save and user_logged_in
+        with patch("user_profile.signals.login_activity_writer") as writer, \
+                CaptureQueriesContext(connection) as ctx:
+            self.assertTrue(self.client.login(username="alice", password="pw"))
+        self.assertEqual(len(ctx.captured_queries), 17)
+        writer.submit.assert_called_once()
+
+        # The rest is session bookkeeping: authenticate, the last_login
+        # UPDATE and the profile read for the activity row; no profile write
+        app_queries = [
+            q["sql"] for q in ctx.captured_queries
+            if "django_session" not in q["sql"] and "SAVEPOINT" not in q["sql"]
+        ]
+        self.assertEqual([sql.split()[0] for sql in app_queries], ["SELECT", "UPDATE", "SELECT"])
+        self.assertIn("last_login", app_queries[1])
+        self.assertIn("user_profile_profile", app_queries[2])
+
+    def test_unchanged_full_save_skips_profile(self):
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            user.save()
+
+    def test_email_change_touches_profile_only(self):
+        user = User.objects.get(pk=self.user.pk)
+        before = user.profile.updated_on
+        user.email = "new@example.com"
+        with self.assertNumQueries(2):
+            user.save(update_fields=["email"])
+        user.profile.refresh_from_db()
+        self.assertGreater(user.profile.updated_on, before)
+
+
+class ProfileTokenTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user("alice", "alice@example.com", "pw")
+        self.factory = APIRequestFactory()
+
+    def post(self, view, data):
+        request = self.factory.post("/", data, format="json", HTTP_X_API_KEY="test")
+        return view.as_view(authentication_classes=[], throttle_classes=[])(request)
+
+    def test_verification_token_is_single_use(self):
+        token = self.user.profile.generate_verification_token()
+        self.assertEqual(self.post(VerifyEmailView, {"token": token}).status_code, 200)
+        self.user.profile.refresh_from_db()
+        self.assertTrue(self.user.profile.email_verified)
+        self.assertEqual(self.post(VerifyEmailView, {"token": token}).status_code, 400)
+
+    def test_verification_recreates_a_missing_profile(self):
+        token = self.user.profile.generate_verification_token()
+        Profile.objects.filter(user=self.user).delete()
+        self.assertEqual(self.post(VerifyEmailView, {"token": token}).status_code, 200)
+        self.assertTrue(Profile.objects.get(user=self.user).email_verified)
+
+    def test_reset_token_is_bound_to_its_user_and_replaced_by_newer_ones(self):
+        other = User.objects.create_user("bob", "bob@example.com", "pw")
+        stale = self.user.profile.generate_password_reset_token()
+        token = self.user.profile.generate_password_reset_token()
+
+        def reset(user, raw):
+            uidb64 = urlsafe_base64_encode(force_bytes(user.pk))
+            return self.post(ResetPasswordView, {"uidb64": uidb64, "token": raw, "new_password": "N3w-password!"})
+
+        self.assertEqual(reset(self.user, stale).status_code, 400)
+        self.assertEqual(reset(other, token).status_code, 400)
+        self.assertEqual(reset(self.user, token).status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("N3w-password!"))
+        self.assertEqual(reset(self.user, token).status_code, 400)
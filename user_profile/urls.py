@@ -4,7 +4,8 @@ from .views import (
                     BillingAddressView,
                     VerifyEmailView,
                     ResetPasswordView,
-                    RequestPasswordResetView
+                    RequestPasswordResetView,
+                    SessionAnalyticsView,
                     )
 
 app_name = 'user_profile'
@@ -15,4 +16,5 @@ urlpatterns = [
     path("api/user/verify_email/", VerifyEmailView.as_view()),
     path("api/user/request_password_reset/", RequestPasswordResetView.as_view()),
     path("api/user/reset_password/", ResetPasswordView.as_view()),
+    path("api/analytics/sessions/", SessionAnalyticsView.as_view(), name="session_analytics"),
 ]
\ No newline at end of file
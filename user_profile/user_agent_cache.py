@@ -0,0 +1,49 @@
+from collections import namedtuple
+from functools import lru_cache
+from django.conf import settings
+from user_agents import parse
+
+MAX_UA_LENGTH = 512  # longer strings are truncated before parsing and caching
+
+class ParsedUserAgent(namedtuple("ParsedUserAgent", [
+    "browser_family", "browser_version", "os_family", "os_version", "device_family",
+])):
+    """Compact, immutable result of parsing a User-Agent header."""
+    __slots__ = ()
+
+    @property
+    def browser_info(self):
+        return f"{self.browser_family} {self.browser_version}".strip()
+
+    @property
+    def os_info(self):
+        return f"{self.os_family} {self.os_version}".strip()
+
+@lru_cache(maxsize=getattr(settings, "USER_AGENT_CACHE_SIZE", 4096))
+def _parse_cached(ua_string):
+    ua = parse(ua_string)
+    return ParsedUserAgent(
+        ua.browser.family,
+        ua.browser.version_string,
+        ua.os.family,
+        ua.os.version_string,
+        ua.device.family,
+    )
+
+def parse_user_agent(ua_string):
+    """
+    Parse a User-Agent string through a shared, bounded LRU cache.
+    Real traffic has few distinct UA strings, so most calls skip ua-parser's regexes.
+    """
+    return _parse_cached((ua_string or "")[:MAX_UA_LENGTH])
+
+def user_agent_cache_stats():
+    info = _parse_cached.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "max_size": info.maxsize,
+        "hit_rate": info.hits / lookups if lookups else 0.0,
+    }
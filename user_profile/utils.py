@@ -1,63 +1,52 @@
-import uuid
-from datetime import timedelta
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
 from django.conf import settings
 from django.utils import timezone
 from django.shortcuts import redirect
-from user_agents import parse
+from auth_core.models import TokenPurpose
+from auth_core.tokens import issue_token, revoke_tokens
+from .user_agent_cache import parse_user_agent
 
 def generate_verification_token(profile):
-    if not profile.verification_token:
-        profile.verification_token = uuid.uuid4()
-    return str(profile.verification_token)
+    """Issue a fresh email verification token; earlier links stop working."""
+    revoke_tokens(TokenPurpose.EMAIL_VERIFICATION, user=profile.user)
+    return issue_token(TokenPurpose.EMAIL_VERIFICATION, user=profile.user)
 
 
-def get_verification_url(profile):
+def get_verification_url(profile, token=None):
     """
     Generate the frontend-facing verification link.
     Example: http://127.0.0.1:8001/auth/verify_email/<token>/
     """
-    token = generate_verification_token(profile)
+    token = token or generate_verification_token(profile)
     base_frontend_url = getattr(settings, "FRONTEND_BASE_URL", "").rstrip("/")
     return f"{base_frontend_url}/auth/verify_email/{token}/"
 
 
 def generate_password_reset_token(profile):
-    if profile.password_reset_token and is_password_reset_token_valid(profile):
-        return str(profile.password_reset_token)
-    profile.password_reset_token = uuid.uuid4()
-    profile.password_reset_token_created_on = timezone.now()
-    profile.password_reset_token_is_used = False
-    profile.save()
-    return str(profile.password_reset_token)
+    """Issue a fresh password reset token; earlier links stop working."""
+    revoke_tokens(TokenPurpose.PASSWORD_RESET, user=profile.user)
+    return issue_token(TokenPurpose.PASSWORD_RESET, user=profile.user)
 
 
-def get_password_reset_token_url(profile):
+def get_password_reset_token_url(profile, token=None):
     """
     Generate the frontend-facing password reset link.
     Example: http://127.0.0.1:8001/auth/reset_password/<uidb64>/<token>/
     """
     uidb64 = urlsafe_base64_encode(force_bytes(profile.user.id))
-    token = generate_password_reset_token(profile)
+    token = token or generate_password_reset_token(profile)
     base_frontend_url = getattr(settings, "FRONTEND_BASE_URL", "").rstrip("/")
     return f"{base_frontend_url}/auth/reset_password/{uidb64}/{token}/"
 
-
-def is_password_reset_token_valid(profile):
-    if profile.password_reset_token_created_on:
-        expiration_time = profile.password_reset_token_created_on + timedelta(minutes=15)
-        return timezone.now() <= expiration_time
-    return False
-
 def log_login_info(user, request):
     from .models import UserActivity
     last_login = user.last_login or timezone.now()
     ip_address = get_client_ip(request)
-    user_agent = parse(request.META.get('HTTP_USER_AGENT', ''))
-    browser_info = f"{user_agent.browser.family} {user_agent.browser.version_string}"
-    os_info = f"{user_agent.os.family} {user_agent.os.version_string}"
-    device_info = user_agent.device.family if user_agent.device.family else 'Unknown'
+    user_agent = parse_user_agent(request.META.get('HTTP_USER_AGENT', ''))
+    browser_info = user_agent.browser_info
+    os_info = user_agent.os_info
+    device_info = user_agent.device_family if user_agent.device_family else 'Unknown'
     login_duration = timezone.now() - last_login if last_login else None
 
     try:
@@ -1,38 +1,44 @@
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework import status, generics
+from rest_framework.permissions import IsAdminUser
 from django.contrib.auth.models import User
 from django.utils.http import urlsafe_base64_decode
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from datetime import timedelta
 from .serializers import BillingAddressSerializer
 from .models import BillingAddress, Profile
 from .signals import send_password_reset_email
+from .profile_cache import profile_response
+from .session_analytics import get_session_analytics
 from auth_core.views import PrivateUserViewMixin, PublicViewMixin
+from auth_core.models import TokenPurpose
+from auth_core.tokens import consume_token
 
 # Create your views here.
 class UserProfileView(PrivateUserViewMixin, APIView):
     def get(self, request):
-        user = request.user
-        billing = getattr(user, 'billing_address', None)
-
-        billing_data = None
-        if billing:
-            billing_data = {
-                "address": billing.address,
-                "state": billing.state,
-                "city": billing.city,
-                "apartment": billing.apartment,
-                "country": billing.country,
-                "zip_code": billing.zip_code,
-                "is_verified": billing.is_verified,
-            }
-
-        return Response({
-            "username": user.username,
-            "email": user.email,
-            "first_name": user.first_name,
-            "last_name": user.last_name,
-            "billing_address": billing_data
-        })
+        return profile_response(request, request.user)
+
+class SessionAnalyticsView(PrivateUserViewMixin, APIView):
+    """
+    GET /api/analytics/sessions/?start=YYYY-MM-DD&end=YYYY-MM-DD  (staff only)
+    DAU/WAU/MAU, average session length and device/browser mix,
+    served from the incrementally maintained aggregates.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        today = timezone.localdate()
+        try:
+            end = parse_date(request.query_params.get("end") or "") or today
+            start = parse_date(request.query_params.get("start") or "") or end - timedelta(days=29)
+        except ValueError:  # well formed but not a real date, e.g. 2025-02-30
+            return Response({"error": "start and end must be valid dates."}, status=status.HTTP_400_BAD_REQUEST)
+        if start > end:
+            return Response({"error": "start must be on or before end."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(get_session_analytics(start, end))
 
 class RequestPasswordResetView(PublicViewMixin, generics.GenericAPIView):
     """
@@ -86,13 +92,14 @@ class VerifyEmailView(PublicViewMixin, generics.GenericAPIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        try:
-            profile = Profile.objects.get(verification_token=token)
-        except Profile.DoesNotExist:
+        record = consume_token(token, TokenPurpose.EMAIL_VERIFICATION)
+        if record is None or record.user_id is None:
             return Response(
                 {"error": "Invalid or expired verification token."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        # The token is spent by now, so a missing profile is recreated rather than a 500
+        profile, _ = Profile.objects.get_or_create(user_id=record.user_id)
 
         if profile.email_verified:
             return Response(
@@ -138,15 +145,14 @@ class ResetPasswordView(PublicViewMixin, generics.GenericAPIView):
         try:
             uid = urlsafe_base64_decode(uidb64).decode()
             user = User.objects.get(pk=uid)
-            profile = user.profile
         except Exception:
             return Response(
                 {"error": "Invalid or malformed reset link."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Validate token
-        if not profile.is_password_reset_token_valid() or str(profile.password_reset_token) != token:
+        # Spend the token; it must belong to this user
+        if consume_token(token, TokenPurpose.PASSWORD_RESET, user=user) is None:
             return Response(
                 {"error": "Invalid or expired reset token."},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -156,9 +162,6 @@ class ResetPasswordView(PublicViewMixin, generics.GenericAPIView):
         user.set_password(new_password)
         user.save()
 
-        profile.password_reset_token_is_used = True
-        profile.save()
-
         return Response(
             {"message": "Password has been reset successfully."},
             status=status.HTTP_200_OK,